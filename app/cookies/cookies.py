@@ -40,6 +40,64 @@ class CookiesManager:
     async def delete_cache(self, key: str):
         await self.redis.delete(key)    
 
+    # ------------------------------------------------------------------
+    # Sets
+    # ------------------------------------------------------------------
+    async def add_to_set(self, key: str, *members: str):
+        if members:
+            await self.redis.sadd(key, *members)
+
+    async def get_set(self, key: str) -> set:
+        return set(await self.redis.smembers(key))
+
+    # ------------------------------------------------------------------
+    # Pub/Sub
+    # ------------------------------------------------------------------
+    async def publish(self, channel: str, *messages: Any):
+        if not messages:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for message in messages:
+                pipe.publish(channel, json.dumps(message))
+            await pipe.execute()
+
+    async def subscribe(self, channel: str, timeout: float):
+        """Yields messages published on `channel`; yields None after `timeout` seconds without one."""
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+                yield json.loads(message["data"]) if message else None
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+
+    # ------------------------------------------------------------------
+    # Distributed Locks (lease based)
+    # ------------------------------------------------------------------
+    async def acquire_lock(self, key: str, owner: str, ttl_ms: int) -> bool:
+        """Takes the lock if free, or extends it if `owner` already holds it."""
+        acquired = await self.redis.set(key, owner, nx=True, px=ttl_ms)
+        if acquired:
+            return True
+        script = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('pexpire', KEYS[1], ARGV[2])
+        end
+        return 0
+        """
+        return bool(await self.redis.eval(script, 1, key, owner, ttl_ms))
+
+    async def release_lock(self, key: str, owner: str) -> bool:
+        script = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('del', KEYS[1])
+        end
+        return 0
+        """
+        return bool(await self.redis.eval(script, 1, key, owner))
+
 
 
 
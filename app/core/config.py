@@ -21,6 +21,35 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 1440)
 # ====================================================
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
 REDIS_URL = os.getenv("REDIS_URL")
+LIVE_EVENTS_HEARTBEAT_SECONDS = int(os.getenv("LIVE_EVENTS_HEARTBEAT_SECONDS", 15))
+
+# ====================================================
+# Scheduler Environment Variables
+# ====================================================
+SCHEDULER_LEASE_SECONDS = int(os.getenv("SCHEDULER_LEASE_SECONDS", 30))
+ABSENCE_GRACE_MINUTES = int(os.getenv("ABSENCE_GRACE_MINUTES", 60))
+
+# ====================================================
+# Cache Environment Variables
+# ====================================================
+CALENDAR_CACHE_TTL_SECONDS = int(os.getenv("CALENDAR_CACHE_TTL_SECONDS", 300))
+DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", 30))
+DASHBOARD_CACHE_MAX_STALE_SECONDS = int(os.getenv("DASHBOARD_CACHE_MAX_STALE_SECONDS", 600))
+EMPLOYEE_DIRECTORY_REFRESH_SECONDS = int(os.getenv("EMPLOYEE_DIRECTORY_REFRESH_SECONDS", 30))
+EMPLOYEE_DIRECTORY_RELOAD_SECONDS = int(os.getenv("EMPLOYEE_DIRECTORY_RELOAD_SECONDS", 600))
+EMPLOYEE_OVERVIEW_CACHE_TTL_SECONDS = int(os.getenv("EMPLOYEE_OVERVIEW_CACHE_TTL_SECONDS", 60))
+ROADMAP_ROLLUP_CACHE_TTL_SECONDS = int(os.getenv("ROADMAP_ROLLUP_CACHE_TTL_SECONDS", 300))
+LEAVE_TYPE_CACHE_TTL_SECONDS = int(os.getenv("LEAVE_TYPE_CACHE_TTL_SECONDS", 300))
+DASHBOARD_SECTION_TIMEOUT_SECONDS = float(os.getenv("DASHBOARD_SECTION_TIMEOUT_SECONDS", 10))
+# Per-section cache TTLs: cheap, fast-changing widgets refresh often, expensive ones rarely
+DASHBOARD_SECTION_TTL_SECONDS = {
+    "attendance": int(os.getenv("DASHBOARD_ATTENDANCE_TTL_SECONDS", 15)),
+    "tasks": int(os.getenv("DASHBOARD_TASKS_TTL_SECONDS", 60)),
+    "leaves": int(os.getenv("DASHBOARD_LEAVES_TTL_SECONDS", 60)),
+    "projects": int(os.getenv("DASHBOARD_PROJECTS_TTL_SECONDS", 300)),
+    "employees": int(os.getenv("DASHBOARD_EMPLOYEES_TTL_SECONDS", 300)),
+    "events": int(os.getenv("DASHBOARD_EVENTS_TTL_SECONDS", 900)),
+}
 
 # ====================================================
 # AI Environment Variables
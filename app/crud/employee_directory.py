@@ -0,0 +1,182 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from bson import ObjectId
+from app.utils import get_employee_basic_details
+from app.core.config import EMPLOYEE_DIRECTORY_REFRESH_SECONDS, EMPLOYEE_DIRECTORY_RELOAD_SECONDS
+
+# Fields loaded into the directory; everything else stays in the database
+DIRECTORY_PROJECTION = {
+    "employee_no_id": 1,
+    "biometric_id": 1,
+    "first_name": 1,
+    "last_name": 1,
+    "name": 1,
+    "email": 1,
+    "designation": 1,
+    "department": 1,
+    "profile_picture": 1,
+    "status": 1,
+    "shift_id": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+
+def _to_record(doc: dict) -> dict:
+    record = get_employee_basic_details(doc)
+    record["biometric_id"] = str(doc["biometric_id"]).strip() if doc.get("biometric_id") else None
+    record["shift_id"] = doc.get("shift_id")
+    return record
+
+
+def _latest_change(doc: dict) -> Optional[datetime]:
+    stamps = [v for v in (doc.get("updated_at"), doc.get("created_at")) if isinstance(v, datetime)]
+    return max(stamps) if stamps else None
+
+
+class EmployeeDirectory:
+    """
+    Process-wide, in-memory index of compact employee records (basic details plus
+    biometric_id and shift_id), looked up by Mongo _id, employee_no_id,
+    biometric_id or email.
+
+    The directory is loaded once and kept current incrementally: employees whose
+    updated_at/created_at moved since the last sync are re-read at most every
+    EMPLOYEE_DIRECTORY_REFRESH_SECONDS, and the repository's employee writes
+    update it directly. A full reload every EMPLOYEE_DIRECTORY_RELOAD_SECONDS
+    drops employees deleted through other workers.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._by_id: Dict[str, dict] = {}
+        self._by_no_id: Dict[str, dict] = {}
+        self._by_biometric_id: Dict[str, dict] = {}
+        self._by_email: Dict[str, dict] = {}
+        self._by_name: Dict[str, Dict[str, dict]] = {}  # names are not unique
+        self._last_change: Optional[datetime] = None
+        self._loaded_at = 0.0
+        self._refreshed_at = 0.0
+        self._lock = asyncio.Lock()
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+    def _index(self, record: dict):
+        self._unindex(record["id"])
+        self._by_id[record["id"]] = record
+        if record.get("employee_no_id"):
+            self._by_no_id[str(record["employee_no_id"])] = record
+        if record.get("biometric_id"):
+            self._by_biometric_id[record["biometric_id"]] = record
+        if record.get("email"):
+            self._by_email[record["email"].lower()] = record
+        if record.get("name"):
+            self._by_name.setdefault(record["name"], {})[record["id"]] = record
+
+    def _unindex(self, employee_id: str):
+        old = self._by_id.pop(employee_id, None)
+        if not old:
+            return
+        for index, key in (
+            (self._by_no_id, str(old.get("employee_no_id") or "")),
+            (self._by_biometric_id, old.get("biometric_id") or ""),
+            (self._by_email, (old.get("email") or "").lower()),
+        ):
+            if index.get(key) is old:
+                del index[key]
+        same_name = self._by_name.get(old.get("name") or "", {})
+        same_name.pop(employee_id, None)
+        if not same_name:
+            self._by_name.pop(old.get("name") or "", None)
+
+    def _apply(self, docs: List[dict]):
+        for doc in docs:
+            self._index(_to_record(doc))
+            changed = _latest_change(doc)
+            if changed and (self._last_change is None or changed > self._last_change):
+                self._last_change = changed
+
+    async def _reload(self):
+        docs = await self.collection.find({}, DIRECTORY_PROJECTION).to_list(length=None)
+        self._by_id, self._by_no_id, self._by_biometric_id, self._by_email = {}, {}, {}, {}
+        self._by_name = {}
+        self._last_change = None
+        self._apply(docs)
+        self._loaded_at = self._refreshed_at = time.monotonic()
+
+    async def _refresh_changed(self):
+        if self._last_change is None:
+            return await self._reload()
+        docs = await self.collection.find(
+            {
+                "$or": [
+                    {"updated_at": {"$gte": self._last_change}},
+                    {"created_at": {"$gte": self._last_change}},
+                ]
+            },
+            DIRECTORY_PROJECTION,
+        ).to_list(length=None)
+        self._apply(docs)
+        self._refreshed_at = time.monotonic()
+
+    async def ensure_fresh(self, force: bool = False):
+        """Loads the directory on first use and applies changed employees when due."""
+        now = time.monotonic()
+        if self._loaded_at and not force and now - self._refreshed_at < EMPLOYEE_DIRECTORY_REFRESH_SECONDS:
+            return
+
+        async with self._lock:
+            now = time.monotonic()
+            if not self._loaded_at or now - self._loaded_at >= EMPLOYEE_DIRECTORY_RELOAD_SECONDS:
+                await self._reload()
+            elif force or now - self._refreshed_at >= EMPLOYEE_DIRECTORY_REFRESH_SECONDS:
+                await self._refresh_changed()
+
+    async def refresh_employee(self, employee_id: str):
+        """Re-reads one employee after a write; removes it if it no longer exists."""
+        if not self._loaded_at:
+            return
+        doc = await self.collection.find_one({"_id": ObjectId(employee_id)}, DIRECTORY_PROJECTION)
+        if doc:
+            self._apply([doc])
+        else:
+            self._unindex(str(employee_id))
+
+    def remove_employee(self, employee_id: str):
+        self._unindex(str(employee_id))
+
+    # ------------------------------------------------------------------
+    # Lookups (call ensure_fresh() first); records are returned as copies
+    # ------------------------------------------------------------------
+    def get(self, employee_id) -> Optional[dict]:
+        """Record for a Mongo _id or an employee_no_id."""
+        if not employee_id:
+            return None
+        key = str(employee_id)
+        record = self._by_id.get(key) or self._by_no_id.get(key)
+        return dict(record) if record else None
+
+    def get_by_biometric_id(self, biometric_id) -> Optional[dict]:
+        record = self._by_biometric_id.get(str(biometric_id).strip()) if biometric_id else None
+        return dict(record) if record else None
+
+    def get_by_email(self, email: str) -> Optional[dict]:
+        record = self._by_email.get(email.lower()) if email else None
+        return dict(record) if record else None
+
+    def find_assignees(self, value) -> List[dict]:
+        """Records a tasks.assigned_to value refers to: a Mongo _id, an employee_no_id or a name."""
+        record = self.get(value)
+        if record:
+            return [record]
+        return [dict(r) for r in self._by_name.get(str(value), {}).values()] if value else []
+
+    def name_of(self, employee_id, default=None):
+        record = self._by_id.get(str(employee_id)) or self._by_no_id.get(str(employee_id))
+        return record.get("name") if record else default
+
+    def all(self) -> List[dict]:
+        return [dict(r) for r in self._by_id.values()]
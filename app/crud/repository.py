@@ -52,9 +52,28 @@ from app.models import (
     MilestoneRoadmapUpdate,
 )
 from app.utils import normalize, get_password_hash, get_employee_basic_details
+from app.crud.employee_directory import EmployeeDirectory
+from app.core.config import LEAVE_TYPE_CACHE_TTL_SECONDS
+from app.helper.live_events import attendance_event, live_events_enabled, publish_attendance_events
+from app.helper.search_helper import TEXT_INDEXES, TEXT_SCORE, TEXT_SCORE_SORT, text_query, add_highlights
 from bson import ObjectId
+from pymongo import DeleteMany, InsertOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError
 from datetime import datetime, timedelta
 from typing import List, Optional
+import math
+import time
+
+# Relative weight of a task's progress in roadmap rollups, by priority
+ROADMAP_PRIORITY_WEIGHTS = {"Critical": 4, "High": 3, "Medium": 2, "Low": 1}
+
+# Leave request fields the ledger, leave_days and attendance side effects depend on;
+# status writes are conditional on them so concurrent decisions apply only once
+LEAVE_GUARD_FIELDS = ("status", "employee_id", "leave_type_id", "start_date", "end_date", "total_days")
+LEAVE_UPDATE_ATTEMPTS = 3
+
+# Task statuses that count as completed; completed_on is kept while a task has one
+TASK_DONE_STATUSES = ("Completed", "Done")
 
 
 class Repository:
@@ -88,6 +107,44 @@ class Repository:
         self.payslips = self.db["payslips"]
         self.payslip_components = self.db["payslip_components"]
         self.milestones_roadmaps = self.db["milestones_roadmaps"]
+        self.job_runs = self.db["job_runs"]
+        self.leave_days = self.db["leave_days"]
+        self.leave_balances = self.db["leave_balances"]
+        self.employee_summaries = self.db["employee_dashboard_summaries"]
+        self.eod_entries = self.db["eod_entries"]
+        self.directory = EmployeeDirectory(self.employees)
+        self._leave_type_map = None
+        self._leave_type_map_at = 0.0
+
+    async def ensure_indexes(self):
+        """Creates the indexes the repository relies on. Safe to call on every startup."""
+        await self.job_runs.create_index([("job_id", 1), ("started_at", -1)])
+        await self.leave_days.create_index([("employee_id", 1), ("date", 1)], unique=True)
+        await self.leave_days.create_index([("date", 1)])
+        await self.leave_days.create_index([("leave_request_id", 1)])
+        await self.leave_requests.create_index([("employee_id", 1), ("_id", -1)])
+        await self.leave_requests.create_index([("status", 1), ("_id", -1)])
+        await self.leave_requests.create_index([("start_date", 1), ("end_date", 1)])
+        await self.leave_balances.create_index(
+            [("employee_id", 1), ("year", 1), ("leave_type_id", 1)], unique=True
+        )
+        await self.holidays.create_index([("date", 1)])
+        await self.tasks.create_index([("status", 1), ("end_date", 1)])
+        await self.tasks.create_index([("created_at", -1)])
+        await self.tasks.create_index([("assigned_to", 1), ("status", 1)])
+        await self.tasks.create_index([("milestone_id", 1)])
+        await self.milestones_roadmaps.create_index([("project_id", 1)])
+        # Serves both branches of the calendar/day query: active on a date, or overdue
+        await self.tasks.create_index([("end_date", 1), ("start_date", 1), ("status", 1)])
+        await self.eod_entries.create_index([("date", 1), ("project_id", 1)])
+        await self.eod_entries.create_index([("assigned_to", 1), ("date", 1)])
+        await self.eod_entries.create_index([("task_id", 1), ("timestamp", 1)])
+        # Unfiltered EOD report listings walk this instead of sorting the collection
+        await self.eod_entries.create_index([("timestamp", -1), ("_id", -1)])
+        for collection, weights in TEXT_INDEXES.items():
+            await self.db[collection].create_index(
+                [(field, "text") for field in weights], weights=weights, name=f"{collection}_text"
+            )
 
     async def create_employee(
         self, employee: EmployeeCreate, profile_picture_path: str = None
@@ -195,6 +252,7 @@ class Repository:
 
             emp_result = await self.employees.insert_one(employee_data)
             employee_data["id"] = str(emp_result.inserted_id)
+            await self.directory.refresh_employee(employee_data["id"])
 
             # Insert User
             await self.users.insert_one(user_data)
@@ -271,6 +329,100 @@ class Repository:
         except Exception as e:
             raise e
 
+    async def get_employee_analytics(self, today: str, window_days: int = 30) -> dict:
+        """
+        Headcount analytics for the admin dashboard in a single $facet aggregation:
+        overview counts, work mode distribution, recent hires/joins and upcoming
+        confirmations and exits (within window_days), projecting only needed fields.
+        """
+        try:
+            today_dt = datetime.strptime(today, "%Y-%m-%d")
+            window_start_dt = today_dt - timedelta(days=window_days)
+            window_start = window_start_dt.strftime("%Y-%m-%d")
+            prev_window_start = (today_dt - timedelta(days=window_days * 2)).strftime("%Y-%m-%d")
+            window_end = (today_dt + timedelta(days=window_days)).strftime("%Y-%m-%d")
+
+            def count_if(condition):
+                return {"$sum": {"$cond": [condition, 1, 0]}}
+
+            def work_mode_is(mode):
+                return {"$eq": [{"$ifNull": ["$work_mode", "Office"]}, mode]}
+
+            # updated_at may be stored as a date or as an ISO string
+            updated_recently = {
+                "$or": [
+                    {"$and": [{"$eq": [{"$type": "$updated_at"}, "date"]}, {"$gte": ["$updated_at", window_start_dt]}]},
+                    {"$and": [{"$eq": [{"$type": "$updated_at"}, "string"]}, {"$gte": ["$updated_at", window_start]}]},
+                ]
+            }
+
+            card_fields = {"name": 1, "email": 1, "profile_picture": 1, "department": 1}
+
+            def upcoming(field):
+                return [
+                    {"$match": {field: {"$gte": today, "$lte": window_end}}},
+                    {"$sort": {field: 1}},
+                    {"$limit": 5},
+                    {"$project": {**card_fields, field: 1}},
+                ]
+
+            pipeline = [
+                {
+                    "$facet": {
+                        "overview": [
+                            {
+                                "$group": {
+                                    "_id": None,
+                                    "total_count": {"$sum": 1},
+                                    "active_count": count_if({"$eq": ["$status", "Active"]}),
+                                    "new_hires_this_month": count_if({"$gte": ["$date_of_joining", window_start]}),
+                                    "new_hires_last_month": count_if({
+                                        "$and": [
+                                            {"$gte": ["$date_of_joining", prev_window_start]},
+                                            {"$lt": ["$date_of_joining", window_start]},
+                                        ]
+                                    }),
+                                    "attrition_this_month": count_if({
+                                        "$and": [{"$eq": ["$status", "Inactive"]}, updated_recently]
+                                    }),
+                                    "office": count_if(work_mode_is("Office")),
+                                    "remote": count_if(work_mode_is("Remote")),
+                                    "hybrid": count_if(work_mode_is("Hybrid")),
+                                }
+                            }
+                        ],
+                        "recent_hires": [
+                            {"$match": {"date_of_joining": {"$nin": [None, ""]}}},
+                            {"$sort": {"date_of_joining": -1}},
+                            {"$limit": 5},
+                            {"$project": {**card_fields, "designation": 1, "date_of_joining": 1}},
+                        ],
+                        "recent_joins": [
+                            {"$sort": {"created_at": -1}},
+                            {"$limit": 3},
+                            {"$project": {"name": 1, "designation": 1, "created_at": 1}},
+                        ],
+                        "upcoming_confirmations": upcoming("confirmation_date"),
+                        "upcoming_exits": upcoming("last_working_day"),
+                    }
+                }
+            ]
+
+            cursor = await self.employees.aggregate(pipeline)
+            result = (await cursor.to_list(length=1))[0]
+
+            overview = result["overview"][0] if result["overview"] else {}
+            overview.pop("_id", None)
+            return normalize({
+                "overview": overview,
+                "recent_hires": result["recent_hires"],
+                "recent_joins": result["recent_joins"],
+                "upcoming_confirmations": result["upcoming_confirmations"],
+                "upcoming_exits": result["upcoming_exits"],
+            })
+        except Exception as e:
+            raise e
+
     async def get_employee(self, employee_id: str) -> dict:
         try:
             employee = await self.employees.find_one({"_id": ObjectId(employee_id)})
@@ -298,113 +450,76 @@ class Repository:
         except Exception:
             return None
 
-    async def get_employee_leave_balances(self, employee_id: str) -> dict:
+    def task_assignee_ids(self, employee: dict) -> List[str]:
+        """Values an employee can appear as in tasks.assigned_to: id, name or employee_no_id."""
+        identifiers = [employee.get("id"), employee.get("name"), employee.get("employee_no_id")]
+        return [str(i) for i in identifiers if i]
+
+    async def get_task_counts(self, assignee_ids: List[str], today: Optional[str] = None) -> dict:
+        """
+        Task counts for the given assignee identifiers in a single aggregation:
+        total, completed ("Completed" or "Done"), in progress, pending, and overdue
+        (end date before today and not completed), plus the completion rate.
+        """
         try:
-            employee = await self.get_employee(employee_id)
-            if not employee:
-                return None
+            today = today or datetime.utcnow().strftime("%Y-%m-%d")
+            done = {"$in": ["$status", ["Completed", "Done"]]}
+            pipeline = [
+                {"$match": {"assigned_to": {"$in": assignee_ids}}},
+                {
+                    "$group": {
+                        "_id": None,
+                        "total_assigned": {"$sum": 1},
+                        "completed": {"$sum": {"$cond": [done, 1, 0]}},
+                        "in_progress": {"$sum": {"$cond": [{"$eq": ["$status", "In Progress"]}, 1, 0]}},
+                        "overdue": {
+                            "$sum": {
+                                "$cond": [
+                                    {"$and": [
+                                        {"$not": [done]},
+                                        {"$gt": ["$end_date", ""]},
+                                        {"$lt": ["$end_date", today]},
+                                    ]},
+                                    1,
+                                    0,
+                                ]
+                            }
+                        },
+                    }
+                },
+            ]
+            cursor = await self.tasks.aggregate(pipeline)
+            rows = await cursor.to_list(length=1)
+            counts = rows[0] if rows else {"total_assigned": 0, "completed": 0, "in_progress": 0, "overdue": 0}
 
-            leave_types = await self.leave_types.find().to_list(length=None)
-            query = {
-                "employee_id": employee.get("employee_no_id") or employee.get("id"),
-                "status": {"$in": ["Approved", "Pending"]}
-            }
-            leave_requests = await self.leave_requests.find(query).to_list(length=None)
-
-            balance_summary = {
-                "total_allocated": 0,
-                "used": 0,
-                "available": 0,
-                "pending_approval": 0,
-                "breakdown": []
+            total = counts["total_assigned"]
+            return {
+                "total_assigned": total,
+                "completed": counts["completed"],
+                "in_progress": counts["in_progress"],
+                "pending": total - counts["completed"] - counts["in_progress"],
+                "overdue": counts["overdue"],
+                "completion_rate": round((counts["completed"] / total) * 100, 2) if total > 0 else 0,
             }
-
-            for lt in leave_types:
-                allocated = float(lt.get("days_allowed", 0))
-                type_id = str(lt["_id"])
-                
-                used_count = 0.0
-                pending_count = 0.0
-                
-                for lr in leave_requests:
-                    if str(lr.get("leave_type_id")) == type_id:
-                        days = float(lr.get("total_days", 0))
-                        if lr.get("status") == "Approved":
-                            used_count += days
-                        elif lr.get("status") == "Pending":
-                            pending_count += days
-                
-                balance_summary["breakdown"].append({
-                    "type": lt.get("type_name"),
-                    "allocated": allocated,
-                    "used": used_count,
-                    "pending": pending_count,
-                    "available": max(0, allocated - used_count)
-                })
-
-                balance_summary["total_allocated"] += allocated
-                balance_summary["used"] += used_count
-                balance_summary["pending_approval"] += pending_count
-                balance_summary["available"] += max(0, allocated - used_count)
-
-            return balance_summary
         except Exception as e:
-            print(f"Error in get_employee_leave_balances: {e}")
-            return {"total_allocated": 0, "used": 0, "available": 0, "pending_approval": 0, "breakdown": []}
+            raise e
 
     async def get_employee_task_metrics(self, employee_id: str) -> dict:
         try:
-            employee = await self.get_employee(employee_id)
+            await self.directory.ensure_fresh()
+            employee = self.directory.get(employee_id)
             if not employee:
                 return {}
 
-            identifiers = [employee.get("id"), employee.get("name"), employee.get("employee_no_id")]
-            identifiers = [i for i in identifiers if i]  
-
-            query = {
-                "assigned_to": {"$in": identifiers}
-            }
-            tasks = await self.tasks.find(query).to_list(length=None)
-
-            metrics = {
-                "total_assigned": len(tasks),
-                "completed": 0,
-                "in_progress": 0,
-                "pending": 0,
-                "overdue": 0,
-                "completion_rate": 0
-            }
-
-            now = datetime.utcnow()
-            for task in tasks:
-                status = task.get("status", "Todo")
-                if status == "Done" or status == "Completed":
-                    metrics["completed"] += 1
-                elif status == "In Progress":
-                    metrics["in_progress"] += 1
-                else:
-                    metrics["pending"] += 1
-                 
-                if status not in ["Done", "Completed"] and task.get("end_date"):
-                    try:
-                        end_date = datetime.strptime(task["end_date"], "%Y-%m-%d")
-                        if end_date < now:
-                            metrics["overdue"] += 1
-                    except:
-                        pass
-
-            if metrics["total_assigned"] > 0:
-                metrics["completion_rate"] = round((metrics["completed"] / metrics["total_assigned"]) * 100, 2)
-
-            return metrics
+            return await self.get_task_counts(self.task_assignee_ids(employee))
         except Exception as e:
              print(f"Error in get_employee_task_metrics: {e}")
              return {}
 
-
     async def get_employee_attendance_stats(self, employee_id: str) -> dict:
         try:
-            employee = await self.get_employee(employee_id)
+            await self.directory.ensure_fresh()
+            employee = self.directory.get(employee_id)
             if not employee:
                 return {}
             
@@ -417,7 +532,8 @@ class Repository:
 
     async def get_employee_assigned_projects(self, employee_id: str) -> List[dict]:
         try:
-            employee = await self.get_employee(employee_id)
+            await self.directory.ensure_fresh()
+            employee = self.directory.get(employee_id)
             if not employee:
                 return []
              
@@ -432,15 +548,21 @@ class Repository:
             }
             
             projects = await self.projects.find(query).to_list(length=None)
+
+            # All clients of these projects in one query
+            client_ids = {str(p.get("client_id")) for p in projects if ObjectId.is_valid(str(p.get("client_id")))}
+            clients = await self.clients.find(
+                {"_id": {"$in": [ObjectId(c) for c in client_ids]}}, {"name": 1, "company_name": 1}
+            ).to_list(length=None)
+            client_map = {str(c["_id"]): c for c in clients}
             
             result = []
             for p in projects:
                 p_norm = normalize(p)
-                if p_norm.get("client_id"):
-                    client = await self.clients.find_one({"_id": ObjectId(p_norm["client_id"])})
-                    if client:
-                        p_norm["client_name"] = client.get("name")
-                        p_norm["client_company"] = client.get("company_name")
+                client = client_map.get(str(p_norm.get("client_id")))
+                if client:
+                    p_norm["client_name"] = client.get("name")
+                    p_norm["client_company"] = client.get("company_name")
                 result.append(p_norm)
                 
             return result
@@ -520,6 +642,7 @@ class Repository:
                 await self.employees.update_one(
                     {"_id": ObjectId(employee_id)}, {"$set": update_data}
                 )
+                await self.directory.refresh_employee(employee_id)
 
                 # Also update User if critical fields changed (email, name, mobile)
                 user_update = {}
@@ -553,6 +676,7 @@ class Repository:
             employee = await self.employees.find_one({"_id": ObjectId(employee_id)})
 
             result = await self.employees.delete_one({"_id": ObjectId(employee_id)})
+            self.directory.remove_employee(employee_id)
 
             if result.deleted_count > 0 and employee:
                 # Delete User too? "if i create a employee it will also store in the user table" -> implication is strict 1:1 sync.
@@ -1016,25 +1140,68 @@ class Repository:
         except Exception as e:
             raise e
 
-    async def get_projects(self) -> List[dict]:
+    def _project_query(
+        self,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        client_id: Optional[str] = None,
+        member_id: Optional[str] = None,
+        search: Optional[str] = None,
+    ) -> dict:
+        query = {}
+        if status:
+            query["status"] = status
+        if priority:
+            query["priority"] = priority
+        if client_id:
+            query["client_id"] = client_id
+        if member_id:
+            query["$or"] = [
+                {"project_manager_ids": member_id},
+                {"team_leader_ids": member_id},
+                {"team_member_ids": member_id},
+            ]
+        if search:
+            query["name"] = {"$regex": search, "$options": "i"}
+        return query
+
+    async def get_projects(
+        self,
+        page: Optional[int] = None,
+        limit: int = 20,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        client_id: Optional[str] = None,
+        member_id: Optional[str] = None,
+        search: Optional[str] = None,
+    ) -> (List[dict], int):
+        """
+        Projects (newest first) with their client and member basic details.
+        Without a page every matching project is returned.
+        """
         try:
-            projects = await self.projects.find().to_list(length=None)
+            if (page is not None and page < 1) or limit < 1:
+                raise ValueError("page and limit must be at least 1")
+            query = self._project_query(status, priority, client_id, member_id, search)
+            total_items = await self.projects.count_documents(query)
 
-            # Fetch all clients and employees for mapping
-            clients = await self.clients.find().to_list(length=None)
-            employees = await self.employees.find().to_list(length=None)
+            cursor = self.projects.find(query).sort([("created_at", -1), ("_id", -1)])
+            if page:
+                cursor = cursor.skip((page - 1) * limit).limit(limit)
+            projects = await cursor.to_list(length=None)
 
+            # Only the clients referenced on this page, in one query
+            client_ids = {p.get("client_id") for p in projects if ObjectId.is_valid(str(p.get("client_id")))}
+            clients = await self.clients.find(
+                {"_id": {"$in": [ObjectId(c) for c in client_ids]}}
+            ).to_list(length=None)
             client_map = {str(c["_id"]): normalize(c) for c in clients}
 
-            # Prepare employee map with sensitive fields removed
-            employee_map = {}
-            for e in employees:
-                emp_norm = normalize(e)
-                if "hashed_password" in emp_norm:
-                    del emp_norm["hashed_password"]
-                if "password" in emp_norm:
-                    del emp_norm["password"]
-                employee_map[emp_norm["id"]] = emp_norm
+            # Member basic details come from the employee directory
+            await self.directory.ensure_fresh()
+
+            def members(ids):
+                return [m for m in (self.directory.get(eid) for eid in ids or []) if m]
 
             result = []
             for p in projects:
@@ -1042,28 +1209,64 @@ class Repository:
                 p_norm["client"] = client_map.get(str(p_norm.get("client_id")))
 
                 # Fetch members details
-                p_norm["project_managers"] = [
-                    employee_map.get(eid)
-                    for eid in p_norm.get("project_manager_ids", [])
-                    if eid in employee_map
-                ]
-                p_norm["team_leaders"] = [
-                    employee_map.get(eid)
-                    for eid in p_norm.get("team_leader_ids", [])
-                    if eid in employee_map
-                ]
-                p_norm["team_members"] = [
-                    employee_map.get(eid)
-                    for eid in p_norm.get("team_member_ids", [])
-                    if eid in employee_map
-                ]
+                p_norm["project_managers"] = members(p_norm.get("project_manager_ids"))
+                p_norm["team_leaders"] = members(p_norm.get("team_leader_ids"))
+                p_norm["team_members"] = members(p_norm.get("team_member_ids"))
 
                 result.append(p_norm)
 
-            return result
+            return result, total_items
         except Exception as e:
             raise e
 
+    async def count_projects(
+        self,
+        today: Optional[str] = None,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        client_id: Optional[str] = None,
+        member_id: Optional[str] = None,
+        search: Optional[str] = None,
+    ) -> dict:
+        """Project counts per status plus active projects past their end date, without any joins."""
+        try:
+            today = today or datetime.utcnow().strftime("%Y-%m-%d")
+            pipeline = [
+                {"$match": self._project_query(status, priority, client_id, member_id, search)},
+                {
+                    "$group": {
+                        "_id": "$status",
+                        "count": {"$sum": 1},
+                        "overdue": {
+                            "$sum": {
+                                "$cond": [
+                                    {
+                                        "$and": [
+                                            {"$eq": ["$status", "Active"]},
+                                            {"$gt": ["$end_date", None]},
+                                            {"$ne": ["$end_date", ""]},
+                                            {"$lt": ["$end_date", today]},
+                                        ]
+                                    },
+                                    1,
+                                    0,
+                                ]
+                            }
+                        },
+                    }
+                },
+            ]
+            cursor = await self.projects.aggregate(pipeline)
+            groups = await cursor.to_list(length=None)
+
+            status_counts = {str(g["_id"]): g["count"] for g in groups}
+            return {
+                "total": sum(status_counts.values()),
+                "status_counts": status_counts,
+                "overdue": sum(g["overdue"] for g in groups),
+            }
+        except Exception as e:
+            raise e
 
     async def get_projects_summary(self) -> List[dict]:
         try:
@@ -1178,6 +1381,18 @@ class Repository:
         except Exception as e:
             raise e
 
+    async def get_holidays_between(
+        self, start_date: str, end_date: str, status: Optional[str] = None
+    ) -> List[dict]:
+        try:
+            query = {"date": {"$gte": start_date, "$lte": end_date}}
+            if status:
+                query["status"] = status
+            holidays = await self.holidays.find(query).sort("date", 1).to_list(length=None)
+            return [normalize(h) for h in holidays]
+        except Exception as e:
+            raise e
+
     async def get_holiday(self, holiday_id: str) -> dict:
         try:
             holiday = await self.holidays.find_one({"_id": ObjectId(holiday_id)})
@@ -1276,20 +1491,15 @@ class Repository:
 
             # Map categories and employees
             categories = await self.asset_categories.find().to_list(length=None)
-            employees = await self.employees.find().to_list(length=None)
+            await self.directory.ensure_fresh()
 
             cat_map = {str(c["_id"]): normalize(c) for c in categories}
-            emp_map = {
-                str(e["_id"]): normalize(e) for e in employees
-            }  # Mapping by _id (Primary Key)
 
             result = []
             for a in assets:
                 a_norm = normalize(a)
                 a_norm["category"] = cat_map.get(str(a_norm.get("asset_category_id")))
-                a_norm["assigned_to_details"] = emp_map.get(
-                    str(a_norm.get("assigned_to"))
-                )
+                a_norm["assigned_to_details"] = self.directory.get(a_norm.get("assigned_to"))
                 result.append(a_norm)
 
             return result
@@ -1386,10 +1596,11 @@ class Repository:
         except Exception as e:
             raise e
 
-    async def get_assets_by_employee(self, employee_id: str) -> List[dict]:
+    async def get_assets_by_employee(self, employee_id: str, employee: dict = None) -> List[dict]:
         try:
-            # Verify employee exists
-            employee = await self.employees.find_one({"_id": ObjectId(employee_id)})
+            # Verify employee exists, unless the caller already loaded it
+            if employee is None:
+                employee = await self.employees.find_one({"_id": ObjectId(employee_id)})
             if not employee:
                 raise ValueError("Employee not found")
 
@@ -1431,18 +1642,19 @@ class Repository:
         try:
             query = {"deleted": False}
             if search:
-                query["title"] = {"$regex": search, "$options": "i"}
+                query.update(text_query(search))
 
             total = await self.blogs.count_documents(query)
-            cursor = (
-                self.blogs.find(query)
-                .sort("created_at", -1)
-                .skip((page - 1) * limit)
-                .limit(limit)
-            )
+            if search:
+                cursor = self.blogs.find(query, TEXT_SCORE).sort(TEXT_SCORE_SORT + [("created_at", -1)])
+            else:
+                cursor = self.blogs.find(query).sort("created_at", -1)
+            cursor = cursor.skip((page - 1) * limit).limit(limit)
             blogs_list = await cursor.to_list(length=limit)
 
             data = [normalize(b) for b in blogs_list]
+            if search:
+                data = [add_highlights(b, search, ("title", "excerpt", "content")) for b in data]
             return {
                 "data": data,
                 "meta": {
@@ -1521,6 +1733,7 @@ class Repository:
             leave_type_data = leave_type.dict()
             leave_type_data["created_at"] = datetime.utcnow()
             result = await self.leave_types.insert_one(leave_type_data)
+            self._leave_type_map = None
             leave_type_data["id"] = str(result.inserted_id)
             return normalize(leave_type_data)
         except Exception as e:
@@ -1552,6 +1765,9 @@ class Repository:
                 await self.leave_types.update_one(
                     {"_id": ObjectId(leave_type_id)}, {"$set": update_data}
                 )
+                self._leave_type_map = None
+                if "number_of_days" in update_data:
+                    await self.set_leave_allocation(leave_type_id, update_data["number_of_days"])
             return await self.get_leave_type(leave_type_id)
         except Exception as e:
             raise e
@@ -1559,11 +1775,32 @@ class Repository:
     async def delete_leave_type(self, leave_type_id: str) -> bool:
         try:
             result = await self.leave_types.delete_one({"_id": ObjectId(leave_type_id)})
+            self._leave_type_map = None
             return result.deleted_count > 0
         except Exception as e:
             raise e
 
     # Leave Request CRUD operations
+    async def _check_leave_overlap(self, leave_req: dict, exclude_id: Optional[str] = None):
+        """
+        Raises ValueError when an Approved or Pending request (other than exclude_id)
+        of the same employee overlaps leave_req's dates. leave_days rows are keyed by
+        (employee_id, date), so active requests must never share a day.
+        """
+        query = {
+            "employee_id": leave_req.get("employee_id"),
+            "status": {"$in": ["Approved", "Pending"]},
+            "start_date": {"$lte": leave_req.get("end_date")},
+            "end_date": {"$gte": leave_req.get("start_date")},
+        }
+        if exclude_id:
+            query["_id"] = {"$ne": ObjectId(exclude_id)}
+        existing_leave = await self.leave_requests.find_one(query)
+        if existing_leave:
+            raise ValueError(
+                f"A leave request already exists for the selected dates (Status: {existing_leave.get('status')})"
+            )
+
     async def create_leave_request(
         self, leave_request: LeaveRequestCreate, attachment_path: str = None
     ) -> dict:
@@ -1571,23 +1808,7 @@ class Repository:
             leave_request_data = leave_request.dict()
 
             # Check for overlapping leave requests
-            existing_leave = await self.leave_requests.find_one(
-                {
-                    "employee_id": leave_request.employee_id,
-                    "status": {"$in": ["Approved", "Pending"]},
-                    "$or": [
-                        {
-                            "start_date": {"$lte": leave_request.end_date},
-                            "end_date": {"$gte": leave_request.start_date},
-                        }
-                    ],
-                }
-            )
-
-            if existing_leave:
-                raise ValueError(
-                    f"A leave request already exists for the selected dates (Status: {existing_leave.get('status')})"
-                )
+            await self._check_leave_overlap(leave_request_data)
 
             if attachment_path:
                 leave_request_data["attachment"] = attachment_path
@@ -1595,42 +1816,55 @@ class Repository:
             leave_request_data["created_at"] = datetime.utcnow()
             result = await self.leave_requests.insert_one(leave_request_data)
             leave_request_id = str(result.inserted_id)
-            return await self.get_leave_request(leave_request_id)
+            created_req = await self.get_leave_request(leave_request_id)
+
+            if created_req and created_req.get("status") == "Approved":
+                await self.sync_leave_days(created_req)
+            await self.apply_leave_balance_change(None, created_req)
+
+            return created_req
         except Exception as e:
             raise e
 
-    async def get_employee_leave_balances(self, employee_id: str) -> List[dict]:
+    async def get_employee_leave_balances(self, employee_id: str, year: Optional[int] = None) -> List[dict]:
+        """
+        Balance per active leave type for the year (the current one by default),
+        read from the leave_balances ledger. Leave types the employee has no ledger
+        row for yet show their full allocation.
+        """
         try:
+            year = str(year or datetime.utcnow().year)
+            await self.directory.ensure_fresh()
+            employee = self.directory.get(employee_id) or {}
+            employee_ids = list({str(i) for i in (employee_id, employee.get("id"), employee.get("employee_no_id")) if i})
+
             leave_types = await self.leave_types.find({"status": "Active"}).to_list(
                 length=None
             )
-            current_year = str(datetime.utcnow().year)
-            requests = await self.leave_requests.find(
-                {
-                    "employee_id": employee_id,
-                    "status": "Approved",
-                    "start_date": {"$regex": f"^{current_year}"},
-                }
+            rows = await self.leave_balances.find(
+                {"employee_id": {"$in": employee_ids}, "year": year}
             ).to_list(length=None)
 
+            ledger = {}
+            for row in rows:
+                entry = ledger.setdefault(row["leave_type_id"], {"used": 0.0, "pending": 0.0})
+                entry["used"] += row.get("used", 0)
+                entry["pending"] += row.get("pending", 0)
+
             balances = []
             for lt in leave_types:
                 lt_id = str(lt["_id"])
-                used = sum(
-                    [
-                        float(r.get("total_days", 0))
-                        for r in requests
-                        if r.get("leave_type_id") == lt_id
-                    ]
-                )
+                entry = ledger.get(lt_id, {"used": 0.0, "pending": 0.0})
                 total_allowed = lt.get("number_of_days", 0)
                 balances.append(
                     {
+                        "leave_type_id": lt_id,
                         "leave_type": lt.get("name"),
                         "code": lt.get("code"),
                         "total_allowed": total_allowed,
-                        "used": used,
-                        "available": max(0, total_allowed - used),
+                        "used": entry["used"],
+                        "pending": entry["pending"],
+                        "available": max(0, total_allowed - entry["used"]),
                         "allowed_hours": lt.get("allowed_hours", 0),
                     }
                 )
@@ -1639,36 +1873,149 @@ class Repository:
             print(f"Error calculating leave balances: {str(e)}")
             return []
 
+    async def get_leave_type_map(self) -> dict:
+        """
+        Leave types by id, cached in process for LEAVE_TYPE_CACHE_TTL_SECONDS and reset
+        by leave type writes. The reset only reaches this worker; others keep their
+        copy until the TTL runs out, so a leave type edit can take up to that long to
+        show in their leave request listings.
+        """
+        try:
+            now = time.monotonic()
+            if self._leave_type_map is None or now - self._leave_type_map_at >= LEAVE_TYPE_CACHE_TTL_SECONDS:
+                leave_types = await self.leave_types.find().to_list(length=None)
+                self._leave_type_map = {str(lt["_id"]): normalize(lt) for lt in leave_types}
+                self._leave_type_map_at = now
+            return self._leave_type_map
+        except Exception as e:
+            raise e
+
+    def _leave_request_query(
+        self,
+        employee_id: str = None,
+        status: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        leave_type_id: str = None,
+    ) -> dict:
+        query = {}
+        if employee_id:
+            query["employee_id"] = employee_id
+        if status and status != "All":
+            query["status"] = status
+        if leave_type_id:
+            query["leave_type_id"] = leave_type_id
+        # Requests overlapping the date range
+        if end_date:
+            query["start_date"] = {"$lte": end_date}
+        if start_date:
+            query["end_date"] = {"$gte": start_date}
+        return query
+
     async def get_leave_requests(
-        self, employee_id: str = None, status: str = None
-    ) -> List[dict]:
+        self,
+        employee_id: str = None,
+        status: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        leave_type_id: str = None,
+        after: str = None,
+        limit: Optional[int] = None,
+    ) -> (List[dict], Optional[str]):
+        """
+        Leave requests, newest first, with employee and leave type details.
+        Keyset pagination on _id: pass the returned cursor as `after` to get the next
+        `limit` requests; the cursor is None on the last page. Without a limit every
+        matching request is returned.
+        """
         try:
-            query = {}
-            if employee_id:
-                query["employee_id"] = employee_id
-            if status and status != "All":
-                query["status"] = status
+            if limit is not None and limit < 1:
+                raise ValueError("limit must be at least 1")
+            query = self._leave_request_query(employee_id, status, start_date, end_date, leave_type_id)
+            if after:
+                if not ObjectId.is_valid(after):
+                    raise ValueError("Invalid pagination cursor")
+                query["_id"] = {"$lt": ObjectId(after)}
 
-            requests = await self.leave_requests.find(query).to_list(length=None)
+            cursor = self.leave_requests.find(query).sort("_id", -1)
+            if limit:
+                # One extra row tells whether another page follows
+                cursor = cursor.limit(limit + 1)
+            requests = await cursor.to_list(length=None)
 
-            # Map details
-            employees = await self.employees.find().to_list(length=None)
-            leave_types = await self.leave_types.find().to_list(length=None)
+            next_cursor = None
+            if limit and len(requests) > limit:
+                requests = requests[:limit]
+                next_cursor = str(requests[-1]["_id"])
 
-            emp_map = {str(e["_id"]): normalize(e) for e in employees}
-            lt_map = {str(lt["_id"]): normalize(lt) for lt in leave_types}
+            return await self._hydrate_leave_requests(requests), next_cursor
+        except Exception as e:
+            raise e
 
-            result = []
-            for r in requests:
-                r_norm = normalize(r)
-                emp_norm = emp_map.get(str(r_norm.get("employee_id")))
-                r_norm["employee_details"] = get_employee_basic_details(emp_norm) if emp_norm else None
-                r_norm["leave_type_details"] = lt_map.get(
-                    str(r_norm.get("leave_type_id"))
-                )
-                result.append(r_norm)
+    async def _hydrate_leave_requests(self, requests: List[dict]) -> List[dict]:
+        """Normalizes leave requests and attaches employee and leave type details."""
+        await self.directory.ensure_fresh()
+        lt_map = await self.get_leave_type_map()
 
-            return result
+        result = []
+        for r in requests:
+            r_norm = normalize(r)
+            r_norm["employee_details"] = self.directory.get(r_norm.get("employee_id"))
+            r_norm["leave_type_details"] = lt_map.get(
+                str(r_norm.get("leave_type_id"))
+            )
+            result.append(r_norm)
+        return result
+
+    async def count_leave_requests(
+        self,
+        today: Optional[str] = None,
+        employee_id: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        leave_type_id: str = None,
+    ) -> dict:
+        """
+        Counts for the leave screens and dashboards in one aggregation: total, by
+        status, pending, approved leaves covering today and approved leaves starting
+        this month.
+        """
+        try:
+            today = today or datetime.utcnow().strftime("%Y-%m-%d")
+            start_of_month = today[:8] + "01"
+            approved = {"$eq": ["$status", "Approved"]}
+            pipeline = [
+                {"$match": self._leave_request_query(employee_id, None, start_date, end_date, leave_type_id)},
+                {
+                    "$group": {
+                        "_id": "$status",
+                        "count": {"$sum": 1},
+                        "approved_today": {
+                            "$sum": {
+                                "$cond": [
+                                    {"$and": [approved, {"$lte": ["$start_date", today]}, {"$gte": ["$end_date", today]}]},
+                                    1,
+                                    0,
+                                ]
+                            }
+                        },
+                        "approved_this_month": {
+                            "$sum": {"$cond": [{"$and": [approved, {"$gte": ["$start_date", start_of_month]}]}, 1, 0]}
+                        },
+                    }
+                },
+            ]
+            cursor = await self.leave_requests.aggregate(pipeline)
+            rows = await cursor.to_list(length=None)
+
+            status_counts = {str(r["_id"]): r["count"] for r in rows}
+            return {
+                "total": sum(status_counts.values()),
+                "status_counts": status_counts,
+                "pending": status_counts.get("Pending", 0),
+                "approved_today": sum(r["approved_today"] for r in rows),
+                "approved_this_month": sum(r["approved_this_month"] for r in rows),
+            }
         except Exception as e:
             raise e
 
@@ -1705,41 +2052,276 @@ class Repository:
         attachment_path: str = None,
     ) -> dict:
         try:
-            # Fetch current state before update to check for status changes
-            old_req = await self.get_leave_request(leave_request_id)
-
             update_data = {
                 k: v for k, v in leave_request.dict().items() if v is not None
             }
             if attachment_path:
                 update_data["attachment"] = attachment_path
-
             if update_data:
                 update_data["updated_at"] = datetime.utcnow()
-                await self.leave_requests.update_one(
-                    {"_id": ObjectId(leave_request_id)}, {"$set": update_data}
+
+            # Fetch current state before update to check for status changes. The write
+            # only lands while that state is unchanged, so two concurrent approvals
+            # cannot both apply the ledger change and side effects; the loser re-reads.
+            for _ in range(LEAVE_UPDATE_ATTEMPTS):
+                old_req = await self.get_leave_request(leave_request_id)
+                if not old_req or not update_data:
+                    break
+
+                # Creation refuses overlaps; date edits and re-activating a rejected or
+                # cancelled request must not introduce one either
+                new_state = {**old_req, **update_data}
+                moved = any(new_state.get(f) != old_req.get(f) for f in ("employee_id", "start_date", "end_date"))
+                reactivated = old_req.get("status") not in ("Approved", "Pending")
+                if new_state.get("status") in ("Approved", "Pending") and (moved or reactivated):
+                    await self._check_leave_overlap(new_state, exclude_id=leave_request_id)
+
+                result = await self.leave_requests.update_one(
+                    self._leave_request_guard(old_req), {"$set": update_data}
                 )
+                if result.matched_count:
+                    break
+            else:
+                raise ValueError("Leave request was changed by another update, please retry")
 
             updated_req = await self.get_leave_request(leave_request_id)
 
             if not updated_req or not old_req:
                 return updated_req
 
+            await self.apply_leave_balance_change(old_req, updated_req)
+
             old_status = old_req.get("status")
             new_status = updated_req.get("status")
 
             # Logic 1: Status changed TO Approved
             if new_status == "Approved" and old_status != "Approved":
+                await self.sync_leave_days(updated_req)
                 await self.handle_approved_leave_impact(updated_req)
 
+                today_str = datetime.utcnow().strftime("%Y-%m-%d")
+                event = attendance_event(
+                    "leave_approved",
+                    employee_id=updated_req.get("employee_id"),
+                    leave_request_id=leave_request_id,
+                    start_date=updated_req.get("start_date"),
+                    end_date=updated_req.get("end_date"),
+                    total_days=updated_req.get("total_days"),
+                )
+                # Counters only move when the leave covers today
+                if (updated_req.get("start_date") or "") <= today_str <= (updated_req.get("end_date") or ""):
+                    event["date"] = today_str
+                await self._publish_attendance_deltas([event])
+
             # Logic 2: Status changed FROM Approved TO something else (Cancellation/Rejection)
             elif old_status == "Approved" and new_status != "Approved":
+                await self.remove_leave_days(leave_request_id)
                 await self.cleanup_leave_attendance_records(old_req)
 
+                today_str = datetime.utcnow().strftime("%Y-%m-%d")
+                event = attendance_event(
+                    "leave_revoked",
+                    employee_id=old_req.get("employee_id"),
+                    leave_request_id=leave_request_id,
+                    start_date=old_req.get("start_date"),
+                    end_date=old_req.get("end_date"),
+                    total_days=old_req.get("total_days"),
+                )
+                if (old_req.get("start_date") or "") <= today_str <= (old_req.get("end_date") or ""):
+                    event["date"] = today_str
+                await self._publish_attendance_deltas([event])
+
+            # Logic 3: Approved leave edited (dates/type may have changed)
+            elif new_status == "Approved" and update_data:
+                await self.sync_leave_days(updated_req)
+
             return updated_req
         except Exception as e:
             raise e
 
+    async def decide_leave_requests(
+        self, leave_request_ids: List[str], status: str, rejection_reason: Optional[str] = None
+    ) -> (List[dict], List[str]):
+        """
+        Sets the status of many leave requests at once, with the same side effects
+        as update_leave_request: leave_days rows, today's attendance records, the
+        balance ledger and live attendance events. Requests, leave types and today's
+        attendance are read up front; the status changes and the attendance impacts
+        are each applied with one bulk_write. A status write only lands while the
+        request is unchanged since it was read, and side effects are built only for
+        the writes that landed. Returns the requests and per-item errors (unknown
+        ids, requests another update moved elsewhere).
+        """
+        try:
+            errors = []
+            now = datetime.utcnow()
+            today = now.strftime("%Y-%m-%d")
+
+            object_ids = []
+            for request_id in dict.fromkeys(leave_request_ids):
+                if ObjectId.is_valid(request_id):
+                    object_ids.append(ObjectId(request_id))
+                else:
+                    errors.append(f"Leave request {request_id} not found")
+            requests = await self.leave_requests.find({"_id": {"$in": object_ids}}).to_list(length=None)
+            found = {str(r["_id"]) for r in requests}
+            errors.extend(f"Leave request {o} not found" for o in object_ids if str(o) not in found)
+
+            # The batch id marks the requests this call changed, so they can be told
+            # apart from ones another decision got to first
+            batch_id = str(ObjectId())
+            update_fields = {"status": status, "updated_at": now, "decision_batch_id": batch_id}
+            if rejection_reason is not None:
+                update_fields["rejection_reason"] = rejection_reason
+
+            # (old, new) for every request whose status should change
+            candidates = []
+            for r in requests:
+                old_req = normalize(r)
+                if old_req.get("status") != status:
+                    candidates.append((old_req, {**old_req, **update_fields}))
+
+            # Approving a rejected or cancelled request must not overlap another active one
+            refused = set()
+            reactivated = [
+                old_req for old_req, _ in candidates
+                if status == "Approved" and old_req.get("status") not in ("Approved", "Pending")
+            ]
+            if reactivated:
+                active = await self.leave_requests.find(
+                    {
+                        "employee_id": {"$in": list({r.get("employee_id") for r in reactivated})},
+                        "status": {"$in": ["Approved", "Pending"]},
+                        "start_date": {"$lte": max(r.get("end_date") or "" for r in reactivated)},
+                        "end_date": {"$gte": min(r.get("start_date") or "" for r in reactivated)},
+                    },
+                    {"employee_id": 1, "start_date": 1, "end_date": 1},
+                ).to_list(length=None)
+                active = [normalize(a) for a in active]
+                for req in reactivated:
+                    if any(
+                        a["id"] != req["id"]
+                        and a.get("employee_id") == req.get("employee_id")
+                        and (a.get("start_date") or "") <= (req.get("end_date") or "")
+                        and (a.get("end_date") or "") >= (req.get("start_date") or "")
+                        for a in active
+                    ):
+                        refused.add(req["id"])
+                        errors.append(f"Leave request {req['id']} overlaps another leave request")
+                    else:
+                        # Later requests in the batch are checked against this one too
+                        active.append(req)
+                candidates = [(o, n) for o, n in candidates if o["id"] not in refused]
+
+            # Each write only lands while the request is still as read above
+            if candidates:
+                await self.leave_requests.bulk_write(
+                    [UpdateOne(self._leave_request_guard(old_req), {"$set": update_fields}) for old_req, _ in candidates],
+                    ordered=False,
+                )
+                applied = await self.leave_requests.find(
+                    {"_id": {"$in": [ObjectId(old_req["id"]) for old_req, _ in candidates]}, "decision_batch_id": batch_id},
+                    {"_id": 1},
+                ).to_list(length=None)
+                applied = {str(r["_id"]) for r in applied}
+                # The marker is only needed for the read above
+                await self.leave_requests.update_many(
+                    {"_id": {"$in": [ObjectId(r) for r in applied]}, "decision_batch_id": batch_id},
+                    {"$unset": {"decision_batch_id": ""}},
+                )
+            else:
+                applied = set()
+            changes = [(old_req, new_req) for old_req, new_req in candidates if old_req["id"] in applied]
+
+            await self.directory.ensure_fresh()
+            lt_map = await self.get_leave_type_map()
+
+            def covers_today(req):
+                return (req.get("start_date") or "") <= today <= (req.get("end_date") or "")
+
+            # Today's attendance of everyone whose approval lands on today
+            impacted = {
+                str(new_req.get("employee_id"))
+                for _, new_req in changes
+                if status == "Approved" and covers_today(new_req)
+            }
+            todays_attendance = await self.attendance.find(
+                {"employee_id": {"$in": list(impacted)}, "date": today}
+            ).to_list(length=None) if impacted else []
+            existing_by_employee = {a["employee_id"]: a for a in todays_attendance}
+
+            leave_day_ops = []
+            cleanup_ops = []
+            impact_ops = []
+            impacted_today = set()
+            events = []
+            for old_req, new_req in changes:
+                employee = self.directory.get(new_req.get("employee_id"))
+                leave_type_code = (lt_map.get(str(new_req.get("leave_type_id"))) or {}).get("code")
+
+                if status == "Approved":
+                    leave_day_ops.extend(self._leave_day_upserts(new_req, leave_type_code))
+                    event = attendance_event(
+                        "leave_approved",
+                        employee_id=new_req.get("employee_id"),
+                        leave_request_id=new_req["id"],
+                        start_date=new_req.get("start_date"),
+                        end_date=new_req.get("end_date"),
+                        total_days=new_req.get("total_days"),
+                    )
+                    if covers_today(new_req):
+                        event["date"] = today
+                        # Overlapping leaves are refused at creation, so one impact per employee
+                        if employee and employee["id"] not in impacted_today:
+                            impacted_today.add(employee["id"])
+                            operation = self._leave_impact_operation(
+                                new_req, employee["id"], today, leave_type_code, existing_by_employee.get(employee["id"])
+                            )
+                            if operation:
+                                impact_ops.append(operation)
+                    events.append(event)
+                elif old_req.get("status") == "Approved":
+                    if employee:
+                        cleanup_ops.extend(
+                            self._leave_cleanup_operations(employee["id"], old_req.get("start_date"), old_req.get("end_date"))
+                        )
+                    event = attendance_event(
+                        "leave_revoked",
+                        employee_id=old_req.get("employee_id"),
+                        leave_request_id=old_req["id"],
+                        start_date=old_req.get("start_date"),
+                        end_date=old_req.get("end_date"),
+                        total_days=old_req.get("total_days"),
+                    )
+                    if covers_today(old_req):
+                        event["date"] = today
+                    events.append(event)
+
+            if changes:
+                # leave_days rows only exist while a request is Approved
+                leave_day_ops.insert(0, DeleteMany({"leave_request_id": {"$in": [new_req["id"] for _, new_req in changes]}}))
+                await self.leave_days.bulk_write(leave_day_ops)
+
+            # Rejections are cleaned up before approvals are applied
+            attendance_ops = cleanup_ops + impact_ops
+            if attendance_ops:
+                await self.attendance.bulk_write(attendance_ops)
+
+            await self.apply_leave_balance_changes(changes)
+            await self._publish_attendance_deltas(events)
+
+            updated = await self.leave_requests.find(
+                {"_id": {"$in": [ObjectId(r) for r in found]}}
+            ).sort("_id", -1).to_list(length=None)
+            errors.extend(
+                f"Leave request {r['_id']} was changed by another update"
+                for r in updated
+                if r.get("status") != status and str(r["_id"]) not in refused
+            )
+            return await self._hydrate_leave_requests(updated), errors
+        except Exception as e:
+            raise e
+
     async def cleanup_leave_attendance_records(self, leave_req: dict):
         """
         Removes system-generated "Leave" attendance records for a given leave request.
@@ -1755,24 +2337,32 @@ class Repository:
                 return
 
             emp_no_id = str(employee.get("_id"))
+            await self.attendance.bulk_write(
+                self._leave_cleanup_operations(emp_no_id, start_date, end_date)
+            )
+        except Exception as e:
+            print(f"Error cleaning up leave attendance: {e}")
 
+    def _leave_cleanup_operations(self, employee_id: str, start_date: str, end_date: str) -> list:
+        """Attendance writes that undo a leave's impact on the employee's records in its date range."""
+        date_range = {"$gte": start_date, "$lte": end_date}
+        return [
             # 1. Remove "Leave" records for this employee in the date range
             # ONLY if they haven't clocked in (clock_in is None)
-            await self.attendance.delete_many(
+            DeleteMany(
                 {
-                    "employee_id": emp_no_id,
-                    "date": {"$gte": start_date, "$lte": end_date},
+                    "employee_id": employee_id,
+                    "date": date_range,
                     "status": "Leave",
                     "clock_in": None,
                 }
-            )
-            
+            ),
             # 2. Revert "Permission" and "Half Day" detailed status back to "Present"
             # if they are checked in (status = "Present")
-            await self.attendance.update_many(
+            UpdateMany(
                 {
-                    "employee_id": emp_no_id,
-                    "date": {"$gte": start_date, "$lte": end_date},
+                    "employee_id": employee_id,
+                    "date": date_range,
                     "status": "Present",
                     "attendance_status": {"$in": ["Permission", "Half Day"]}
                 },
@@ -1784,14 +2374,13 @@ class Repository:
                         "updated_at": datetime.utcnow()
                     }
                 }
-            )
-            
+            ),
             # 3. Revert "Leave" records back to "Present" if they have a clock-in
             # This handles the case where a Full Day leave is rejected AFTER an employee clocked in
-            await self.attendance.update_many(
+            UpdateMany(
                 {
-                    "employee_id": emp_no_id,
-                    "date": {"$gte": start_date, "$lte": end_date},
+                    "employee_id": employee_id,
+                    "date": date_range,
                     "status": "Leave",
                     "clock_in": {"$ne": None},
                 },
@@ -1803,9 +2392,8 @@ class Repository:
                         "updated_at": datetime.utcnow()
                     }
                 }
-            )
-        except Exception as e:
-            print(f"Error cleaning up leave attendance: {e}")
+            ),
+        ]
 
     async def handle_approved_leave_impact(self, leave_req: dict):
         """
@@ -1816,14 +2404,11 @@ class Repository:
             start_date = leave_req.get("start_date")
             end_date = leave_req.get("end_date")
             emp_mongo_id = leave_req.get("employee_id")
-            reason = leave_req.get("reason", "On Leave")
 
             today = datetime.utcnow().strftime("%Y-%m-%d")
 
             # Check if today is covered by the leave
             if start_date <= today <= end_date:
-                duration_type = leave_req.get("leave_duration_type")
-
                 # Fetch leave type code
                 leave_type_code = None
                 lt_id = leave_req.get("leave_type_id")
@@ -1835,15 +2420,6 @@ class Repository:
                     except:
                         pass
 
-                # Derive detailed status
-                attendance_status = leave_type_code or "Leave"
-                is_half_day = False
-                if duration_type == "Half Day":
-                    attendance_status = "Half Day"
-                    is_half_day = True
-                elif duration_type == "Permission":
-                    attendance_status = "Permission"
-
                 # Need to find the employee (standardizing on mongo _id string as employee_id)
                 employee = await self.employees.find_one(
                     {"_id": ObjectId(emp_mongo_id)}
@@ -1858,62 +2434,82 @@ class Repository:
                     {"employee_id": emp_standard_id, "date": today}
                 )
 
-                if not existing:
-                    # Create Leave record (Skip for Permission since it's a partial absence and they should show up)
-                    if duration_type == "Permission":
-                        return 
-                        
-                    await self.attendance.insert_one(
-                        {
-                            "employee_id":       emp_standard_id,
-                            "date":              today,
-                            "status":            "Leave",
-                            "attendance_status": attendance_status,
-                            "is_half_day":       is_half_day,
-                            "leave_type_code":   leave_type_code,
-                            "notes":             reason,
-                            "clock_in":          None,
-                            "clock_out":         None,
-                            "total_work_hours":  0.0,
-                            "overtime_hours":    0.0,
-                            "device_type":       "Auto Sync",
-                            "created_at":        datetime.utcnow(),
-                        }
-                    )
-                else:
-                    current_status = existing.get("status")
-                    update_fields = {
-                        "device_type": "Auto Sync",
-                        "updated_at": datetime.utcnow()
-                    }
-                    
-                    if current_status == "Absent":
-                        if duration_type != "Permission":
-                            update_fields["status"] = "Leave"
-                            
-                    if duration_type == "Permission":
-                        update_fields["attendance_status"] = "Permission"
-                        update_fields["notes"] = f"Approved Permission: {reason}"
-                    elif duration_type == "Half Day":
-                        update_fields["is_half_day"] = True
-                        update_fields["attendance_status"] = "Half Day"
-                        update_fields["notes"] = f"Approved Half Day: {reason}" # Changed from 'Approved Leave' to 'Approved Half Day' for clarity
-                    else:
-                        update_fields["status"] = "Leave"
-                        update_fields["attendance_status"] = attendance_status
-                        update_fields["is_half_day"] = False
-                        update_fields["leave_type_code"] = leave_type_code
-                        update_fields["notes"] = f"Approved Leave: {reason}"
-                        
-                    await self.attendance.update_one(
-                        {"_id": existing["_id"]},
-                        {"$set": update_fields}
-                    )
-
+                operation = self._leave_impact_operation(leave_req, emp_standard_id, today, leave_type_code, existing)
+                if operation:
+                    await self.attendance.bulk_write([operation])
         except Exception as e:
             # We don't want to fail the whole request if this background task fails
             print(f"Error handling leave impact: {e}")
 
+    def _leave_impact_operation(
+        self, leave_req: dict, employee_id: str, today: str, leave_type_code: str = None, existing: dict = None
+    ):
+        """
+        The attendance write reflecting an approved leave on today's record:
+        an insert when there is none yet, else an update of the existing one.
+        None when nothing should change.
+        """
+        duration_type = leave_req.get("leave_duration_type")
+        reason = leave_req.get("reason", "On Leave")
+
+        # Derive detailed status
+        attendance_status = leave_type_code or "Leave"
+        is_half_day = False
+        if duration_type == "Half Day":
+            attendance_status = "Half Day"
+            is_half_day = True
+        elif duration_type == "Permission":
+            attendance_status = "Permission"
+
+        if not existing:
+            # Create Leave record (Skip for Permission since it's a partial absence and they should show up)
+            if duration_type == "Permission":
+                return None
+
+            return InsertOne(
+                {
+                    "employee_id":       employee_id,
+                    "date":              today,
+                    "status":            "Leave",
+                    "attendance_status": attendance_status,
+                    "is_half_day":       is_half_day,
+                    "leave_type_code":   leave_type_code,
+                    "notes":             reason,
+                    "clock_in":          None,
+                    "clock_out":         None,
+                    "total_work_hours":  0.0,
+                    "overtime_hours":    0.0,
+                    "device_type":       "Auto Sync",
+                    "created_at":        datetime.utcnow(),
+                }
+            )
+
+        current_status = existing.get("status")
+        update_fields = {
+            "device_type": "Auto Sync",
+            "updated_at": datetime.utcnow()
+        }
+
+        if current_status == "Absent":
+            if duration_type != "Permission":
+                update_fields["status"] = "Leave"
+
+        if duration_type == "Permission":
+            update_fields["attendance_status"] = "Permission"
+            update_fields["notes"] = f"Approved Permission: {reason}"
+        elif duration_type == "Half Day":
+            update_fields["is_half_day"] = True
+            update_fields["attendance_status"] = "Half Day"
+            update_fields["notes"] = f"Approved Half Day: {reason}" # Changed from 'Approved Leave' to 'Approved Half Day' for clarity
+        else:
+            update_fields["status"] = "Leave"
+            update_fields["attendance_status"] = attendance_status
+            update_fields["is_half_day"] = False
+            update_fields["leave_type_code"] = leave_type_code
+            update_fields["notes"] = f"Approved Leave: {reason}"
+
+        return UpdateOne({"_id": existing["_id"]}, {"$set": update_fields})
+
     async def delete_leave_request(self, leave_request_id: str) -> bool:
         try:
             # Fetch the request first so we know what to cleanup
@@ -1925,20 +2521,312 @@ class Repository:
                 {"_id": ObjectId(leave_request_id)}
             )
 
+            if result.deleted_count > 0:
+                await self.apply_leave_balance_change(leave_req, None)
+
             if result.deleted_count > 0 and leave_req.get("status") == "Approved":
                 # If it was approved, cleanup the attendance records for its dates
+                await self.remove_leave_days(leave_request_id)
                 await self.cleanup_leave_attendance_records(leave_req)
 
             return result.deleted_count > 0
         except Exception as e:
             raise e
 
+    # Leave Days: one row per (employee_id, date) covered by an approved leave
+    async def sync_leave_days(self, leave_req: dict, leave_type_code: str = None) -> int:
+        """
+        Rewrites the leave_days rows of a leave request so they match its current
+        dates. Rows only exist while the request is Approved.
+        """
+        try:
+            leave_request_id = str(leave_req.get("id") or leave_req.get("_id"))
+            await self.leave_days.delete_many({"leave_request_id": leave_request_id})
+
+            if leave_req.get("status") != "Approved":
+                return 0
+
+            if leave_type_code is None:
+                leave_type_details = leave_req.get("leave_type_details") or {}
+                leave_type_code = leave_type_details.get("code")
+            if leave_type_code is None and leave_req.get("leave_type_id"):
+                try:
+                    lt = await self.leave_types.find_one({"_id": ObjectId(leave_req["leave_type_id"])})
+                    leave_type_code = lt.get("code") if lt else None
+                except Exception:
+                    pass
+
+            operations = self._leave_day_upserts(leave_req, leave_type_code)
+            if operations:
+                await self.leave_days.bulk_write(operations, ordered=False)
+            return len(operations)
+        except Exception as e:
+            raise e
+
+    def _leave_day_upserts(self, leave_req: dict, leave_type_code: str = None) -> list:
+        """One leave_days upsert per date covered by an approved leave request."""
+        leave_request_id = str(leave_req.get("id") or leave_req.get("_id"))
+        start = datetime.strptime(leave_req.get("start_date"), "%Y-%m-%d")
+        end = datetime.strptime(leave_req.get("end_date"), "%Y-%m-%d")
+        employee_id = str(leave_req.get("employee_id"))
+
+        operations = []
+        for n in range((end - start).days + 1):
+            day = (start + timedelta(days=n)).strftime("%Y-%m-%d")
+            operations.append(
+                UpdateOne(
+                    {"employee_id": employee_id, "date": day},
+                    {
+                        "$set": {
+                            "leave_request_id":    leave_request_id,
+                            "leave_type_id":       leave_req.get("leave_type_id"),
+                            "leave_type_code":     leave_type_code,
+                            "leave_duration_type": leave_req.get("leave_duration_type", "Single"),
+                            "half_day_session":    leave_req.get("half_day_session"),
+                            "reason":              leave_req.get("reason", "On Leave"),
+                            "updated_at":          datetime.utcnow(),
+                        }
+                    },
+                    upsert=True,
+                )
+            )
+        return operations
+
+    async def remove_leave_days(self, leave_request_id: str) -> int:
+        try:
+            result = await self.leave_days.delete_many({"leave_request_id": str(leave_request_id)})
+            return result.deleted_count
+        except Exception as e:
+            raise e
+
+    async def get_leave_day(self, employee_id: str, date: str) -> Optional[dict]:
+        """Approved leave row for an employee on a date, or None."""
+        try:
+            return await self.leave_days.find_one({"employee_id": str(employee_id), "date": date})
+        except Exception as e:
+            raise e
+
+    async def get_leave_days_map(
+        self, start_date: str, end_date: str, employee_ids: List[str] = None
+    ) -> dict:
+        """Maps (employee_id, date) -> leave_days row for every approved leave day in the range."""
+        try:
+            query = {"date": {"$gte": start_date, "$lte": end_date}}
+            if employee_ids is not None:
+                query["employee_id"] = {"$in": [str(e) for e in employee_ids]}
+
+            rows = await self.leave_days.find(query).to_list(length=None)
+            return {(row.get("employee_id"), row.get("date")): row for row in rows}
+        except Exception as e:
+            raise e
+
+    async def rebuild_leave_days(self) -> int:
+        """Regenerates the whole leave_days collection from approved leave requests."""
+        try:
+            leave_types = await self.leave_types.find({}, {"code": 1}).to_list(length=None)
+            leave_type_codes = {str(lt["_id"]): lt.get("code") for lt in leave_types}
+
+            await self.leave_days.delete_many({})
+
+            total = 0
+            async for leave in self.leave_requests.find({"status": "Approved"}):
+                try:
+                    total += await self.sync_leave_days(
+                        leave, leave_type_codes.get(str(leave.get("leave_type_id")))
+                    )
+                except (TypeError, ValueError):
+                    print(f"Skipping leave request {leave.get('_id')} with invalid dates")
+            return total
+        except Exception as e:
+            raise e
+
+    # Leave Balances: one ledger row per (employee_id, year, leave_type_id)
+    def _leave_request_guard(self, leave_req: dict) -> dict:
+        """
+        Filter matching a leave request only while the fields its ledger change and
+        side effects are worked out from still hold the values read in leave_req.
+        """
+        guard = {"_id": ObjectId(leave_req["id"])}
+        for field in LEAVE_GUARD_FIELDS:
+            guard[field] = leave_req.get(field)
+        return guard
+
+    def _leave_balance_contribution(self, leave_req: Optional[dict]) -> dict:
+        """(employee_id, year, leave_type_id) -> {"used", "pending"} days a request accounts for."""
+        if not leave_req or leave_req.get("status") not in ("Approved", "Pending"):
+            return {}
+        start_date = leave_req.get("start_date") or ""
+        if not leave_req.get("employee_id") or not leave_req.get("leave_type_id") or len(start_date) < 4:
+            return {}
+        key = (str(leave_req["employee_id"]), start_date[:4], str(leave_req["leave_type_id"]))
+        days = float(leave_req.get("total_days") or 0)
+        if leave_req["status"] == "Approved":
+            return {key: {"used": days, "pending": 0.0}}
+        return {key: {"used": 0.0, "pending": days}}
+
+    def _leave_balance_update(self, used: float, pending: float, allocated: float) -> list:
+        """Pipeline update applying a delta and re-deriving available in one atomic write."""
+        return [
+            {
+                "$set": {
+                    "allocated": {"$ifNull": ["$allocated", allocated]},
+                    "used": {"$add": [{"$ifNull": ["$used", 0]}, used]},
+                    "pending": {"$add": [{"$ifNull": ["$pending", 0]}, pending]},
+                    "updated_at": "$$NOW",
+                }
+            },
+            {"$set": {"available": {"$max": [0, {"$subtract": ["$allocated", "$used"]}]}}},
+        ]
+
+    async def apply_leave_balance_change(self, old_req: Optional[dict], new_req: Optional[dict]) -> int:
+        """
+        Moves the ledger from a leave request's old state to its new one (None for
+        a created or deleted request): the old contribution is taken off, the new
+        one added. Each ledger row changes in a single atomic update.
+        """
+        return await self.apply_leave_balance_changes([(old_req, new_req)])
+
+    async def apply_leave_balance_changes(self, changes: List[tuple]) -> int:
+        """apply_leave_balance_change for many (old, new) pairs, in one bulk_write."""
+        try:
+            deltas = {}
+            for old_req, new_req in changes:
+                for sign, req in ((-1, old_req), (1, new_req)):
+                    for key, amounts in self._leave_balance_contribution(req).items():
+                        delta = deltas.setdefault(key, {"used": 0.0, "pending": 0.0})
+                        delta["used"] += sign * amounts["used"]
+                        delta["pending"] += sign * amounts["pending"]
+            deltas = {k: d for k, d in deltas.items() if d["used"] or d["pending"]}
+            if not deltas:
+                return 0
+
+            type_ids = {k[2] for k in deltas if ObjectId.is_valid(k[2])}
+            leave_types = await self.leave_types.find(
+                {"_id": {"$in": [ObjectId(t) for t in type_ids]}}, {"number_of_days": 1}
+            ).to_list(length=None)
+            allocations = {str(lt["_id"]): lt.get("number_of_days", 0) for lt in leave_types}
+
+            operations = [
+                UpdateOne(
+                    {"employee_id": employee_id, "year": year, "leave_type_id": leave_type_id},
+                    self._leave_balance_update(d["used"], d["pending"], allocations.get(leave_type_id, 0)),
+                    upsert=True,
+                )
+                for (employee_id, year, leave_type_id), d in deltas.items()
+            ]
+            await self.leave_balances.bulk_write(operations, ordered=False)
+            return len(operations)
+        except Exception as e:
+            raise e
+
+    async def set_leave_allocation(self, leave_type_id: str, allocated: float) -> int:
+        """Applies a leave type's new allowance to the ledger rows of the current and later years."""
+        try:
+            result = await self.leave_balances.update_many(
+                {"leave_type_id": str(leave_type_id), "year": {"$gte": str(datetime.utcnow().year)}},
+                [
+                    {"$set": {"allocated": allocated, "updated_at": "$$NOW"}},
+                    {"$set": {"available": {"$max": [0, {"$subtract": ["$allocated", "$used"]}]}}},
+                ],
+            )
+            return result.modified_count
+        except Exception as e:
+            raise e
+
+    async def rebuild_leave_balances(self) -> int:
+        """Regenerates the whole leave_balances ledger from the Approved and Pending leave requests."""
+        try:
+            await self.leave_balances.delete_many({})
+
+            total = 0
+            async for leave in self.leave_requests.find({"status": {"$in": ["Approved", "Pending"]}}):
+                leave = normalize(leave)
+                try:
+                    total += await self.apply_leave_balance_change(None, leave)
+                except (TypeError, ValueError):
+                    print(f"Skipping leave request {leave.get('id')} with invalid days")
+            return total
+        except Exception as e:
+            raise e
+
     # Task CRUD
+    def _normalize_task_dates(self, data: dict) -> dict:
+        """Stores task start/end dates as YYYY-MM-DD strings, and None for open-ended ones."""
+        for field in ("start_date", "end_date"):
+            if field in data:
+                value = data[field]
+                if isinstance(value, datetime):
+                    value = value.strftime("%Y-%m-%d")
+                data[field] = (value.strip()[:10] or None) if isinstance(value, str) else value
+        return data
+
+    async def normalize_task_dates(self) -> int:
+        """
+        One-off migration: converts task start/end dates stored as "", datetimes or
+        full ISO strings to YYYY-MM-DD strings, and missing/empty ones to null.
+        """
+        try:
+            def normalized(field):
+                value = f"${field}"
+                return {
+                    "$switch": {
+                        "branches": [
+                            {
+                                "case": {"$eq": [{"$type": value}, "date"]},
+                                "then": {"$dateToString": {"format": "%Y-%m-%d", "date": value}},
+                            },
+                            {
+                                "case": {"$and": [
+                                    {"$eq": [{"$type": value}, "string"]},
+                                    {"$ne": [{"$trim": {"input": value}}, ""]},
+                                ]},
+                                "then": {"$substrCP": [{"$trim": {"input": value}}, 0, 10]},
+                            },
+                        ],
+                        "default": None,
+                    }
+                }
+
+            result = await self.tasks.update_many(
+                {
+                    "$or": [
+                        {field: {"$exists": False}} for field in ("start_date", "end_date")
+                    ] + [
+                        {field: {"$type": ["string", "date"], "$not": {"$regex": r"^\d{4}-\d{2}-\d{2}$"}}}
+                        for field in ("start_date", "end_date")
+                    ]
+                },
+                [{"$set": {"start_date": normalized("start_date"), "end_date": normalized("end_date")}}],
+            )
+            return result.modified_count
+        except Exception as e:
+            raise e
+
+    async def _check_task_milestone(self, project_id: Optional[str], milestone_id: Optional[str]):
+        """
+        Raises ValueError unless the milestone belongs to the task's project. Roadmap
+        rollups are keyed by the milestone's project, so a task linked across projects
+        would change a rollup its writes never invalidate.
+        """
+        if not milestone_id:
+            return
+        milestone = (
+            await self.milestones_roadmaps.find_one({"_id": ObjectId(milestone_id)}, {"project_id": 1})
+            if ObjectId.is_valid(milestone_id) else None
+        )
+        if not milestone:
+            raise ValueError("Milestone not found")
+        if str(milestone.get("project_id") or "") != str(project_id or ""):
+            raise ValueError("Milestone does not belong to the task's project")
+
     async def create_task(self, task: TaskCreate) -> dict:
         try:
-            task_data = task.dict()
+            task_data = self._normalize_task_dates(task.dict())
+            task_data["milestone_id"] = task_data.get("milestone_id") or None
+            await self._check_task_milestone(task_data.get("project_id"), task_data["milestone_id"])
             task_data["created_at"] = datetime.utcnow()
-            task_data["eod_history"] = []
+            if task_data.get("status") in TASK_DONE_STATUSES:
+                task_data["completed_on"] = task_data["created_at"].strftime("%Y-%m-%d")
             result = await self.tasks.insert_one(task_data)
             task_data["id"] = str(result.inserted_id)
             return normalize(task_data)
@@ -1953,6 +2841,7 @@ class Repository:
         date: Optional[str] = None,
         status: Optional[str] = None,
         priority: Optional[str] = None,
+        search: Optional[str] = None,
     ) -> List[dict]:
         try:
             query = {}
@@ -1968,143 +2857,580 @@ class Repository:
             if priority:
                 query["priority"] = priority
 
-            if date:
-                # Determine the cutoff date for overdue calculation.
-                # If the filter date is in the future (e.g., Tomorrow), we shouldn't mark "Today's" tasks as overdue yet.
-                # So "Overdue" is always strictly relative to "Now" (Today), unless we are looking at the past.
-                today_str = datetime.utcnow().strftime("%Y-%m-%d")
-                overdue_cutoff = date if date < today_str else today_str
+            # Determine the cutoff date for overdue calculation.
+            # If the filter date is in the future (e.g., Tomorrow), we shouldn't mark "Today's" tasks as overdue yet.
+            # So "Overdue" is always strictly relative to "Now" (Today), unless we are looking at the past.
+            today_str = datetime.utcnow().strftime("%Y-%m-%d")
+            overdue_cutoff = min(date, today_str) if date else None
 
-                # Active tasks on this specific date OR Overdue tasks
-                # Overdue = end_date < overdue_cutoff AND status != Completed
+            if date:
+                # Active tasks on this specific date OR Overdue tasks. Open-ended tasks have
+                # end_date null (see normalize_task_dates), so every branch is an index range
+                # on (end_date, start_date, status).
                 query["$or"] = [
                     # 1. Active on date: start_date <= date AND (end_date >= date OR end_date is None)
-                    {
-                        "$and": [
-                            {"start_date": {"$lte": date}},
-                            {
-                                "$or": [
-                                    {"end_date": {"$gte": date}},
-                                    {"end_date": None},
-                                    {"end_date": ""},
-                                    {"end_date": {"$exists": False}},
-                                ]
-                            },
-                        ]
-                    },
+                    {"end_date": {"$gte": date}, "start_date": {"$lte": date}},
+                    {"end_date": None, "start_date": {"$lte": date}},
                     # 2. Overdue: end_date < overdue_cutoff AND status != Completed
-                    {
-                        "$and": [
-                            {"end_date": {"$lt": overdue_cutoff}},
-                            {"status": {"$ne": "Completed"}},
-                            {"end_date": {"$ne": None}},
-                            {"end_date": {"$ne": ""}},
-                        ]
-                    },
+                    {"end_date": {"$gt": "", "$lt": overdue_cutoff}, "status": {"$ne": "Completed"}},
                 ]
             elif start_date:
                 # Fallback to exact start date match if no specific 'date' view requested
                 query["start_date"] = start_date
 
-            tasks = await self.tasks.find(query).to_list(length=None)
+            if search:
+                # Ranked by text score; the $text clause sits alongside the date $or
+                query.update(text_query(search))
+                tasks = await self.tasks.find(query, TEXT_SCORE).sort(TEXT_SCORE_SORT).to_list(length=None)
+            else:
+                tasks = await self.tasks.find(query).to_list(length=None)
 
             results = []
             for t in tasks:
                 norm_task = normalize(t)
 
-                # Calculate is_overdue flag
-                is_overdue = False
-                if (
-                    date
+                # Calculate is_overdue flag, with the same cutoff as the query
+                norm_task["is_overdue"] = bool(
+                    overdue_cutoff
                     and norm_task.get("end_date")
                     and norm_task.get("status") != "Completed"
-                ):
-                    # Use the same cutoff logic for the flag
-                    today_str = datetime.utcnow().strftime("%Y-%m-%d")
-                    cutoff = date if date < today_str else today_str
-
-                    if norm_task["end_date"] < cutoff:
-                        is_overdue = True
-
-                norm_task["is_overdue"] = is_overdue
+                    and norm_task["end_date"] < overdue_cutoff
+                )
+                if search:
+                    add_highlights(norm_task, search, ("task_name", "description", "tags"))
                 results.append(norm_task)
 
+            # EOD history lives in eod_entries; one $in fills it in for the whole listing
+            history_map = await self.get_eod_history_map([t["id"] for t in results])
+            for task in results:
+                task["eod_history"] = history_map.get(task["id"], [])
+
             return results
         except Exception as e:
             raise e
 
+    async def get_task_calendar(
+        self,
+        start_date: str,
+        end_date: str,
+        project_id: Optional[str] = None,
+        assigned_to: Optional[str] = None,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        page: Optional[int] = None,
+        limit: int = 7,
+    ) -> (List[dict], int):
+        """
+        Tasks for a date range grouped by day, with the same per-day semantics as
+        get_tasks(date=...): a day lists the tasks active on it plus the tasks still
+        open past their end date, flagged is_overdue. Days are expanded, flagged and
+        grouped in one aggregation. With a page, `limit` days are returned per page.
+        Returns (days, total_days).
+        """
+        try:
+            if (page is not None and page < 1) or limit < 1:
+                raise ValueError("page and limit must be at least 1")
+            range_start = datetime.strptime(start_date, "%Y-%m-%d")
+            range_end = datetime.strptime(end_date, "%Y-%m-%d")
+            if range_end < range_start:
+                raise ValueError("end_date must not be before start_date")
+            total_days = (range_end - range_start).days + 1
+            if total_days > 366:
+                raise ValueError("Calendar range cannot exceed 366 days")
+
+            if page:
+                range_start = range_start + timedelta(days=(page - 1) * limit)
+                range_end = min(range_end, range_start + timedelta(days=limit - 1))
+                if range_start > range_end:
+                    return [], total_days
+            range_from = range_start.strftime("%Y-%m-%d")
+            range_to = range_end.strftime("%Y-%m-%d")
+            today_str = datetime.utcnow().strftime("%Y-%m-%d")
+
+            query = {}
+            if project_id:
+                query["project_id"] = project_id
+            if assigned_to:
+                query["assigned_to"] = assigned_to
+            if status:
+                query["status"] = status
+            if priority:
+                query["priority"] = priority
+            query["$or"] = [
+                {"end_date": {"$gte": range_from}, "start_date": {"$lte": range_to}},
+                {"end_date": None, "start_date": {"$lte": range_to}},
+                # Overdue tasks carry over to every later day
+                {"end_date": {"$gt": "", "$lt": today_str}, "status": {"$ne": "Completed"}, "start_date": {"$lte": range_to}},
+            ]
+
+            day_ms = 24 * 60 * 60 * 1000
+            carried = {
+                "$or": [
+                    {"$eq": [{"$ifNull": ["$end_date", None]}, None]},
+                    {"$and": [{"$lt": ["$end_date", today_str]}, {"$ne": ["$status", "Completed"]}]},
+                ]
+            }
+            pipeline = [
+                {"$match": query},
+                {
+                    "$addFields": {
+                        "_span_start": {"$max": [{"$ifNull": ["$start_date", range_from]}, range_from]},
+                        "_span_end": {"$min": [range_to, {"$cond": [carried, range_to, "$end_date"]}]},
+                    }
+                },
+                {
+                    "$addFields": {
+                        "_offsets": {
+                            "$range": [
+                                0,
+                                {
+                                    "$add": [
+                                        {
+                                            "$toInt": {
+                                                "$divide": [
+                                                    {
+                                                        "$subtract": [
+                                                            {"$dateFromString": {"dateString": "$_span_end"}},
+                                                            {"$dateFromString": {"dateString": "$_span_start"}},
+                                                        ]
+                                                    },
+                                                    day_ms,
+                                                ]
+                                            }
+                                        },
+                                        1,
+                                    ]
+                                },
+                            ]
+                        }
+                    }
+                },
+                {"$unwind": "$_offsets"},
+                {
+                    "$addFields": {
+                        "day": {
+                            "$dateToString": {
+                                "format": "%Y-%m-%d",
+                                "date": {
+                                    "$add": [
+                                        {"$dateFromString": {"dateString": "$_span_start"}},
+                                        {"$multiply": ["$_offsets", day_ms]},
+                                    ]
+                                },
+                            }
+                        }
+                    }
+                },
+                {
+                    "$addFields": {
+                        "is_overdue": {
+                            "$and": [
+                                {"$ne": ["$status", "Completed"]},
+                                {"$gt": ["$end_date", ""]},
+                                {"$lt": ["$end_date", {"$min": ["$day", today_str]}]},
+                            ]
+                        }
+                    }
+                },
+                {"$project": {"_span_start": 0, "_span_end": 0, "_offsets": 0, "eod_history": 0}},
+                {"$sort": {"day": 1, "start_date": 1, "_id": 1}},
+                {
+                    "$group": {
+                        "_id": "$day",
+                        "tasks": {"$push": "$$ROOT"},
+                        "overdue_count": {"$sum": {"$cond": ["$is_overdue", 1, 0]}},
+                    }
+                },
+            ]
+            cursor = await self.tasks.aggregate(pipeline)
+            grouped = {g["_id"]: g for g in await cursor.to_list(length=None)}
+
+            # A task spans several days but its EOD history is read once
+            task_ids = {str(t["_id"]) for g in grouped.values() for t in g["tasks"]}
+            history_map = await self.get_eod_history_map(list(task_ids))
+
+            # Every day of the range, including the ones without tasks
+            days = []
+            for offset in range((range_end - range_start).days + 1):
+                day = (range_start + timedelta(days=offset)).strftime("%Y-%m-%d")
+                group = grouped.get(day) or {}
+                tasks = normalize(group.get("tasks", []))
+                for task in tasks:
+                    task.pop("day", None)
+                    task["eod_history"] = history_map.get(task["id"], [])
+                days.append({
+                    "date": day,
+                    "tasks": tasks,
+                    "count": len(tasks),
+                    "overdue_count": group.get("overdue_count", 0),
+                })
+
+            return days, total_days
+        except Exception as e:
+            raise e
+
     async def get_task(self, task_id: str) -> dict:
         try:
             task = await self.tasks.find_one({"_id": ObjectId(task_id)})
-            return normalize(task) if task else None
+            if not task:
+                return None
+            task_norm = normalize(task)
+            task_norm["eod_history"] = await self.get_task_eod_history(task_id)
+            return task_norm
+        except Exception as e:
+            raise e
+
+    async def get_task_eod_history(self, task_id: str) -> List[dict]:
+        """EOD entries of one task, oldest first, in the shape of the former embedded history."""
+        try:
+            return (await self.get_eod_history_map([task_id]))[task_id]
+        except Exception as e:
+            raise e
+
+    async def get_eod_history_map(self, task_ids: List[str]) -> dict:
+        """
+        EOD histories of several tasks with one $in, keyed by task id, oldest first.
+        History still embedded in tasks that migrate_eod_history has not reached yet
+        is merged in, so responses do not depend on when the migration runs.
+        """
+        try:
+            history_map = {task_id: [] for task_id in task_ids}
+            if not task_ids:
+                return history_map
+            entries = await self.eod_entries.find(
+                {"task_id": {"$in": list(task_ids)}},
+                {"_id": 0, "task_id": 1, "date": 1, "status": 1, "progress": 1, "summary": 1, "attachments": 1, "timestamp": 1},
+            ).sort("timestamp", 1).to_list(length=None)
+            for entry in normalize(entries):
+                history_map.setdefault(entry.pop("task_id"), []).append(entry)
+
+            legacy = await self.tasks.find(
+                {
+                    "_id": {"$in": [ObjectId(t) for t in task_ids if ObjectId.is_valid(t)]},
+                    "eod_history.0": {"$exists": True},
+                },
+                {"eod_history": 1},
+            ).to_list(length=None)
+            for task in normalize(legacy):
+                history = history_map.setdefault(task["id"], [])
+                history.extend(task.get("eod_history") or [])
+                history.sort(key=lambda e: str(e.get("timestamp") or ""))
+            return history_map
+        except Exception as e:
+            raise e
+
+    def _eod_entry(self, task: dict, entry: dict) -> dict:
+        """An eod_entries document: the entry denormalized with its task, project and assignees."""
+        return {
+            "task_id": str(task["_id"]),
+            "task_name": task.get("task_name") or task.get("name") or "Untitled Task",
+            "project_id": task.get("project_id"),
+            "assigned_to": task.get("assigned_to") or [],
+            "date": entry.get("date"),
+            "status": entry.get("status"),
+            "progress": entry.get("progress"),
+            "summary": entry.get("summary"),
+            "attachments": entry.get("attachments") or [],
+            "timestamp": entry.get("timestamp"),
+        }
+
+    async def migrate_eod_history(self) -> int:
+        """
+        Moves the EOD history embedded in task documents into eod_entries. Moved rows
+        are tagged source="embedded" and only those are replaced on a re-run, so
+        entries written by EOD reports since the deploy are kept. Safe to run again.
+        """
+        try:
+            total = 0
+            async for task in self.tasks.find({"eod_history.0": {"$exists": True}}):
+                history = task.get("eod_history") or []
+                completed = [e.get("date") for e in history if e.get("status") == "Completed" and e.get("date")]
+
+                await self.eod_entries.delete_many({"task_id": str(task["_id"]), "source": "embedded"})
+                await self.eod_entries.insert_many(
+                    [{**self._eod_entry(task, e), "source": "embedded"} for e in history]
+                )
+
+                update = {"$unset": {"eod_history": ""}}
+                if completed and not task.get("completed_on"):
+                    update["$set"] = {"completed_on": completed[-1]}
+                await self.tasks.update_one({"_id": task["_id"]}, update)
+                total += len(history)
+            return total
         except Exception as e:
             raise e
 
     async def update_task(self, task_id: str, task: TaskUpdate) -> dict:
         try:
-            update_data = {k: v for k, v in task.dict().items() if v is not None}
-            if update_data:
+            update_data = self._normalize_task_dates({k: v for k, v in task.dict().items() if v is not None})
+            # An empty milestone_id unlinks the task from its milestone
+            unlink_milestone = update_data.get("milestone_id") == ""
+            if unlink_milestone:
+                update_data.pop("milestone_id")
+            elif "milestone_id" in update_data or "project_id" in update_data:
+                current = await self.tasks.find_one({"_id": ObjectId(task_id)}, {"project_id": 1, "milestone_id": 1})
+                if current:
+                    await self._check_task_milestone(
+                        update_data.get("project_id", current.get("project_id")),
+                        update_data.get("milestone_id", current.get("milestone_id")),
+                    )
+            if update_data or unlink_milestone:
                 update_data["updated_at"] = datetime.utcnow()
-                await self.tasks.update_one(
-                    {"_id": ObjectId(task_id)}, {"$set": update_data}
-                )
+                update = {"$set": update_data}
+                if unlink_milestone:
+                    update["$unset"] = {"milestone_id": ""}
+
+                # The completion day is fixed when the status turns done and cleared on
+                # reopening, so later edits do not move it in the analytics trend
+                if "status" in update_data:
+                    current = await self.tasks.find_one({"_id": ObjectId(task_id)}, {"status": 1})
+                    was_done = bool(current) and current.get("status") in TASK_DONE_STATUSES
+                    if update_data["status"] in TASK_DONE_STATUSES and not was_done:
+                        update_data["completed_on"] = update_data["updated_at"].strftime("%Y-%m-%d")
+                    elif update_data["status"] not in TASK_DONE_STATUSES:
+                        update.setdefault("$unset", {})["completed_on"] = ""
+
+                await self.tasks.update_one({"_id": ObjectId(task_id)}, update)
+
+                # Keep the task fields denormalized on its EOD entries in sync
+                entry_update = {k: update_data[k] for k in ("task_name", "project_id") if k in update_data}
+                if entry_update:
+                    await self.eod_entries.update_many({"task_id": task_id}, {"$set": entry_update})
             return await self.get_task(task_id)
         except Exception as e:
             raise e
 
-    async def process_eod_report(self, items: List[EODReportItem]) -> List[dict]:
-        results = []
-        for item in items:
-            task_id = item.task_id
-            existing_task = await self.get_task(task_id)
-            if not existing_task:
-                continue
+    async def process_eod_report(self, items: List[EODReportItem]) -> (List[dict], List[str]):
+        """
+        Applies a batch of EOD items: the referenced tasks are read with one $in,
+        rollover and status changes are worked out in memory, and the task updates
+        and eod_entries go out as one unordered bulk_write and one insert_many.
+        Items for several reports on the same task are applied in order.
+        Returns the updated tasks (with their eod_history) and per-item errors;
+        a failing item does not abort the rest of the batch.
+        """
+        try:
+            errors = []
+            now = datetime.utcnow()
+            today_str = now.strftime("%Y-%m-%d")
+            tomorrow_str = (now + timedelta(days=1)).strftime("%Y-%m-%d")
+
+            object_ids = {ObjectId(item.task_id) for item in items if ObjectId.is_valid(item.task_id)}
+            tasks = await self.tasks.find({"_id": {"$in": list(object_ids)}}).to_list(length=None)
+            task_map = {str(t["_id"]): t for t in tasks}
+
+            updates = {}  # task_id -> merged $set, in first-seen order
+            reopened = set()  # task_ids whose completed_on is cleared
+            entries = {}  # task_id -> eod_entries documents
+            for item in items:
+                task = task_map.get(item.task_id)
+                if not task:
+                    errors.append(f"Task {item.task_id} not found")
+                    continue
 
-            # Update existing task history and status
-            eod_entry = {
-                "date": datetime.utcnow().strftime("%Y-%m-%d"),
-                "status": "Moved" if item.move_to_tomorrow else item.status,
-                "progress": item.progress,
-                "summary": item.eod_summary,
-                "attachments": [a.dict() for a in item.new_attachments],
-                "timestamp": datetime.utcnow(),
-            }
+                eod_entry = {
+                    "date": today_str,
+                    "status": "Moved" if item.move_to_tomorrow else item.status,
+                    "progress": item.progress,
+                    "summary": item.eod_summary,
+                    "attachments": [a.dict() for a in item.new_attachments],
+                    "timestamp": now,
+                }
 
-            update_fields = {"progress": item.progress, "updated_at": datetime.utcnow()}
+                update_fields = {"progress": item.progress, "updated_at": now}
 
-            if item.move_to_tomorrow:
-                # Visual Rollover: Mark as rolled over today
-                today_str = datetime.utcnow().strftime("%Y-%m-%d")
-                update_fields["last_rollover_date"] = today_str
+                if item.move_to_tomorrow:
+                    # Visual Rollover: Mark as rolled over today
+                    update_fields["last_rollover_date"] = today_str
 
-                # Smart Rollover: Preserve future deadlines
-                # Only update end_date if the current deadline is BEFORE tomorrow
-                from datetime import timedelta
+                    # Smart Rollover: Preserve future deadlines
+                    # If no end date or end date is earlier than tomorrow, extend it to tomorrow
+                    existing_end_date = task.get("end_date")
+                    if not existing_end_date or existing_end_date < tomorrow_str:
+                        update_fields["end_date"] = tomorrow_str
 
-                tomorrow_dt = datetime.utcnow() + timedelta(days=1)
-                tomorrow_str = tomorrow_dt.strftime("%Y-%m-%d")
+                    # Always keep status as "In Progress" for rollover
+                    update_fields["status"] = "In Progress"
+                else:
+                    update_fields["status"] = item.status
+                    if item.status in TASK_DONE_STATUSES and task.get("status") not in TASK_DONE_STATUSES:
+                        update_fields["completed_on"] = today_str
+
+                # Later items for the same task see the earlier ones
+                task.update(update_fields)
+                updates.setdefault(item.task_id, {}).update(update_fields)
+                if update_fields["status"] in TASK_DONE_STATUSES:
+                    reopened.discard(item.task_id)
+                else:
+                    task.pop("completed_on", None)
+                    updates[item.task_id].pop("completed_on", None)
+                    reopened.add(item.task_id)
+                entries.setdefault(item.task_id, []).append(self._eod_entry(task, eod_entry))
+
+            task_ids = list(updates)
+            if task_ids:
+                operations = [
+                    UpdateOne(
+                        {"_id": ObjectId(t)},
+                        {"$set": updates[t], "$unset": {"completed_on": ""}} if t in reopened else {"$set": updates[t]},
+                    )
+                    for t in task_ids
+                ]
+                try:
+                    await self.tasks.bulk_write(operations, ordered=False)
+                except BulkWriteError as bwe:
+                    for write_error in bwe.details.get("writeErrors", []):
+                        failed_id = task_ids[write_error["index"]]
+                        errors.append(f"Failed to update task {failed_id}: {write_error.get('errmsg')}")
+                        entries.pop(failed_id, None)
+                    task_ids = [t for t in task_ids if t in entries]
+
+            new_entries = [e for t in task_ids for e in entries[t]]
+            if new_entries:
+                await self.eod_entries.insert_many(new_entries, ordered=False)
+
+            # One read back for the tasks and one for their histories
+            updated = await self.tasks.find(
+                {"_id": {"$in": [ObjectId(t) for t in task_ids]}}
+            ).to_list(length=None)
+            history_map = await self.get_eod_history_map(task_ids)
 
-                existing_end_date = existing_task.get("end_date")
+            updated_map = {str(t["_id"]): t for t in updated}
+            results = []
+            for task_id in task_ids:
+                if task_id in updated_map:
+                    task_norm = normalize(updated_map[task_id])
+                    task_norm["eod_history"] = history_map.get(task_id, [])
+                    results.append(task_norm)
 
-                # If no end date or end date is earlier than tomorrow, extend it to tomorrow
-                if not existing_end_date or existing_end_date < tomorrow_str:
-                    update_fields["end_date"] = tomorrow_str
+            return results, errors
+        except Exception as e:
+            raise e
 
-                # Always keep status as "In Progress" for rollover
-                update_fields["status"] = "In Progress"
-            else:
-                update_fields["status"] = item.status
+    async def get_task_analytics(self, today: str, trend_days: int = 7) -> dict:
+        """
+        Task analytics for the admin dashboard in a single $facet aggregation:
+        status and priority counts, overdue tasks, top contributors (unwinding
+        assigned_to) and created/completed counts per day over the last trend_days.
+        The result only depends on `today` and the tasks, so it can be cached per day.
+        """
+        try:
+            today_dt = datetime.strptime(today, "%Y-%m-%d")
+            since_dt = today_dt - timedelta(days=trend_days - 1)
+            since = since_dt.strftime("%Y-%m-%d")
 
-            # Add to history and update fields
-            await self.tasks.update_one(
-                {"_id": ObjectId(task_id)},
-                {"$set": update_fields, "$push": {"eod_history": eod_entry}},
-            )
+            done_statuses = list(TASK_DONE_STATUSES)
+            overdue_match = {"end_date": {"$lt": today, "$nin": [None, ""]}, "status": {"$nin": done_statuses}}
+
+            # Completion day: completed_on (set on completion), else the latest done
+            # entry of a not yet migrated embedded history, else the last update
+            completed_on = {
+                "$ifNull": [
+                    "$completed_on",
+                    {
+                        "$ifNull": [
+                            {
+                                "$arrayElemAt": [
+                                    {
+                                        "$map": {
+                                            "input": {
+                                                "$filter": {
+                                                    "input": {"$ifNull": ["$eod_history", []]},
+                                                    "as": "eod",
+                                                    "cond": {"$in": ["$$eod.status", done_statuses]},
+                                                }
+                                            },
+                                            "as": "eod",
+                                            "in": "$$eod.date",
+                                        }
+                                    },
+                                    -1,
+                                ]
+                            },
+                            {
+                                "$cond": [
+                                    {"$eq": [{"$type": "$updated_at"}, "date"]},
+                                    {"$dateToString": {"format": "%Y-%m-%d", "date": "$updated_at"}},
+                                    None,
+                                ]
+                            },
+                        ]
+                    },
+                ]
+            }
+
+            pipeline = [
+                {
+                    "$facet": {
+                        "status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+                        "priority": [
+                            {"$group": {"_id": {"$ifNull": ["$priority", "Medium"]}, "count": {"$sum": 1}}}
+                        ],
+                        "overdue_count": [{"$match": overdue_match}, {"$count": "count"}],
+                        "overdue_tasks": [
+                            {"$match": overdue_match},
+                            {"$sort": {"end_date": -1}},
+                            {"$limit": 5},
+                            {"$project": {"task_name": 1, "assigned_to": 1, "end_date": 1, "priority": 1}},
+                        ],
+                        "contributors": [
+                            {"$unwind": "$assigned_to"},
+                            {
+                                "$group": {
+                                    "_id": "$assigned_to",
+                                    "assigned": {"$sum": 1},
+                                    "completed": {"$sum": {"$cond": [{"$in": ["$status", done_statuses]}, 1, 0]}},
+                                }
+                            },
+                            {"$match": {"completed": {"$gt": 0}}},
+                            {"$sort": {"completed": -1}},
+                            {"$limit": 10},
+                        ],
+                        "created_trend": [
+                            {"$match": {"created_at": {"$gte": since_dt}}},
+                            {
+                                "$group": {
+                                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                                    "count": {"$sum": 1},
+                                }
+                            },
+                        ],
+                        "completed_trend": [
+                            {"$match": {"status": {"$in": done_statuses}}},
+                            {"$project": {"completed_on": completed_on}},
+                            {"$match": {"completed_on": {"$gte": since, "$lte": today}}},
+                            {"$group": {"_id": "$completed_on", "count": {"$sum": 1}}},
+                        ],
+                    }
+                }
+            ]
 
-            updated_task = await self.get_task(task_id)
-            results.append(updated_task)
+            cursor = await self.tasks.aggregate(pipeline)
+            result = (await cursor.to_list(length=1))[0]
 
-        return results
+            created = {row["_id"]: row["count"] for row in result["created_trend"]}
+            completed = {row["_id"]: row["count"] for row in result["completed_trend"]}
+            days = [(since_dt + timedelta(days=n)) for n in range(trend_days)]
+
+            return {
+                "date": today,
+                "status_counts": {row["_id"]: row["count"] for row in result["status"]},
+                "priority_counts": {row["_id"]: row["count"] for row in result["priority"]},
+                "overdue_count": result["overdue_count"][0]["count"] if result["overdue_count"] else 0,
+                "overdue_tasks": normalize(result["overdue_tasks"]),
+                "contributors": [
+                    {"employee_id": row["_id"], "assigned": row["assigned"], "completed": row["completed"]}
+                    for row in result["contributors"]
+                ],
+                "trends": {
+                    "dates": [d.strftime("%Y-%m-%d") for d in days],
+                    "labels": [d.strftime("%a") for d in days],
+                    "created": [created.get(d.strftime("%Y-%m-%d"), 0) for d in days],
+                    "completed": [completed.get(d.strftime("%Y-%m-%d"), 0) for d in days],
+                },
+            }
+        except Exception as e:
+            raise e
 
     async def get_eod_reports(
         self,
@@ -2113,82 +3439,95 @@ class Repository:
         date: Optional[str] = None,
         priority: Optional[str] = None,
         search: Optional[str] = None,
-    ) -> List[dict]:
+        page: Optional[int] = None,
+        limit: int = 50,
+    ) -> (List[dict], int):
+        """
+        EOD entries, newest first, from the indexed eod_entries collection.
+        Without a page every matching entry is returned.
+        """
         try:
-            query = {"eod_history": {"$exists": True, "$not": {"$size": 0}}}
+            query = {}
+            if date:
+                query["date"] = date
             if project_id:
                 query["project_id"] = project_id
             if assigned_to:
                 query["assigned_to"] = assigned_to
             if priority:
-                query["priority"] = priority
+                task_ids = await self.tasks.distinct("_id", {"priority": priority})
+                query["task_id"] = {"$in": [str(t) for t in task_ids]}
 
-            tasks = await self.tasks.find(query).to_list(length=None)
+            await self.directory.ensure_fresh()
 
-            # Fetch all employees and projects for naming
-            employees = await self.employees.find().to_list(length=None)
-            projects = await self.projects.find().to_list(length=None)
+            if search:
+                search_lower = search.lower()
+                matching_employees = [
+                    e["id"] for e in self.directory.all() if search_lower in (e.get("name") or "").lower()
+                ]
+                if matching_employees:
+                    # Every $or clause must be indexed when one of them is $text
+                    query["$or"] = [text_query(search), {"assigned_to": {"$in": matching_employees}}]
+                else:
+                    query.update(text_query(search))
 
-            emp_map = {
-                str(e.get("employee_no_id")): e.get("name")
-                for e in employees
-                if e.get("employee_no_id")
-            }
-            id_to_name_map = {str(e.get("_id")): e.get("name") for e in employees}
-            proj_map = {str(p.get("_id")): p.get("name") for p in projects}
+            total_items = await self.eod_entries.count_documents(query)
+            if search:
+                cursor = self.eod_entries.find(query, TEXT_SCORE).sort(
+                    TEXT_SCORE_SORT + [("timestamp", -1), ("_id", -1)]
+                )
+            else:
+                cursor = self.eod_entries.find(query).sort([("timestamp", -1), ("_id", -1)])
+            if page:
+                cursor = cursor.skip((page - 1) * limit).limit(limit)
+            entries = await cursor.to_list(length=None)
+
+            # Project names for this page only
+            project_ids = {e.get("project_id") for e in entries if ObjectId.is_valid(str(e.get("project_id")))}
+            projects = await self.projects.find(
+                {"_id": {"$in": [ObjectId(p) for p in project_ids]}}, {"name": 1}
+            ).to_list(length=None)
+            proj_map = {str(p["_id"]): p.get("name") for p in projects}
 
             reports = []
-            for task in tasks:
-                task_norm = normalize(task)
-                proj_name = proj_map.get(task_norm.get("project_id"), "Unknown Project")
-
-                # assigned_to is a list of IDs. We'll take the first one or join them
-                assigned_ids = task_norm.get("assigned_to", [])
-                assigned_names = [
-                    emp_map.get(eid) or id_to_name_map.get(eid) or eid
-                    for eid in assigned_ids
-                ]
-                employee_display = ", ".join(filter(None, assigned_names))
+            for entry in entries:
+                entry_norm = normalize(entry)
+                entry_norm.pop("id", None)
+                assigned_ids = entry_norm.get("assigned_to", [])
+                assigned_names = [self.directory.name_of(eid) or eid for eid in assigned_ids]
+                if search:
+                    add_highlights(entry_norm, search, ("task_name", "summary"))
+                reports.append({
+                    **entry_norm,
+                    "project_name": proj_map.get(entry_norm.get("project_id"), "Unknown Project"),
+                    "employee_name": ", ".join(filter(None, assigned_names)),
+                })
 
-                for entry in task_norm.get("eod_history", []):
-                    if date and entry.get("date") != date:
-                        continue
-                    
-                    # Search Filtering
-                    if search:
-                        search_lower = search.lower()
-                        task_name = (task_norm.get("task_name") or task_norm.get("name") or "").lower()
-                        summary = (entry.get("summary") or "").lower()
-                        emp_name = employee_display.lower()
-                        
-                        if (
-                            search_lower not in task_name
-                            and search_lower not in summary
-                            and search_lower not in emp_name
-                        ):
-                            continue
-
-                    report_entry = {
-                        "task_id": task_norm["id"],
-                        "task_name": task_norm.get("task_name")
-                        or task_norm.get("name")
-                        or "Untitled Task",
-                        "project_id": task_norm.get("project_id"),
-                        "project_name": proj_name,
-                        "assigned_to": task_norm.get("assigned_to", []),
-                        "employee_name": employee_display,
-                        **entry,
-                    }
-                    reports.append(report_entry)
+            return reports, total_items
+        except Exception as e:
+            raise e
 
-            reports.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-            return reports
+    async def get_task_assignees(self, task_ids: List[str]) -> List[str]:
+        """Distinct employee ids assigned to any of the given tasks."""
+        try:
+            object_ids = [ObjectId(t) for t in task_ids if ObjectId.is_valid(t)]
+            return await self.tasks.distinct("assigned_to", {"_id": {"$in": object_ids}})
+        except Exception as e:
+            raise e
+
+    async def get_task_project_ids(self, task_ids: List[str]) -> List[str]:
+        """Distinct project ids of the given tasks."""
+        try:
+            object_ids = [ObjectId(t) for t in task_ids if ObjectId.is_valid(t)]
+            return await self.tasks.distinct("project_id", {"_id": {"$in": object_ids}})
         except Exception as e:
             raise e
 
     async def delete_task(self, task_id: str) -> bool:
         try:
             result = await self.tasks.delete_one({"_id": ObjectId(task_id)})
+            if result.deleted_count > 0:
+                await self.eod_entries.delete_many({"task_id": task_id})
             return result.deleted_count > 0
         except Exception as e:
             raise e
@@ -2371,23 +3710,12 @@ class Repository:
             from datetime import time as _time
             mid_shift_time = _time(mid_shift_hour, mid_shift_min)
 
-            # 6. Fetch Approved Leave Request for this employee & date
-            approved_leave = await self.leave_requests.find_one({
-                "employee_id": target_emp_id,
-                "status": "Approved",
-                "start_date": {"$lte": attendance.date},
-                "end_date":   {"$gte": attendance.date},
-            })
+            # 6. Fetch Approved Leave Day for this employee & date
+            approved_leave = await self.get_leave_day(target_emp_id, attendance.date)
 
             leave_duration_type = approved_leave.get("leave_duration_type") if approved_leave else None
             half_day_session    = approved_leave.get("half_day_session") if approved_leave else None
-
-            # Determine leave_type_code from the leave type document
-            leave_type_code = None
-            if approved_leave and approved_leave.get("leave_type_id"):
-                lt = await self.leave_types.find_one({"_id": ObjectId(approved_leave["leave_type_id"])})
-                if lt:
-                    leave_type_code = lt.get("code")
+            leave_type_code     = approved_leave.get("leave_type_code") if approved_leave else None
 
             # 7. Effective start time (adjusted for Half Day)
             effective_start = work_start
@@ -2482,15 +3810,28 @@ class Repository:
                 res = {**existing, **attendance_data}
                 if emp:
                     res["employee_details"] = get_employee_basic_details(emp)
-                return normalize(res)
-
-            # No existing record, create new one
-            attendance_data["created_at"] = datetime.utcnow()
-            result = await self.attendance.insert_one(attendance_data)
-            attendance_data["id"] = str(result.inserted_id)
-            if emp:
-                attendance_data["employee_details"] = get_employee_basic_details(emp)
-            return normalize(attendance_data)
+                res = normalize(res)
+            else:
+                # No existing record, create new one
+                attendance_data["created_at"] = datetime.utcnow()
+                result = await self.attendance.insert_one(attendance_data)
+                attendance_data["id"] = str(result.inserted_id)
+                if emp:
+                    attendance_data["employee_details"] = get_employee_basic_details(emp)
+                res = normalize(attendance_data)
+
+            await self._publish_attendance_deltas([
+                attendance_event(
+                    "clock_in",
+                    employee_id=res.get("employee_id"),
+                    date=res.get("date"),
+                    clock_in=res.get("clock_in"),
+                    status=res.get("status"),
+                    attendance_status=res.get("attendance_status"),
+                    is_late=res.get("is_late", False),
+                )
+            ])
+            return res
         except Exception as e:
             raise e
 
@@ -2600,6 +3941,16 @@ class Repository:
             res = normalize(updated_record)
             if emp:
                 res["employee_details"] = get_employee_basic_details(emp)
+
+            await self._publish_attendance_deltas([
+                attendance_event(
+                    "clock_out",
+                    employee_id=res.get("employee_id"),
+                    date=res.get("date"),
+                    clock_out=res.get("clock_out"),
+                    total_work_hours=res.get("total_work_hours"),
+                )
+            ])
             return res
         except Exception as e:
             raise e
@@ -2651,24 +4002,15 @@ class Repository:
             elif start_date:
                 query["date"] = {"$gte": start_date}
 
+            await self.directory.ensure_fresh()
+
             if employee_id:
                 # Try to find employee to get both IDs
-                emp = await self.employees.find_one(
-                    {
-                        "$or": [
-                            {
-                                "_id": ObjectId(employee_id)
-                                if ObjectId.is_valid(employee_id)
-                                else "000000000000000000000000"
-                            },
-                            {"employee_no_id": employee_id},
-                        ]
-                    }
-                )
+                emp = self.directory.get(employee_id)
 
                 if emp:
                     # Search by both Mongo ID (str) and Biometric ID (str or int)
-                    emp_mongo_id = str(emp.get("_id"))
+                    emp_mongo_id = emp["id"]
                     emp_bio_id = str(emp.get("employee_no_id"))
                     query["employee_id"] = {"$in": [emp_mongo_id, emp_bio_id]}
                 else:
@@ -2690,30 +4032,12 @@ class Repository:
                 .to_list(length=limit)
             )
 
-            # Fetch employee details for mapping
-            employees = await self.employees.find().to_list(length=None)
-            emp_map = {}
-            for e in employees:
-                e_norm = normalize(e)
-                # Map by ID (ObjectId string)
-                if e_norm.get("id"):
-                    emp_map[str(e_norm["id"])] = e_norm
-                # Map by Employee No ID (Biometric ID)
-                if e_norm.get("employee_no_id"):
-                    emp_map[str(e_norm["employee_no_id"])] = e_norm
-
             result = []
 
             for r in records:
                 r_norm = normalize(r)
-                emp_details = emp_map.get(r_norm.get("employee_id"))
-                
-                # OPTIMIZATION: Use helper to get only basic details
-                if emp_details:
-                    r_norm["employee_details"] = get_employee_basic_details(emp_details)
-                else:
-                    r_norm["employee_details"] = None
-                    
+                # Employee details by Mongo ID or Employee No ID, from the directory
+                r_norm["employee_details"] = self.directory.get(r_norm.get("employee_id"))
                 result.append(r_norm)
 
             # Sort by date and employee name (already sorted by date in DB query, secondary sort in memory if needed but DB sort is better)
@@ -2736,6 +4060,48 @@ class Repository:
             print(f"Error in get_all_attendance: {e}")
             raise e
 
+    async def get_attendance_counters(self, date: str) -> dict:
+        """Live counters for one day's attendance, published with the attendance delta events."""
+        try:
+            pipeline = [
+                {"$match": {"date": date}},
+                {
+                    "$group": {
+                        "_id": None,
+                        "total": {"$sum": 1},
+                        "present": {"$sum": {"$cond": [{"$in": ["$status", ["Present", "Late", "Half Day"]]}, 1, 0]}},
+                        "late": {"$sum": {"$cond": [{"$eq": ["$is_late", True]}, 1, 0]}},
+                        "absent": {"$sum": {"$cond": [{"$eq": ["$status", "Absent"]}, 1, 0]}},
+                        "leave": {"$sum": {"$cond": [{"$eq": ["$status", "Leave"]}, 1, 0]}},
+                        "clocked_in": {"$sum": {"$cond": [{"$gt": ["$clock_in", None]}, 1, 0]}},
+                        "clocked_out": {"$sum": {"$cond": [{"$gt": ["$clock_out", None]}, 1, 0]}},
+                    }
+                },
+                {"$project": {"_id": 0}},
+            ]
+            cursor = await self.attendance.aggregate(pipeline)
+            result = await cursor.to_list(length=1)
+            counters = result[0] if result else {
+                "total": 0, "present": 0, "late": 0, "absent": 0, "leave": 0, "clocked_in": 0, "clocked_out": 0,
+            }
+            return {"date": date, **counters}
+        except Exception as e:
+            raise e
+
+    async def _publish_attendance_deltas(self, events: List[dict]):
+        """
+        Publishes delta events plus fresh counters for every day they touch. Never raises.
+        Without Redis nothing is published, so the counters are not computed either.
+        """
+        if not events or not live_events_enabled():
+            return
+        try:
+            for date in sorted({e["date"] for e in events if e.get("date")}):
+                events.append(attendance_event("counters", **await self.get_attendance_counters(date)))
+        except Exception as e:
+            print(f"Error computing attendance counters: {e}")
+        await publish_attendance_events(events)
+
     async def get_dashboard_metrics(self, employee_id: str = None) -> dict:
         try:
             today = datetime.now().date()
@@ -2881,9 +4247,20 @@ class Repository:
         try:
             processed_count = 0
             errors = []
+            live_events = []
 
             sorted_logs = sorted(logs, key=lambda x: x.timestamp)
 
+            # Approved leave days for the whole batch in one query
+            batch_dates = [
+                log.timestamp[:10] for log in sorted_logs
+                if len(log.timestamp) >= 10 and log.timestamp[4] == "-"
+            ]
+            leave_days_map = (
+                await self.get_leave_days_map(min(batch_dates), max(batch_dates))
+                if batch_dates else {}
+            )
+
             for log in sorted_logs:
                 try:
                     try:
@@ -2980,23 +4357,12 @@ class Repository:
 
                         clock_in_time = log_time.time()
 
-                        # 5. Fetch Approved Leave Request for this employee & date
-                        approved_leave = await self.leave_requests.find_one({
-                            "employee_id": employee_id,
-                            "status": "Approved",
-                            "start_date": {"$lte": date_str},
-                            "end_date":   {"$gte": date_str},
-                        })
+                        # 5. Fetch Approved Leave Day for this employee & date
+                        approved_leave = leave_days_map.get((employee_id, date_str))
 
                         leave_duration_type = approved_leave.get("leave_duration_type") if approved_leave else None
                         half_day_session    = approved_leave.get("half_day_session") if approved_leave else None
-
-                        # Determine leave_type_code
-                        leave_type_code = None
-                        if approved_leave and approved_leave.get("leave_type_id"):
-                            lt = await self.leave_types.find_one({"_id": ObjectId(approved_leave["leave_type_id"])})
-                            if lt:
-                                leave_type_code = lt.get("code")
+                        leave_type_code     = approved_leave.get("leave_type_code") if approved_leave else None
 
                         # 6. Effective start time (adjusted for First Half Leave)
                         effective_start = work_start
@@ -3037,6 +4403,7 @@ class Repository:
                             )
 
                             if is_full_day_leave_bio:
+                                record_status = attendance.get("status")
                                 await self.attendance.update_one(
                                     {"_id": attendance["_id"]},
                                     {
@@ -3051,6 +4418,7 @@ class Repository:
                                 )
                             else:
                                 # Absent / Holiday / Half Day / Permission: override to Present
+                                record_status = "Present"
                                 await self.attendance.update_one(
                                     {"_id": attendance["_id"]},
                                     {
@@ -3069,6 +4437,7 @@ class Repository:
                                 )
                         else:
                             # No existing record → create new Present record
+                            record_status = "Present"
                             new_record = {
                                 "employee_id":       employee_id,
                                 "date":              date_str,
@@ -3085,6 +4454,15 @@ class Repository:
                             await self.attendance.insert_one(new_record)
                         
                         processed_count += 1
+                        live_events.append(attendance_event(
+                            "clock_in",
+                            employee_id=employee_id,
+                            date=date_str,
+                            clock_in=time_str,
+                            status=record_status,
+                            attendance_status=attendance_status,
+                            is_late=is_late,
+                        ))
 
                     else: 
                         # --- CLOCK OUT LOGIC ---
@@ -3119,16 +4497,28 @@ class Repository:
                                     },
                                 )
                                 processed_count += 1
+                                live_events.append(attendance_event(
+                                    "clock_out",
+                                    employee_id=employee_id,
+                                    date=date_str,
+                                    clock_out=time_str,
+                                    total_work_hours=total_hours,
+                                ))
 
 
                 except Exception as e:
                     errors.append(f"Error processing log for {log.user_id}: {str(e)}")
                     continue
 
+            # (employee_id, date) of every record written, for the dashboard summaries
+            attendance_keys = sorted({(e["employee_id"], e["date"]) for e in live_events})
+            await self._publish_attendance_deltas(live_events)
+
             return {
                 "processed": processed_count,
                 "total_received": len(logs),
                 "errors": errors,
+                "attendance_keys": attendance_keys,
             }
         except Exception as e:
             raise e
@@ -3609,7 +4999,8 @@ class Repository:
         project_id: Optional[str] = None,
         assigned_to: Optional[str] = None,
         status: Optional[str] = None,
-        priority: Optional[str] = None
+        priority: Optional[str] = None,
+        search: Optional[str] = None
     ) -> List[dict]:
         try:
             query = {}
@@ -3618,11 +5009,177 @@ class Repository:
             if status: query["status"] = status
             if priority: query["priority"] = priority
 
+            if search:
+                query.update(text_query(search))
+                items = await self.milestones_roadmaps.find(query, TEXT_SCORE).sort(TEXT_SCORE_SORT).to_list(length=None)
+                return [add_highlights(normalize(item), search, ("task_name", "description", "tags")) for item in items]
+
             items = await self.milestones_roadmaps.find(query).to_list(length=None)
             return [normalize(item) for item in items]
         except Exception as e:
             raise e
 
+    async def get_roadmap_rollup(self, project_id: Optional[str] = None, today: Optional[str] = None) -> List[dict]:
+        """
+        Roadmap progress per project and per milestone, in one aggregation over the
+        milestones and the tasks linked to them through tasks.milestone_id:
+        milestone counts by status and priority, linked task counts by status,
+        overdue milestones and tasks, and progress weighted by task priority
+        (a Completed task counts as 100%). A milestone without linked tasks counts
+        as a single unit of its own priority, done only when it is Completed.
+        """
+        try:
+            today = today or datetime.utcnow().strftime("%Y-%m-%d")
+            done_statuses = ["Completed", "Done"]
+
+            def weight(priority):
+                return {
+                    "$switch": {
+                        "branches": [
+                            {"case": {"$eq": [priority, name]}, "then": value}
+                            for name, value in ROADMAP_PRIORITY_WEIGHTS.items()
+                        ],
+                        "default": ROADMAP_PRIORITY_WEIGHTS["Medium"],
+                    }
+                }
+
+            def overdue(prefix):
+                return {
+                    "$and": [
+                        {"$not": [{"$in": [f"{prefix}status", done_statuses]}]},
+                        {"$gt": [f"{prefix}end_date", ""]},
+                        {"$lt": [f"{prefix}end_date", today]},
+                    ]
+                }
+
+            def counts_by(items, field):
+                return {
+                    "$arrayToObject": {
+                        "$map": {
+                            "input": {"$setUnion": [f"${items}.{field}"]},
+                            "as": "k",
+                            "in": {
+                                "k": "$$k",
+                                "v": {"$size": {"$filter": {"input": f"${items}", "cond": {"$eq": [f"$$this.{field}", "$$k"]}}}},
+                            },
+                        }
+                    }
+                }
+
+            pipeline = [
+                {"$match": {"project_id": project_id} if project_id else {}},
+                {
+                    "$lookup": {
+                        "from": "tasks",
+                        "let": {"milestone_id": {"$toString": "$_id"}},
+                        "pipeline": [
+                            {"$match": {"$expr": {"$eq": ["$milestone_id", "$$milestone_id"]}}},
+                            {
+                                "$project": {
+                                    "_id": 0,
+                                    "status": {"$ifNull": ["$status", "Todo"]},
+                                    "end_date": 1,
+                                    "weight": weight({"$ifNull": ["$priority", "Medium"]}),
+                                    "percent": {
+                                        "$cond": [
+                                            {"$in": ["$status", done_statuses]},
+                                            100,
+                                            {"$min": [{"$max": [{"$ifNull": ["$progress", 0]}, 0]}, 100]},
+                                        ]
+                                    },
+                                }
+                            },
+                        ],
+                        "as": "tasks",
+                    }
+                },
+                {
+                    "$addFields": {
+                        "status": {"$ifNull": ["$status", "Backlog"]},
+                        "priority": {"$ifNull": ["$priority", "Medium"]},
+                    }
+                },
+                {
+                    "$addFields": {
+                        "is_overdue": overdue("$"),
+                        "task_count": {"$size": "$tasks"},
+                        "task_status_counts": counts_by("tasks", "status"),
+                        "overdue_tasks": {
+                            "$size": {"$filter": {"input": "$tasks", "as": "t", "cond": overdue("$$t.")}}
+                        },
+                        "weight_total": {
+                            "$cond": [
+                                {"$gt": [{"$size": "$tasks"}, 0]},
+                                {"$sum": "$tasks.weight"},
+                                weight("$priority"),
+                            ]
+                        },
+                        "weighted_percent": {
+                            "$cond": [
+                                {"$gt": [{"$size": "$tasks"}, 0]},
+                                {"$sum": {"$map": {"input": "$tasks", "as": "t", "in": {"$multiply": ["$$t.weight", "$$t.percent"]}}}},
+                                {"$cond": [{"$in": ["$status", done_statuses]}, {"$multiply": [weight("$priority"), 100]}, 0]},
+                            ]
+                        },
+                    }
+                },
+                {"$sort": {"start_date": 1, "_id": 1}},
+                {
+                    "$group": {
+                        "_id": "$project_id",
+                        "milestones": {
+                            "$push": {
+                                "id": {"$toString": "$_id"},
+                                "task_name": "$task_name",
+                                "status": "$status",
+                                "priority": "$priority",
+                                "start_date": "$start_date",
+                                "end_date": "$end_date",
+                                "is_overdue": "$is_overdue",
+                                "task_count": "$task_count",
+                                "task_status_counts": "$task_status_counts",
+                                "overdue_tasks": "$overdue_tasks",
+                                "progress": {"$round": [{"$divide": ["$weighted_percent", "$weight_total"]}, 1]},
+                            }
+                        },
+                        "task_count": {"$sum": "$task_count"},
+                        "overdue_tasks": {"$sum": "$overdue_tasks"},
+                        "overdue_milestones": {"$sum": {"$cond": ["$is_overdue", 1, 0]}},
+                        "weight_total": {"$sum": "$weight_total"},
+                        "weighted_percent": {"$sum": "$weighted_percent"},
+                    }
+                },
+                {
+                    "$project": {
+                        "_id": 0,
+                        "project_id": "$_id",
+                        "milestones": 1,
+                        "milestone_count": {"$size": "$milestones"},
+                        "status_counts": counts_by("milestones", "status"),
+                        "priority_counts": counts_by("milestones", "priority"),
+                        "overdue_milestones": 1,
+                        "task_count": 1,
+                        "overdue_tasks": 1,
+                        "progress": {"$round": [{"$divide": ["$weighted_percent", "$weight_total"]}, 1]},
+                    }
+                },
+                {"$sort": {"project_id": 1}},
+            ]
+            cursor = await self.milestones_roadmaps.aggregate(pipeline)
+            rollups = await cursor.to_list(length=None)
+
+            project_ids = [r["project_id"] for r in rollups if ObjectId.is_valid(str(r["project_id"]))]
+            projects = await self.projects.find(
+                {"_id": {"$in": [ObjectId(p) for p in project_ids]}}, {"name": 1}
+            ).to_list(length=None)
+            proj_map = {str(p["_id"]): p.get("name") for p in projects}
+            for rollup in rollups:
+                rollup["project_name"] = proj_map.get(str(rollup["project_id"]), "Unknown Project")
+
+            return normalize(rollups)
+        except Exception as e:
+            raise e
+
     async def get_milestone_roadmap(self, item_id: str) -> dict:
         try:
             item = await self.milestones_roadmaps.find_one({"_id": ObjectId(item_id)})
@@ -3649,4 +5206,94 @@ class Repository:
         except Exception as e:
             raise e
 
+    # Job Run Ledger
+    async def create_job_run(self, run_data: dict) -> dict:
+        try:
+            run_data["created_at"] = datetime.utcnow()
+            result = await self.job_runs.insert_one(run_data)
+            run_data["id"] = str(result.inserted_id)
+            return normalize(run_data)
+        except Exception as e:
+            raise e
+
+    async def get_job_runs(
+        self,
+        job_id: Optional[str] = None,
+        success: Optional[bool] = None,
+        page: int = 1,
+        limit: int = 20,
+    ) -> (List[dict], int):
+        try:
+            query = {}
+            if job_id:
+                query["job_id"] = job_id
+            if success is not None:
+                query["success"] = success
+
+            skip = (page - 1) * limit
+            total_items = await self.job_runs.count_documents(query)
+
+            runs = (
+                await self.job_runs.find(query)
+                .sort("started_at", -1)
+                .skip(skip)
+                .limit(limit)
+                .to_list(length=limit)
+            )
+            return [normalize(r) for r in runs], total_items
+        except Exception as e:
+            raise e
+
+    async def get_job_run_stats(self, window: int = 100) -> List[dict]:
+        """
+        Per-job duration percentiles and health counters over the latest `window` runs.
+        """
+        try:
+            # Only the latest `window` runs of each job are read, through the
+            # (job_id, started_at) index, so the cost does not grow with history
+            projection = {
+                "_id": 0,
+                "duration_ms": 1,
+                "success": 1,
+                "records_created": 1,
+                "employees_scanned": 1,
+                "started_at": 1,
+                "instance_id": 1,
+            }
+            job_ids = sorted(j for j in await self.job_runs.distinct("job_id") if j)
+
+            def percentile(sorted_values: list, pct: float):
+                if not sorted_values:
+                    return None
+                # Nearest-rank percentile
+                index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+                return sorted_values[index]
+
+            stats = []
+            for job_id in job_ids:
+                runs = await self.job_runs.find({"job_id": job_id}, projection).sort(
+                    "started_at", -1
+                ).limit(window).to_list(length=window)
+                durations = sorted(r.get("duration_ms") or 0 for r in runs)
+                successful = [r for r in runs if r.get("success")]
+                last_run = runs[0] if runs else {}
+
+                stats.append(
+                    {
+                        "job_id": job_id,
+                        "runs": len(runs),
+                        "failed_runs": len(runs) - len(successful),
+                        "zero_record_runs": len(
+                            [r for r in successful if not r.get("records_created")]
+                        ),
+                        "p50_duration_ms": percentile(durations, 50),
+                        "p95_duration_ms": percentile(durations, 95),
+                        "max_duration_ms": durations[-1] if durations else None,
+                        "last_run": normalize(last_run),
+                    }
+                )
+            return stats
+        except Exception as e:
+            raise e
+
 repository = Repository()
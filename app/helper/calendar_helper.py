@@ -0,0 +1,143 @@
+import asyncio
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from app.crud.repository import repository as repo
+from app.core.config import CALENDAR_CACHE_TTL_SECONDS
+
+# Weekdays that are never working days (Monday=0 ... Sunday=6)
+WEEKEND_DAYS = {6}
+
+
+def _parse(day) -> date:
+    if isinstance(day, datetime):
+        return day.date()
+    if isinstance(day, date):
+        return day
+    return datetime.strptime(day, "%Y-%m-%d").date()
+
+
+def is_weekend(day) -> bool:
+    return _parse(day).weekday() in WEEKEND_DAYS
+
+
+def _weekend_days_between(start: date, end: date) -> int:
+    """Number of WEEKEND_DAYS dates in [start, end] without iterating the range."""
+    total_days = (end - start).days + 1
+    full_weeks, remainder = divmod(total_days, 7)
+    count = full_weeks * len(WEEKEND_DAYS)
+    for n in range(remainder):
+        if (start.weekday() + n) % 7 in WEEKEND_DAYS:
+            count += 1
+    return count
+
+
+class _YearCalendar:
+    """Active holidays of one year, keyed by date, plus a day-of-year bitmap."""
+
+    def __init__(self, year: int, holidays: List[dict]):
+        self.year = year
+        self.loaded_at = time.monotonic()
+        self.holidays: Dict[str, dict] = {}
+        # Bit n set = day n of the year (0-based) is a holiday on a non-weekend day
+        self.working_holiday_bits = 0
+
+        for h in holidays:
+            try:
+                day = _parse(h.get("date"))
+            except (TypeError, ValueError):
+                continue
+            self.holidays[day.strftime("%Y-%m-%d")] = h
+            if day.weekday() not in WEEKEND_DAYS:
+                self.working_holiday_bits |= 1 << (day.timetuple().tm_yday - 1)
+
+    def working_holidays_between(self, start: date, end: date) -> int:
+        first = start.timetuple().tm_yday - 1
+        length = (end - start).days + 1
+        return bin((self.working_holiday_bits >> first) & ((1 << length) - 1)).count("1")
+
+
+class WorkCalendar:
+    """
+    Working-day calendar shared by dashboards and jobs.
+
+    Active holidays are loaded once per year and kept in memory, so lookups do
+    not touch the database. The holiday CRUD routes call invalidate(); the TTL
+    covers changes made through other workers.
+    """
+
+    def __init__(self, ttl_seconds: int = CALENDAR_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._years: Dict[int, _YearCalendar] = {}
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._years.clear()
+
+    def _fresh(self, year: int) -> Optional[_YearCalendar]:
+        cal = self._years.get(year)
+        if cal and time.monotonic() - cal.loaded_at < self.ttl_seconds:
+            return cal
+        return None
+
+    async def _year(self, year: int) -> _YearCalendar:
+        cal = self._fresh(year)
+        if cal:
+            return cal
+
+        async with self._lock:
+            cal = self._fresh(year)
+            if cal:
+                return cal
+
+            holidays = await repo.get_holidays_between(f"{year}-01-01", f"{year}-12-31", status="Active")
+            cal = _YearCalendar(year, holidays)
+            self._years[year] = cal
+            return cal
+
+    async def get_holiday(self, day) -> Optional[dict]:
+        d = _parse(day)
+        cal = await self._year(d.year)
+        return cal.holidays.get(d.strftime("%Y-%m-%d"))
+
+    async def is_holiday(self, day) -> bool:
+        return await self.get_holiday(day) is not None
+
+    async def is_working_day(self, day) -> bool:
+        return not is_weekend(day) and not await self.is_holiday(day)
+
+    async def holidays_between(self, start, end) -> List[dict]:
+        """Active holidays in [start, end], sorted by date."""
+        start_d, end_d = _parse(start), _parse(end)
+        if start_d > end_d:
+            return []
+
+        start_str, end_str = start_d.strftime("%Y-%m-%d"), end_d.strftime("%Y-%m-%d")
+        result = []
+        for year in range(start_d.year, end_d.year + 1):
+            cal = await self._year(year)
+            result.extend(h for d, h in cal.holidays.items() if start_str <= d <= end_str)
+        return sorted(result, key=lambda h: h.get("date"))
+
+    async def working_days_between(self, start, end) -> int:
+        """Working days in [start, end]: not a weekend day and not an active holiday."""
+        start_d, end_d = _parse(start), _parse(end)
+        if start_d > end_d:
+            return 0
+
+        working = (end_d - start_d).days + 1 - _weekend_days_between(start_d, end_d)
+        for year in range(start_d.year, end_d.year + 1):
+            cal = await self._year(year)
+            year_start = max(start_d, date(year, 1, 1))
+            year_end = min(end_d, date(year, 12, 31))
+            working -= cal.working_holidays_between(year_start, year_end)
+        return working
+
+    async def next_holidays(self, from_day, n: int = 3) -> List[dict]:
+        """The next n active holidays on or after from_day (looks one year ahead)."""
+        start_d = _parse(from_day)
+        upcoming = await self.holidays_between(start_d, date(start_d.year + 1, 12, 31))
+        return upcoming[:n]
+
+
+work_calendar = WorkCalendar()
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+from app.cookies.cookies import get_manager
+from app.core.config import DASHBOARD_CACHE_TTL_SECONDS, DASHBOARD_CACHE_MAX_STALE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+ADMIN_SNAPSHOT_KEY = "dashboard:admin:sections"
+ADMIN_STALE_KEY = "dashboard:admin:stale"
+ADMIN_REFRESH_LOCK = "lock:dashboard:admin:refresh"
+
+# compute(previous, stale_sources) -> new value; previous is None on a cold cache
+ComputeFn = Callable[[Optional[dict], set], Awaitable[dict]]
+
+# refresh_after(value) -> seconds until the value should be revalidated
+RefreshAfterFn = Callable[[dict], float]
+
+# Keeps references to in-flight refreshes so they are not garbage collected
+_refresh_tasks = set()
+
+
+async def invalidate_dashboard(*sources: str):
+    """
+    Marks the cached admin dashboard as stale after a write to one of the sources.
+    The next read still serves the snapshot and triggers a background refresh.
+    """
+    manager = get_manager()
+    if manager.redis is None:
+        return
+    try:
+        await manager.add_to_set(ADMIN_STALE_KEY, *sources)
+    except Exception as e:
+        logger.error(f"Failed to invalidate dashboard cache: {str(e)}")
+
+
+async def _store_snapshot(manager, data: dict, refresh_after: Optional[RefreshAfterFn] = None):
+    snapshot = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "refresh_after": refresh_after(data) if refresh_after else DASHBOARD_CACHE_TTL_SECONDS,
+        "data": data,
+    }
+    await manager.set_cache(ADMIN_SNAPSHOT_KEY, snapshot, ttl=DASHBOARD_CACHE_MAX_STALE_SECONDS)
+
+
+async def _refresh(compute: ComputeFn, previous: Optional[dict], refresh_after: Optional[RefreshAfterFn]):
+    """Recomputes the snapshot; the Redis lock keeps it to one refresh across workers."""
+    manager = get_manager()
+    owner = uuid.uuid4().hex
+    try:
+        if not await manager.acquire_lock(ADMIN_REFRESH_LOCK, owner, DASHBOARD_CACHE_MAX_STALE_SECONDS * 1000):
+            return
+        try:
+            # Cleared before computing so writes made meanwhile mark the new snapshot stale
+            stale_sources = await manager.get_set(ADMIN_STALE_KEY)
+            await manager.delete_cache(ADMIN_STALE_KEY)
+            data = await compute(previous, stale_sources)
+            await _store_snapshot(manager, data, refresh_after)
+        finally:
+            await manager.release_lock(ADMIN_REFRESH_LOCK, owner)
+    except Exception as e:
+        logger.error(f"Failed to refresh admin dashboard cache: {str(e)}")
+
+
+def _schedule_refresh(compute: ComputeFn, previous: Optional[dict], refresh_after: Optional[RefreshAfterFn]):
+    if _refresh_tasks:
+        return
+    task = asyncio.create_task(_refresh(compute, previous, refresh_after))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def get_admin_dashboard(compute: ComputeFn, refresh_after: Optional[RefreshAfterFn] = None) -> dict:
+    """
+    Returns the admin dashboard sections, cached in Redis with stale-while-revalidate:
+    a snapshot past its refresh_after (DASHBOARD_CACHE_TTL_SECONDS by default) or
+    marked stale by a write is still served, while a single background task
+    recomputes it from the previous snapshot and the stale sources. Without Redis
+    it is computed on every call.
+    """
+    manager = get_manager()
+    if manager.redis is None:
+        return await compute(None, set())
+
+    try:
+        snapshot = await manager.get_cache(ADMIN_SNAPSHOT_KEY)
+        stale_sources = await manager.get_set(ADMIN_STALE_KEY)
+    except Exception as e:
+        logger.error(f"Failed to read admin dashboard cache: {str(e)}")
+        return await compute(None, set())
+
+    if snapshot is None:
+        try:
+            await manager.delete_cache(ADMIN_STALE_KEY)
+        except Exception as e:
+            logger.error(f"Failed to reset admin dashboard cache: {str(e)}")
+        data = await compute(None, set())
+        try:
+            await _store_snapshot(manager, data, refresh_after)
+        except Exception as e:
+            logger.error(f"Failed to store admin dashboard cache: {str(e)}")
+        return data
+
+    age = (datetime.utcnow() - datetime.fromisoformat(snapshot["generated_at"])).total_seconds()
+    if age > snapshot.get("refresh_after", DASHBOARD_CACHE_TTL_SECONDS) or stale_sources:
+        # compute() decides what is due from the previous snapshot
+        _schedule_refresh(compute, snapshot["data"], refresh_after)
+
+    return snapshot["data"]
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from typing import Optional
+from app.cookies.cookies import get_manager
+from app.crud.repository import repository as repo
+from app.core.config import EMPLOYEE_OVERVIEW_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_key(employee_id: str) -> str:
+    return f"employee:overview:{employee_id}"
+
+
+async def _load_overview(employee_id: str) -> Optional[dict]:
+    """Fetches the employee once, then loads every section concurrently."""
+    employee = await repo.get_employee(employee_id)
+    if not employee:
+        return None
+
+    emp_id = employee["id"]
+    leave_summary, task_metrics, attendance_stats, assigned_projects, assigned_assets = await asyncio.gather(
+        repo.get_employee_leave_balances(emp_id),
+        repo.get_employee_task_metrics(emp_id),
+        repo.get_employee_attendance_stats(emp_id),
+        repo.get_employee_assigned_projects(emp_id),
+        repo.get_assets_by_employee(emp_id, employee=employee),
+    )
+    return {
+        "employee": employee,
+        "leave_summary": leave_summary,
+        "task_metrics": task_metrics,
+        "attendance_stats": attendance_stats,
+        "assigned_projects": assigned_projects,
+        "assigned_assets": assigned_assets,
+    }
+
+
+async def get_employee_overview(employee_id: str) -> Optional[dict]:
+    """
+    The employee 360 summary (profile, leave balances, task metrics, attendance
+    stats, projects and assets), cached in Redis per employee for
+    EMPLOYEE_OVERVIEW_CACHE_TTL_SECONDS. Without Redis it is computed on every call.
+    Returns None when the employee does not exist.
+    """
+    manager = get_manager()
+    if manager.redis is not None:
+        try:
+            cached = await manager.get_cache(_cache_key(employee_id))
+            if cached:
+                return cached
+        except Exception as e:
+            logger.error(f"Failed to read employee overview cache: {str(e)}")
+
+    overview = await _load_overview(employee_id)
+
+    if overview and manager.redis is not None:
+        try:
+            await manager.set_cache(_cache_key(employee_id), overview, ttl=EMPLOYEE_OVERVIEW_CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.error(f"Failed to store employee overview cache: {str(e)}")
+    return overview
+
+
+async def invalidate_employee_overview(employee_id: str):
+    """Drops the cached summary after a write to the employee."""
+    manager = get_manager()
+    if manager.redis is None:
+        return
+    try:
+        await manager.delete_cache(_cache_key(employee_id))
+    except Exception as e:
+        logger.error(f"Failed to invalidate employee overview cache: {str(e)}")
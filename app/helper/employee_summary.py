@@ -0,0 +1,634 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.crud.repository import repository as repo, TASK_DONE_STATUSES
+from app.helper.calendar_helper import work_calendar, is_weekend
+from app.utils import normalize
+
+logger = logging.getLogger(__name__)
+
+# The summary document stores compact facts per section (the month's attendance days,
+# the employee's leave requests, their tasks). Writers $set/$unset single entries;
+# the dashboard numbers are derived from the document in memory on read.
+
+# Sections reconciled with a full recompute once a day, on the first read
+DAILY_SECTIONS = {"attendance", "tasks"}
+
+# Employee fields shown on the dashboard; documents, bank and ID numbers stay out
+PROFILE_PROJECTION = {
+    "first_name": 1,
+    "last_name": 1,
+    "name": 1,
+    "email": 1,
+    "mobile": 1,
+    "date_of_birth": 1,
+    "gender": 1,
+    "employee_no_id": 1,
+    "employee_type": 1,
+    "department": 1,
+    "designation": 1,
+    "role": 1,
+    "status": 1,
+    "shift_id": 1,
+    "date_of_joining": 1,
+    "work_mode": 1,
+    "profile_picture": 1,
+}
+ATTENDANCE_DAY_FIELDS = ("status", "attendance_status", "is_late", "is_half_day", "is_permission", "total_work_hours")
+LEAVE_REQUEST_FIELDS = ("leave_type_id", "status", "start_date", "end_date", "total_days", "created_at", "updated_at")
+TASK_FIELDS = ("task_name", "priority", "status", "end_date", "created_at", "updated_at")
+
+# Keeps today's birthdays per process: {"date": "YYYY-MM-DD", "data": [...]}
+_birthdays_cache = {"date": None, "data": []}
+
+
+def _employee_ids(emp: dict) -> list:
+    """Both ids attendance records may be stored under (Mongo _id and legacy employee_no_id)."""
+    ids = [emp["id"]]
+    if emp.get("employee_no_id"):
+        ids.append(str(emp["employee_no_id"]))
+    return ids
+
+
+def _compact(doc: dict, fields) -> dict:
+    doc = normalize(doc)
+    return {f: doc.get(f) for f in fields}
+
+
+def _leave_dates(leave_req: dict, start: str, end: str) -> list:
+    """Dates of a leave request within [start, end]."""
+    first = max(leave_req.get("start_date") or "", start)
+    last = min(leave_req.get("end_date") or "", end)
+    if not first or not last or first > last:
+        return []
+    day = datetime.strptime(first, "%Y-%m-%d")
+    dates = []
+    while day.strftime("%Y-%m-%d") <= last:
+        dates.append(day.strftime("%Y-%m-%d"))
+        day += timedelta(days=1)
+    return dates
+
+
+# ----------------------------------------------------------------------
+# Full recompute of a section's facts (first read, stale, daily reconcile)
+# ----------------------------------------------------------------------
+async def _profile_section(emp: dict, today_dt: datetime) -> dict:
+    doc = await repo.employees.find_one({"_id": ObjectId(emp["id"])}, PROFILE_PROJECTION)
+    return {"data": normalize(doc) if doc else {}}
+
+
+async def _attendance_section(emp: dict, today_dt: datetime) -> dict:
+    start_of_month = today_dt.replace(day=1).strftime("%Y-%m-%d")
+    month_attendance = await repo.attendance.find(
+        {"employee_id": {"$in": _employee_ids(emp)}, "date": {"$gte": start_of_month}},
+        {"date": 1, **{f: 1 for f in ATTENDANCE_DAY_FIELDS}},
+    ).to_list(length=None)
+    return {
+        "month": today_dt.strftime("%Y-%m"),
+        "days": {a["date"]: _compact(a, ATTENDANCE_DAY_FIELDS) for a in month_attendance if a.get("date")},
+    }
+
+
+async def _leaves_section(emp: dict, today_dt: datetime) -> dict:
+    leave_types = await repo.get_leave_types()
+    my_leaves = await repo.leave_requests.find(
+        {"employee_id": emp["id"]}, {f: 1 for f in LEAVE_REQUEST_FIELDS}
+    ).to_list(length=None)
+    return {
+        "type_names": {lt["id"]: lt.get("name") for lt in leave_types},
+        "active_types": [
+            {"id": lt["id"], "name": lt.get("name"), "allowed": lt.get("number_of_days", 0)}
+            for lt in leave_types
+            if lt.get("status") == "Active"
+        ],
+        "requests": {str(l["_id"]): _compact(l, LEAVE_REQUEST_FIELDS) for l in my_leaves},
+    }
+
+
+async def _tasks_section(emp: dict, today_dt: datetime) -> dict:
+    tasks = await repo.tasks.find(
+        {"assigned_to": {"$in": repo.task_assignee_ids(emp)}}, {f: 1 for f in TASK_FIELDS}
+    ).to_list(length=None)
+    return {"items": {str(t["_id"]): _compact(t, TASK_FIELDS) for t in tasks}}
+
+
+async def _projects_section(emp: dict, today_dt: datetime) -> dict:
+    emp_oid = emp["id"]
+    projects = await repo.projects.find(
+        {
+            "$or": [
+                {"project_manager_ids": emp_oid},
+                {"team_leader_ids": emp_oid},
+                {"team_member_ids": emp_oid},
+            ]
+        },
+        {"name": 1, "status": 1, "end_date": 1, "project_manager_ids": 1, "team_leader_ids": 1},
+    ).to_list(length=None)
+
+    my_projects = []
+    for p in projects:
+        role = "Team Member"
+        if emp_oid in p.get("project_manager_ids", []):
+            role = "Project Manager"
+        elif emp_oid in p.get("team_leader_ids", []):
+            role = "Team Leader"
+        my_projects.append({
+            "name": p.get("name"),
+            "role": role,
+            "status": p.get("status"),
+            "deadline": p.get("end_date"),
+        })
+    return {"items": my_projects}
+
+
+SUMMARY_SECTIONS = {
+    "profile": _profile_section,
+    "attendance": _attendance_section,
+    "leaves": _leaves_section,
+    "tasks": _tasks_section,
+    "projects": _projects_section,
+}
+
+# Key every computed section has; writers only update sections that have it
+SECTION_KEYS = {"profile": "data", "attendance": "days", "leaves": "requests", "tasks": "items", "projects": "items"}
+
+
+# ----------------------------------------------------------------------
+# Dashboard values derived from the stored facts
+# ----------------------------------------------------------------------
+async def _attendance_view(attendance: dict, leaves: dict, today_dt: datetime) -> dict:
+    today_str = today_dt.strftime("%Y-%m-%d")
+    start_of_month = today_dt.replace(day=1).strftime("%Y-%m-%d")
+    start_of_week = (today_dt - timedelta(days=today_dt.weekday())).strftime("%Y-%m-%d")
+    att_map = attendance.get("days") or {}
+
+    # Leave Days Calculation (Sum of approved leaves starting this month)
+    approved = [l for l in (leaves.get("requests") or {}).values() if l.get("status") == "Approved"]
+    leaves_this_month = sum(float(l.get("total_days") or 0) for l in approved if (l.get("start_date") or "") >= start_of_month)
+    leave_dates = {d for l in approved for d in _leave_dates(l, start_of_month, today_str)}
+
+    month_holidays = {
+        h.get("date") for h in await work_calendar.holidays_between(start_of_month, today_str)
+    }
+
+    def is_working(d_str):
+        # Working day: include Saturdays, exclude Sundays/Holidays
+        return not is_weekend(d_str) and d_str not in month_holidays
+
+    present_days = absent_days = late_days = half_day_days = permission_days = 0
+    hours_today = hours_week = hours_month = 0.0
+    covered_days = 0  # working days before today with a record or an approved leave
+
+    # Only days with a record or a leave need looking at; the rest are counted below
+    for d_str in set(att_map) | leave_dates:
+        if not d_str or not (start_of_month <= d_str <= today_str) or not is_working(d_str):
+            continue
+        if d_str != today_str:
+            covered_days += 1
+
+        att_record = att_map.get(d_str)
+        if att_record:
+            status = att_record.get("status") or "Present"
+            att_status = (att_record.get("attendance_status") or "").lower()
+            if status in ["Present", "Late", "Half Day"] or att_record.get("is_late"):
+                present_days += 1
+            elif status == "Absent":
+                absent_days += 1
+
+            if att_record.get("is_late") or status == "Late" or att_status == "late":
+                late_days += 1
+            if att_record.get("is_half_day") or status == "Half Day" or att_status == "half day":
+                half_day_days += 1
+            if att_record.get("is_permission") or att_status == "permission":
+                permission_days += 1
+
+            wh = float(att_record.get("total_work_hours") or 0)
+            hours_month += wh
+            if d_str == today_str:
+                hours_today += wh
+            if d_str >= start_of_week:
+                hours_week += wh
+
+    working_days = await work_calendar.working_days_between(start_of_month, today_str)
+    today_is_working = is_working(today_str)
+    working_days_before_today = working_days - (1 if today_is_working else 0)
+
+    # No Record, No Leave, Working Day => Absent
+    absent_days += working_days_before_today - covered_days
+
+    # Today only counts once it has a status (Total = Present + Absent + Leave)
+    today_has_status = today_str in att_map or today_str in leave_dates
+    total_working_days_elapsed = working_days_before_today + (1 if today_is_working and today_has_status else 0)
+
+    return {
+        "work_hours": {
+            "today": round(hours_today, 1),
+            "this_week": round(hours_week, 1),
+            "this_month": round(hours_month, 1),
+        },
+        "attendance_metrics": {
+            "present_days": present_days,
+            "on_time_days": present_days - late_days,
+            "absent_days": absent_days,
+            "late_days": late_days,
+            "half_day_days": half_day_days,
+            "permission_days": permission_days,
+            "holiday_days": len(month_holidays),
+            "leave_days": leaves_this_month,
+            "total_working_days": total_working_days_elapsed,
+        },
+    }
+
+
+def _leaves_view(leaves: dict, today_dt: datetime) -> dict:
+    year = str(today_dt.year)
+    my_leaves = list((leaves.get("requests") or {}).values())
+    lt_names = leaves.get("type_names") or {}
+
+    # Same figures as the leave_balances ledger: approved days by the year they start in
+    used_by_type = {}
+    for l in my_leaves:
+        if l.get("status") == "Approved" and (l.get("start_date") or "")[:4] == year:
+            type_id = str(l.get("leave_type_id"))
+            used_by_type[type_id] = used_by_type.get(type_id, 0.0) + float(l.get("total_days") or 0)
+
+    leave_balance = []
+    for lt in leaves.get("active_types") or []:
+        used = used_by_type.get(lt["id"], 0.0)
+        leave_balance.append({
+            "type": lt.get("name"),
+            "balance": max(0, lt.get("allowed", 0) - used),
+            "total": lt.get("allowed", 0),
+            "used": used,
+        })
+    total_allowed_all = sum(b["total"] for b in leave_balance)
+    total_taken_all = sum(b["used"] for b in leave_balance)
+
+    sorted_leaves = sorted(my_leaves, key=lambda x: str(x.get("created_at") or ""), reverse=True)
+
+    return {
+        "leave_details": {
+            "summary": {
+                "total_allowed": total_allowed_all,
+                "total_taken": total_taken_all,
+                "total_remaining": total_allowed_all - total_taken_all,
+                "pending_requests": len([l for l in my_leaves if l.get("status") == "Pending"]),
+            },
+            "balance": leave_balance,
+            "recent_requests_status": [
+                {
+                    "type": lt_names.get(l.get("leave_type_id"), "Leave"),
+                    "status": l.get("status"),
+                    "date": l.get("start_date"),
+                }
+                for l in sorted_leaves[:3]
+            ],
+        },
+        "activity": [
+            {
+                "type": "leave",
+                "message": f"Leave request {l.get('status')}",
+                "time": l.get("updated_at") or l.get("created_at"),
+            }
+            for l in sorted_leaves[:3]
+        ],
+    }
+
+
+def _tasks_view(tasks: dict, today_dt: datetime) -> dict:
+    today_str = today_dt.strftime("%Y-%m-%d")
+    items = list((tasks.get("items") or {}).values())
+
+    # Same counts as Repository.get_task_counts
+    total = len(items)
+    completed = len([t for t in items if t.get("status") in TASK_DONE_STATUSES])
+    in_progress = len([t for t in items if t.get("status") == "In Progress"])
+    overdue = len([
+        t for t in items
+        if t.get("status") not in TASK_DONE_STATUSES and "" < (t.get("end_date") or "") < today_str
+    ])
+
+    sorted_tasks = sorted(items, key=lambda t: str(t.get("created_at") or ""), reverse=True)
+
+    activity = []
+    for t in sorted_tasks[:3]:
+        msg = f"Task '{t.get('task_name')}' is {t.get('status')}"
+        if t.get("status") == "Completed":
+            msg = f"You completed task '{t.get('task_name')}'"
+        activity.append({"type": "task", "message": msg, "time": t.get("updated_at") or t.get("created_at")})
+
+    return {
+        "task_metrics": {
+            "total_assigned": total,
+            "completed": completed,
+            "in_progress": in_progress,
+            "pending": total - completed - in_progress,
+            "overdue": overdue,
+            "completion_rate": round((completed / total) * 100, 2) if total > 0 else 0,
+        },
+        "recent_tasks": [
+            {
+                "task_name": t.get("task_name"),
+                "priority": t.get("priority"),
+                "status": t.get("status"),
+                "due_date": t.get("end_date"),
+            }
+            for t in sorted_tasks[:5]
+        ],
+        "activity": activity,
+    }
+
+
+# ----------------------------------------------------------------------
+# Storage
+# ----------------------------------------------------------------------
+async def _resolve(employee_id) -> Optional[dict]:
+    await repo.directory.ensure_fresh()
+    return repo.directory.get(employee_id)
+
+
+async def _compute_sections(emp: dict, sections: Iterable[str]) -> dict:
+    """Recomputes the given sections and stores them on the employee's summary document."""
+    today_dt = datetime.utcnow()
+    today_str = today_dt.strftime("%Y-%m-%d")
+    sections = [s for s in sections if s in SUMMARY_SECTIONS]
+
+    # Cleared before computing so writes made meanwhile mark the section stale again
+    await repo.employee_summaries.update_one({"_id": emp["id"]}, {"$pull": {"stale": {"$in": sections}}})
+
+    values = {}
+    for name in sections:
+        values[name] = {**await SUMMARY_SECTIONS[name](emp, today_dt), "as_of": today_str}
+
+    await repo.employee_summaries.update_one(
+        {"_id": emp["id"]},
+        {"$set": {**values, "employee_no_id": emp.get("employee_no_id"), "updated_at": today_dt}},
+        upsert=True,
+    )
+    return values
+
+
+async def refresh_employee_summary(employee_id, *sections: str):
+    """
+    Recomputes sections of one employee's dashboard summary after a write.
+    employee_id may be the Mongo _id or the employee_no_id. Never raises.
+    """
+    try:
+        if not sections or "profile" in sections:
+            # A new or edited date of birth may change today's birthdays
+            _birthdays_cache["date"] = None
+        emp = await _resolve(employee_id)
+        if emp:
+            await _compute_sections(emp, sections or SUMMARY_SECTIONS)
+    except Exception as e:
+        logger.error(f"Failed to refresh dashboard summary for {employee_id}: {str(e)}")
+
+
+async def mark_summaries_stale(employee_ids: Optional[Iterable], *sections: str):
+    """
+    Marks sections stale for many employees (all of them when employee_ids is None);
+    they are recomputed on the employee's next dashboard read. For writes whose
+    effect is not worth applying as a delta (leave types, projects). Ids may be any
+    tasks.assigned_to value, names included. Never raises.
+    """
+    try:
+        query = {}
+        if employee_ids is not None:
+            await repo.directory.ensure_fresh()
+            ids = {r["id"] for i in employee_ids for r in repo.directory.find_assignees(i)}
+            if not ids:
+                return
+            query = {"_id": {"$in": list(ids)}}
+        await repo.employee_summaries.update_many(query, {"$addToSet": {"stale": {"$each": list(sections)}}})
+    except Exception as e:
+        logger.error(f"Failed to mark dashboard summaries stale: {str(e)}")
+
+
+async def _write_deltas(operations: list, what: str):
+    if not operations:
+        return
+    try:
+        await repo.employee_summaries.bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.error(f"Failed to apply {what} to dashboard summaries: {str(e)}")
+
+
+async def apply_attendance_records(records: Iterable[dict]):
+    """
+    Sets the day entry of each attendance record on its employee's summary; days of
+    another month than the stored one are left to the monthly recompute. Never raises.
+    """
+    try:
+        await repo.directory.ensure_fresh()
+        operations = []
+        for record in records:
+            emp = repo.directory.get(record.get("employee_id"))
+            date = record.get("date")
+            if emp and date:
+                operations.append(UpdateOne(
+                    {"_id": emp["id"], "attendance.month": date[:7]},
+                    {"$set": {f"attendance.days.{date}": _compact(record, ATTENDANCE_DAY_FIELDS)}},
+                ))
+        await _write_deltas(operations, "attendance records")
+    except Exception as e:
+        logger.error(f"Failed to apply attendance records to dashboard summaries: {str(e)}")
+
+
+async def sync_attendance_days(keys: Iterable[tuple]):
+    """
+    Re-reads the attendance records of (employee_id, date) pairs with one query and
+    sets or removes those days on the summaries. For writers that do not have the
+    final records at hand (biometric sync, imports, generation, leave decisions).
+    Never raises.
+    """
+    try:
+        await repo.directory.ensure_fresh()
+        wanted = {}  # (summary id, date) -> None until a record is found
+        for employee_id, date in keys:
+            emp = repo.directory.get(employee_id)
+            if emp and date:
+                wanted[(emp["id"], date)] = None
+        if not wanted:
+            return
+
+        emps = {emp_id: repo.directory.get(emp_id) for emp_id, _ in wanted}
+        records = await repo.attendance.find(
+            {
+                "employee_id": {"$in": list({i for emp in emps.values() for i in _employee_ids(emp)})},
+                "date": {"$in": list({date for _, date in wanted})},
+            },
+            {"employee_id": 1, "date": 1, **{f: 1 for f in ATTENDANCE_DAY_FIELDS}},
+        ).to_list(length=None)
+        for record in records:
+            emp = repo.directory.get(record.get("employee_id"))
+            if emp and (emp["id"], record.get("date")) in wanted:
+                wanted[(emp["id"], record["date"])] = _compact(record, ATTENDANCE_DAY_FIELDS)
+
+        operations = [
+            UpdateOne(
+                {"_id": emp_id, "attendance.month": date[:7]},
+                {"$set": {f"attendance.days.{date}": day}} if day else {"$unset": {f"attendance.days.{date}": ""}},
+            )
+            for (emp_id, date), day in wanted.items()
+        ]
+        await _write_deltas(operations, "attendance days")
+    except Exception as e:
+        logger.error(f"Failed to sync attendance days to dashboard summaries: {str(e)}")
+
+
+async def apply_leave_requests(requests: List[dict], removed: bool = False, previous: Iterable[dict] = ()):
+    """
+    Sets (or with removed=True, drops) leave requests on their employees' summaries.
+    Decided requests also re-sync the attendance days they cover this month, which
+    approvals and rejections rewrite, as do the dates of previous versions of edited
+    requests. Never raises.
+    """
+    try:
+        await repo.directory.ensure_fresh()
+        today_dt = datetime.utcnow()
+        month_start = today_dt.replace(day=1).strftime("%Y-%m-%d")
+        month_end = (today_dt.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+        operations = []
+        attendance_keys = []
+        current_owners = {
+            str(r.get("id") or r.get("_id")): (repo.directory.get(r.get("employee_id")) or {}).get("id")
+            for r in requests
+        }
+        for leave_req in previous:
+            emp = repo.directory.get((leave_req or {}).get("employee_id"))
+            if not emp:
+                continue
+            request_id = str(leave_req.get("id") or leave_req.get("_id"))
+            if current_owners.get(request_id) != emp["id"]:
+                # Moved to another employee
+                operations.append(UpdateOne({"_id": emp["id"]}, {"$unset": {f"leaves.requests.{request_id}": ""}}))
+            if leave_req.get("status") != "Pending":
+                attendance_keys.extend(
+                    (emp["id"], d) for d in _leave_dates(leave_req, month_start, month_end.strftime("%Y-%m-%d"))
+                )
+        for leave_req in requests:
+            emp = repo.directory.get(leave_req.get("employee_id"))
+            request_id = str(leave_req.get("id") or leave_req.get("_id") or "")
+            if not emp or not request_id:
+                continue
+            field = f"leaves.requests.{request_id}"
+            update = {"$unset": {field: ""}} if removed else {"$set": {field: _compact(leave_req, LEAVE_REQUEST_FIELDS)}}
+            operations.append(UpdateOne({"_id": emp["id"], "leaves.requests": {"$exists": True}}, update))
+            if removed or leave_req.get("status") != "Pending":
+                attendance_keys.extend(
+                    (emp["id"], d) for d in _leave_dates(leave_req, month_start, month_end.strftime("%Y-%m-%d"))
+                )
+
+        await _write_deltas(operations, "leave requests")
+        if attendance_keys:
+            await sync_attendance_days(attendance_keys)
+    except Exception as e:
+        logger.error(f"Failed to apply leave requests to dashboard summaries: {str(e)}")
+
+
+async def apply_tasks(tasks: Iterable[dict], previous_assignees: Iterable = ()):
+    """
+    Sets tasks on the summaries of their assignees (ids, employee_no_ids or names) and
+    drops them from employees in previous_assignees no longer assigned. Never raises.
+    """
+    try:
+        await repo.directory.ensure_fresh()
+        previous = {r["id"] for value in previous_assignees for r in repo.directory.find_assignees(value)}
+        operations = []
+        for task in tasks:
+            task_id = str(task.get("id") or task.get("_id") or "")
+            if not task_id:
+                continue
+            field = f"tasks.items.{task_id}"
+            current = {r["id"] for value in task.get("assigned_to") or [] for r in repo.directory.find_assignees(value)}
+            compact = _compact(task, TASK_FIELDS)
+            operations.extend(
+                UpdateOne({"_id": emp_id, "tasks.items": {"$exists": True}}, {"$set": {field: compact}})
+                for emp_id in current
+            )
+            operations.extend(
+                UpdateOne({"_id": emp_id}, {"$unset": {field: ""}}) for emp_id in previous - current
+            )
+        await _write_deltas(operations, "tasks")
+    except Exception as e:
+        logger.error(f"Failed to apply tasks to dashboard summaries: {str(e)}")
+
+
+async def remove_tasks(task_ids: Iterable[str], assignees: Iterable):
+    """Drops deleted tasks from the summaries of their former assignees. Never raises."""
+    try:
+        await repo.directory.ensure_fresh()
+        emp_ids = {r["id"] for value in assignees for r in repo.directory.find_assignees(value)}
+        operations = [
+            UpdateOne({"_id": emp_id}, {"$unset": {f"tasks.items.{task_id}": ""}})
+            for emp_id in emp_ids
+            for task_id in task_ids
+        ]
+        await _write_deltas(operations, "task removals")
+    except Exception as e:
+        logger.error(f"Failed to remove tasks from dashboard summaries: {str(e)}")
+
+
+async def remove_employee_summary(employee_id: str):
+    try:
+        await repo.employee_summaries.delete_one({"_id": str(employee_id)})
+    except Exception as e:
+        logger.error(f"Failed to remove dashboard summary for {employee_id}: {str(e)}")
+
+
+async def get_employee_summary(employee_id) -> Optional[dict]:
+    """
+    The employee's dashboard summary: one document read, with the dashboard values
+    derived from its facts in memory. Sections are only recomputed when missing,
+    marked stale, from another month (attendance), or once a day as reconciliation
+    (DAILY_SECTIONS). Returns None for an unknown employee.
+    """
+    emp = await _resolve(employee_id)
+    if not emp:
+        return None
+
+    today_dt = datetime.utcnow()
+    today_str = today_dt.strftime("%Y-%m-%d")
+    summary = await repo.employee_summaries.find_one({"_id": emp["id"]}) or {}
+
+    due = set(summary.get("stale", []))
+    for name, key in SECTION_KEYS.items():
+        # Missing, or stored in an older layout without the section's key
+        if key not in summary.get(name, {}) or (name in DAILY_SECTIONS and summary[name].get("as_of") != today_str):
+            due.add(name)
+    if summary.get("attendance", {}).get("month") != today_dt.strftime("%Y-%m"):
+        due.add("attendance")
+
+    if due:
+        summary.update(await _compute_sections(emp, due))
+
+    return {
+        "profile": summary["profile"],
+        "attendance": await _attendance_view(summary["attendance"], summary["leaves"], today_dt),
+        "leaves": _leaves_view(summary["leaves"], today_dt),
+        "tasks": _tasks_view(summary["tasks"], today_dt),
+        "projects": summary["projects"],
+    }
+
+
+async def get_todays_birthdays() -> list:
+    """Employees whose birthday is today; looked up once per day per process."""
+    today = datetime.utcnow()
+    today_str = today.strftime("%Y-%m-%d")
+    if _birthdays_cache["date"] == today_str:
+        return _birthdays_cache["data"]
+
+    employees = await repo.employees.find(
+        {"date_of_birth": {"$regex": today.strftime("-%m-%d$")}},
+        {"name": 1, "profile_picture": 1},
+    ).to_list(length=None)
+    birthdays = [
+        {"name": e.get("name"), "date": today.strftime("%b %d"), "profile_picture": e.get("profile_picture")}
+        for e in employees
+    ]
+
+    _birthdays_cache.update(date=today_str, data=birthdays)
+    return birthdays
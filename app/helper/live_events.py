@@ -0,0 +1,51 @@
+import json
+import logging
+from datetime import datetime
+from typing import AsyncIterator, List
+from app.cookies.cookies import get_manager
+from app.core.config import LIVE_EVENTS_HEARTBEAT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+ATTENDANCE_EVENTS_CHANNEL = "events:attendance"
+
+
+def attendance_event(event_type: str, **payload) -> dict:
+    """A compact delta event, e.g. attendance_event("clock_in", employee_id=..., date=...)."""
+    return {"type": event_type, "at": datetime.utcnow().isoformat(), **payload}
+
+
+def live_events_enabled() -> bool:
+    """Whether published events reach anyone; without Redis they are dropped."""
+    return get_manager().redis is not None
+
+
+async def publish_attendance_events(events: List[dict]):
+    """
+    Publishes delta events to every worker over Redis pub/sub.
+    A no-op without Redis; never raises, so writers are not affected.
+    """
+    manager = get_manager()
+    if manager.redis is None or not events:
+        return
+    try:
+        await manager.publish(ATTENDANCE_EVENTS_CHANNEL, *events)
+    except Exception as e:
+        logger.error(f"Failed to publish attendance events: {str(e)}")
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def attendance_event_stream(is_disconnected) -> AsyncIterator[str]:
+    """
+    Server-sent event stream of attendance deltas. Sends a comment line every
+    LIVE_EVENTS_HEARTBEAT_SECONDS without events so proxies keep the connection open.
+    """
+    manager = get_manager()
+    yield "retry: 5000\n\n"
+    async for event in manager.subscribe(ATTENDANCE_EVENTS_CHANNEL, LIVE_EVENTS_HEARTBEAT_SECONDS):
+        if await is_disconnected():
+            break
+        yield _sse(event) if event else ": keepalive\n\n"
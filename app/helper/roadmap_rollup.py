@@ -0,0 +1,50 @@
+import logging
+from typing import List, Optional
+from app.cookies.cookies import get_manager
+from app.crud.repository import repository as repo
+from app.core.config import ROADMAP_ROLLUP_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+ALL_PROJECTS = "all"
+
+
+def _cache_key(project_id: Optional[str]) -> str:
+    return f"roadmap:rollup:{project_id or ALL_PROJECTS}"
+
+
+async def get_roadmap_rollup(project_id: Optional[str] = None) -> List[dict]:
+    """
+    Roadmap rollups for one project (or every project), cached in Redis for
+    ROADMAP_ROLLUP_CACHE_TTL_SECONDS and dropped by milestone and task writes.
+    Without Redis they are computed on every call.
+    """
+    manager = get_manager()
+    if manager.redis is not None:
+        try:
+            cached = await manager.get_cache(_cache_key(project_id))
+            if cached is not None:
+                return cached
+        except Exception as e:
+            logger.error(f"Failed to read roadmap rollup cache: {str(e)}")
+
+    rollups = await repo.get_roadmap_rollup(project_id)
+
+    if manager.redis is not None:
+        try:
+            await manager.set_cache(_cache_key(project_id), rollups, ttl=ROADMAP_ROLLUP_CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.error(f"Failed to store roadmap rollup cache: {str(e)}")
+    return rollups
+
+
+async def invalidate_roadmap_rollup(*project_ids: Optional[str]):
+    """Drops the cached rollups of the given projects and the all-projects rollup."""
+    manager = get_manager()
+    if manager.redis is None:
+        return
+    try:
+        for key in {_cache_key(None)} | {_cache_key(p) for p in project_ids if p}:
+            await manager.delete_cache(key)
+    except Exception as e:
+        logger.error(f"Failed to invalidate roadmap rollup cache: {str(e)}")
@@ -0,0 +1,69 @@
+import re
+from typing import Iterable, List, Optional
+
+# Fields covered by each collection's text index, with their relevance weights
+TEXT_INDEXES = {
+    "tasks": {"task_name": 10, "tags": 5, "description": 2},
+    "eod_entries": {"task_name": 10, "summary": 5},
+    "milestones_roadmaps": {"task_name": 10, "tags": 5, "description": 2},
+    "blogs": {"title": 10, "tags": 5, "excerpt": 4, "content": 1},
+}
+
+SNIPPET_RADIUS = 60
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+TEXT_SCORE = {"score": {"$meta": "textScore"}}
+TEXT_SCORE_SORT = [("score", {"$meta": "textScore"})]
+
+
+def text_query(search: str) -> dict:
+    """
+    Query clause for a Mongo $text search (uses the collection's text index), the
+    only search model for the TEXT_INDEXES collections so no search scans them.
+    Matching is on whole words after English stemming: "launches" finds "launch",
+    but a partial word such as "prod" does not find "product". Quoted phrases and
+    -negations follow Mongo's $text syntax. Results are ranked by text score.
+    """
+    return {"$text": {"$search": search}}
+
+
+def search_terms(search: str) -> List[str]:
+    """Lower-cased search words, ignoring quotes and negations."""
+    return [w.lower() for w in _WORD_RE.findall(search or "") if len(w) > 1]
+
+
+def highlight(text: Optional[str], terms: Iterable[str], radius: int = SNIPPET_RADIUS) -> Optional[str]:
+    """
+    A snippet of text around the first matching term, with every match wrapped in
+    <mark></mark>. Terms match word prefixes, roughly like the text index stemming.
+    Returns None when nothing matches.
+    """
+    terms = list(terms)
+    if not text or not terms:
+        return None
+
+    pattern = re.compile(r"\b(" + "|".join(re.escape(t) for t in terms) + r")\w*", re.IGNORECASE)
+    first = pattern.search(text)
+    if not first:
+        return None
+
+    start = max(first.start() - radius, 0)
+    end = min(first.end() + radius, len(text))
+    snippet = pattern.sub(lambda m: f"<mark>{m.group(0)}</mark>", text[start:end])
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+def add_highlights(doc: dict, search: str, fields: Iterable[str]) -> dict:
+    """Adds {"highlights": {field: snippet}} for the fields of doc that match the search."""
+    terms = search_terms(search)
+    highlights = {}
+    for field in fields:
+        value = doc.get(field)
+        if isinstance(value, list):
+            value = ", ".join(str(v) for v in value)
+        snippet = highlight(value, terms)
+        if snippet:
+            highlights[field] = snippet
+    doc["highlights"] = highlights
+    return doc
@@ -1,13 +1,254 @@
 from datetime import datetime, timedelta
 from app.crud.repository import repository as repo
+from app.helper.calendar_helper import work_calendar, is_weekend
+from app.helper.dashboard_cache import invalidate_dashboard
+from app.helper.employee_summary import sync_attendance_days
+from pymongo import UpdateOne
 from typing import Optional
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 from bson import ObjectId
 
-async def generate_attendance_for_date(target_date: str = None, preplanned_only: bool = False, shift_type_filter: str = None) -> dict:
+# Upper bound on the number of days a single backfill call may span.
+MAX_BACKFILL_DAYS = 366
+
+# Number of upserts sent to MongoDB per bulk_write call.
+BULK_WRITE_CHUNK_SIZE = 500
+
+# Shift key for employees with neither a personal nor a department default shift.
+DEFAULT_SHIFT_KEY = "default"
+
+IST_OFFSET = timedelta(hours=5, minutes=30)
+
+
+def _ist_today() -> str:
+    """Today's date in IST, the timezone attendance work dates are in."""
+    return (datetime.utcnow() + IST_OFFSET).strftime("%Y-%m-%d")
+
+
+def _daterange(start_date: str, end_date: str):
+    """Yields every YYYY-MM-DD string from start_date to end_date (inclusive)."""
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    for n in range((end - start).days + 1):
+        yield (start + timedelta(days=n)).strftime("%Y-%m-%d")
+
+
+def _resolve_shift_id(emp: dict, shift_map: dict, dept_default_shifts: dict) -> Optional[str]:
+    """
+    Same precedence as clock-in: the employee's own shift, then the department
+    default shift. Returns None when neither points to an existing shift.
+    """
+    emp_shift_id = emp.get("shift_id")
+    if emp_shift_id and emp_shift_id in shift_map:
+        return emp_shift_id
+
+    dept_shift_id = dept_default_shifts.get(emp.get("department"))
+    if dept_shift_id and dept_shift_id in shift_map:
+        return dept_shift_id
+
+    return None
+
+
+async def _load_generation_context(start_date: str, end_date: str, shift_id: str = None) -> dict:
+    """
+    Loads everything needed to generate attendance for a date range in one pass:
+    the employee roster, shift map, holidays, approved leave days and the
+    (employee_id, date) pairs that already have an attendance record.
+
+    When shift_id is given the roster only holds employees resolved to that shift
+    (DEFAULT_SHIFT_KEY selects employees without any shift).
+    """
+    # Fetch all shifts to map ID -> Shift Type
+    shifts = await repo.shifts.find().to_list(length=None)
+    shift_map = {str(s["_id"]): s for s in shifts}
+
+    departments = await repo.departments.find({}, {"name": 1, "default_shift_id": 1}).to_list(length=None)
+    dept_default_shifts = {
+        d.get("name"): d.get("default_shift_id")
+        for d in departments
+        if d.get("default_shift_id")
+    }
+
+    # Roster from the shared employee directory (copies, safe to annotate)
+    await repo.directory.ensure_fresh()
+    employees = repo.directory.all()
+
+    for emp in employees:
+        emp["resolved_shift_id"] = _resolve_shift_id(emp, shift_map, dept_default_shifts)
+
+    if shift_id:
+        wanted = None if shift_id == DEFAULT_SHIFT_KEY else shift_id
+        employees = [emp for emp in employees if emp["resolved_shift_id"] == wanted]
+
+    holidays = await work_calendar.holidays_between(start_date, end_date)
+    holiday_map = {h.get("date"): h.get("name") for h in holidays}
+
+    # Map (employee_id, date) -> approved leave day
+    leave_map = await repo.get_leave_days_map(start_date, end_date)
+
+    # Fetch existing attendance records for the range
+    existing_records = await repo.attendance.find(
+        {"date": {"$gte": start_date, "$lte": end_date}},
+        {"employee_id": 1, "date": 1},
+    ).to_list(length=None)
+    existing_keys = {
+        (str(r.get("employee_id")), r.get("date"))
+        for r in existing_records
+        if r.get("employee_id")
+    }
+
+    return {
+        "employees": employees,
+        "shift_map": shift_map,
+        "holiday_map": holiday_map,
+        "leave_map": leave_map,
+        "existing_keys": existing_keys,
+    }
+
+
+def _build_records_for_date(
+    ctx: dict,
+    target_date: str,
+    preplanned_only: bool = False,
+    shift_type_filter: str = None,
+) -> list:
+    """Computes the missing attendance records for one date from a preloaded context."""
+    shift_map = ctx["shift_map"]
+    existing_keys = ctx["existing_keys"]
+    leave_map = ctx["leave_map"]
+    holiday_name = ctx["holiday_map"].get(target_date)
+
+    is_sunday = is_weekend(target_date)
+
+    records_to_insert = []
+
+    for emp in ctx["employees"]:
+        emp_no_id = str(emp.get("employee_no_id"))
+        emp_mongo_id = str(emp.get("id"))
+
+        # --- SHIFT FILTERING START ---
+        if shift_type_filter:
+            emp_shift_id = emp.get("resolved_shift_id")
+            is_night_shift = False # Default to Day
+
+            # Assigned shift or department default
+            if emp_shift_id:
+                is_night_shift = shift_map[emp_shift_id].get("is_night_shift", False)
+
+            # Filter Logic
+            if shift_type_filter == "Day" and is_night_shift:
+                continue # Skip Night shift employees in Day job
+
+            if shift_type_filter == "Night" and not is_night_shift:
+                continue # Skip Day shift employees in Night job
+        # --- SHIFT FILTERING END ---
+
+        # Skip if employee already has an attendance record for this date
+        # Check BOTH ID formats to prevent duplicates
+        if (emp_no_id, target_date) in existing_keys or (emp_mongo_id, target_date) in existing_keys:
+            continue
+
+        # Determine status and notes
+        status = None
+        notes  = None
+        leave_type_code    = None
+        attendance_status  = None
+        is_half_day        = False
+
+        leave_info = leave_map.get((emp_mongo_id, target_date)) or leave_map.get((emp_no_id, target_date))
+
+        if holiday_name:
+            # Company-wide holiday
+            status           = "Holiday"
+            attendance_status = "Holiday"
+            notes            = holiday_name
+        elif is_sunday:
+            # Sunday (weekend)
+            status           = "Holiday"
+            attendance_status = "Holiday"
+            notes            = "Sunday"
+        elif leave_info:
+            # Employee on approved leave
+            duration_type = leave_info.get("leave_duration_type", "Single")
+            leave_type_code = leave_info.get("leave_type_code")
+
+            if duration_type == "Half Day":
+                status           = "Leave"
+                attendance_status = "Half Day"
+                is_half_day      = True
+                notes            = leave_info.get("reason", "Half Day Leave")
+            else:
+                status           = "Leave"
+                attendance_status = leave_type_code or "Leave"
+                notes            = leave_info.get("reason", "On Leave")
+        else:
+            # Employee was absent
+            if preplanned_only:
+                # If we are only looking for pre-planned (Morning job), skip absences
+                continue
+            else:
+                status           = "Absent"
+                attendance_status = "Absent"
+                notes            = "No attendance recorded"
+
+        if status:
+            # Create attendance record using MongoDB ObjectId as the standard employee_id
+            attendance_data = {
+                "employee_id":       emp_mongo_id,
+                "date":              target_date,
+                "status":            status,
+                "attendance_status": attendance_status,
+                "leave_type_code":   leave_type_code,
+                "is_half_day":       is_half_day,
+                "notes":             notes,
+                "clock_in":          None,
+                "clock_out":         None,
+                "total_work_hours":  0.0,
+                "overtime_hours":    0.0,
+                "device_type":       "Auto Sync",
+                "created_at":        datetime.utcnow()
+            }
+
+            records_to_insert.append(attendance_data)
+
+    return records_to_insert
+
+
+async def _write_records(records: list) -> int:
+    """
+    Upserts generated records in chunks keyed on (employee_id, date).
+    $setOnInsert never overwrites a record that appeared meanwhile (e.g. a clock-in).
+    """
+    records_created = 0
+    for i in range(0, len(records), BULK_WRITE_CHUNK_SIZE):
+        chunk = records[i:i + BULK_WRITE_CHUNK_SIZE]
+        operations = [
+            UpdateOne(
+                {"employee_id": rec["employee_id"], "date": rec["date"]},
+                {"$setOnInsert": rec},
+                upsert=True,
+            )
+            for rec in chunk
+        ]
+        result = await repo.attendance.bulk_write(operations, ordered=False)
+        records_created += result.upserted_count
+
+    if records_created:
+        await invalidate_dashboard("attendance")
+        await sync_attendance_days({(rec["employee_id"], rec["date"]) for rec in records})
+    return records_created
+
+
+async def generate_attendance_for_date(
+    target_date: str = None,
+    preplanned_only: bool = False,
+    shift_type_filter: str = None,
+    shift_id: str = None,
+) -> dict:
     """
     Generate attendance records for a specific date.
     Creates Absent, Holiday, or Leave records for employees who didn't clock in.
@@ -18,9 +259,12 @@ async def generate_attendance_for_date(target_date: str = None, preplanned_only:
         shift_type_filter: "Day" or "Night". If provided, only processes employees in that shift type.
                            If None, processes all employees.
                            "Day" includes employees with no assigned shift (default).
+        shift_id: If provided, only processes employees resolved to this shift (personal or
+                  department default). DEFAULT_SHIFT_KEY selects employees without a shift.
     """
     try:
-        today_str = datetime.utcnow().strftime("%Y-%m-%d")
+        # Work dates are IST dates, so "future" is judged against today in IST
+        today_str = _ist_today()
 
         # Default definition logic
         if not target_date:
@@ -30,7 +274,7 @@ async def generate_attendance_for_date(target_date: str = None, preplanned_only:
             else:
                 # If full run (end of day job), default to YESTERDAY (safe default)
                 # But typically the scheduler will pass 'today' for the night job.
-                yesterday = datetime.utcnow() - timedelta(days=1)
+                yesterday = datetime.strptime(today_str, "%Y-%m-%d") - timedelta(days=1)
                 target_date = yesterday.strftime("%Y-%m-%d")
         
         # Don't generate records for future dates
@@ -38,164 +282,14 @@ async def generate_attendance_for_date(target_date: str = None, preplanned_only:
             logger.info(f"Skipping future date: {target_date}")
             return {"success": False, "message": "Cannot generate records for future dates"}
         
-        logger.info(f"Generating attendance for {target_date} (Preplanned: {preplanned_only}, Shift: {shift_type_filter})")
-        
-        # Fetch all employees
-        employees = await repo.employees.find().to_list(length=None)
-        
-        # Fetch all shifts to map ID -> Shift Type
-        shifts = await repo.shifts.find().to_list(length=None)
-        shift_map = {str(s["_id"]): s for s in shifts}
-        
-        # Fetch existing attendance records for this date
-        existing_records = await repo.attendance.find({"date": target_date}).to_list(length=None)
-        existing_employee_ids = set()
-        for r in existing_records:
-            # Add both possible ID formats to the set to be safe
-            if r.get("employee_id"):
-                existing_employee_ids.add(str(r.get("employee_id")))
-        
-        # Check if this date is a holiday
-        holiday = await repo.holidays.find_one({"date": target_date})
-        holiday_name = holiday.get("name") if holiday else None
-        
-        # Fetch all approved leaves that overlap with this date
-        approved_leaves = await repo.leave_requests.find({
-            "status": "Approved",
-            "start_date": {"$lte": target_date},
-            "end_date": {"$gte": target_date}
-        }).to_list(length=None)
-        
-        # Create a map of employee_id -> leave info
-        # Map both ObjectId and Employee No if possible
-        leave_map = {}
-        for leave in approved_leaves:
-            emp_id_str = str(leave.get("employee_id"))
-
-            # Fetch leave type code
-            leave_type_code = None
-            leave_type_id = leave.get("leave_type_id")
-            if leave_type_id:
-                try:
-                    from bson import ObjectId as _ObjId
-                    lt = await repo.leave_types.find_one({"_id": _ObjId(leave_type_id)})
-                    if lt:
-                        leave_type_code = lt.get("code")
-                except Exception:
-                    pass
-
-            leave_map[emp_id_str] = {
-                "reason":             leave.get("reason", "On Leave"),
-                "leave_type_code":    leave_type_code,
-                "leave_duration_type": leave.get("leave_duration_type", "Single"),
-                "half_day_session":   leave.get("half_day_session"),
-            }
+        logger.info(f"Generating attendance for {target_date} (Preplanned: {preplanned_only}, Shift: {shift_type_filter or shift_id})")
 
-        
-        # Parse date to check if it's a weekend
-        dt_parsed = datetime.strptime(target_date, "%Y-%m-%d")
-        is_sunday = dt_parsed.weekday() == 6
-        
-        records_created = 0
-        records_to_insert = []
-        
-        for emp in employees:
-            emp_no_id = str(emp.get("employee_no_id"))
-            emp_mongo_id = str(emp.get("_id"))
-            
-            # --- SHIFT FILTERING START ---
-            if shift_type_filter:
-                emp_shift_id = emp.get("shift_id")
-                is_night_shift = False # Default to Day
-                
-                # Check assigned shift
-                if emp_shift_id and emp_shift_id in shift_map:
-                    is_night_shift = shift_map[emp_shift_id].get("is_night_shift", False)
-                elif emp.get("department"):
-                     # Fallback to Dept Default
-                     pass 
-
-                # Filter Logic
-                if shift_type_filter == "Day" and is_night_shift:
-                    continue # Skip Night shift employees in Day job
-                
-                if shift_type_filter == "Night" and not is_night_shift:
-                    continue # Skip Day shift employees in Night job
-            # --- SHIFT FILTERING END ---
-            
-            # Skip if employee already has an attendance record for this date
-            # Check BOTH ID formats to prevent duplicates
-            if emp_no_id in existing_employee_ids or emp_mongo_id in existing_employee_ids:
-                continue
-            
-            # Determine status and notes
-            status = None
-            notes  = None
-            leave_type_code    = None
-            attendance_status  = None
-            is_half_day        = False
-            
-            leave_info = leave_map.get(emp_mongo_id) or leave_map.get(emp_no_id)
-
-            if holiday_name:
-                # Company-wide holiday
-                status           = "Holiday"
-                attendance_status = "Holiday"
-                notes            = holiday_name
-            elif is_sunday:
-                # Sunday (weekend)
-                status           = "Holiday"
-                attendance_status = "Holiday"
-                notes            = "Sunday"
-            elif leave_info:
-                # Employee on approved leave
-                duration_type = leave_info.get("leave_duration_type", "Single")
-                leave_type_code = leave_info.get("leave_type_code")
-
-                if duration_type == "Half Day":
-                    status           = "Leave"
-                    attendance_status = "Half Day"
-                    is_half_day      = True
-                    notes            = leave_info.get("reason", "Half Day Leave")
-                else:
-                    status           = "Leave"
-                    attendance_status = leave_type_code or "Leave"
-                    notes            = leave_info.get("reason", "On Leave")
-            else:
-                # Employee was absent
-                if preplanned_only:
-                    # If we are only looking for pre-planned (Morning job), skip absences
-                    continue
-                else:
-                    status           = "Absent"
-                    attendance_status = "Absent"
-                    notes            = "No attendance recorded"
-            
-            if status:
-                # Create attendance record using MongoDB ObjectId as the standard employee_id
-                attendance_data = {
-                    "employee_id":       emp_mongo_id,
-                    "date":              target_date,
-                    "status":            status,
-                    "attendance_status": attendance_status,
-                    "leave_type_code":   leave_type_code,
-                    "is_half_day":       is_half_day,
-                    "notes":             notes,
-                    "clock_in":          None,
-                    "clock_out":         None,
-                    "total_work_hours":  0.0,
-                    "overtime_hours":    0.0,
-                    "device_type":       "Auto Sync",
-                    "created_at":        datetime.utcnow()
-                }
-                
-                records_to_insert.append(attendance_data)
+        ctx = await _load_generation_context(target_date, target_date, shift_id)
+        records_to_insert = _build_records_for_date(ctx, target_date, preplanned_only, shift_type_filter)
 
-        
-        # Bulk insert records
+        records_created = 0
         if records_to_insert:
-            result = await repo.attendance.insert_many(records_to_insert)
-            records_created = len(result.inserted_ids)
+            records_created = await _write_records(records_to_insert)
             logger.info(f"Created {records_created} attendance records for {target_date}")
         else:
             logger.info(f"No new attendance records needed for {target_date}")
@@ -203,6 +297,10 @@ async def generate_attendance_for_date(target_date: str = None, preplanned_only:
         return {
             "success": True,
             "date": target_date,
+            "preplanned_only": preplanned_only,
+            "shift_type_filter": shift_type_filter,
+            "shift_id": shift_id,
+            "employees_scanned": len(ctx["employees"]),
             "records_created": records_created,
             "message": f"Generated {records_created} attendance records for {target_date}"
         }
@@ -214,6 +312,87 @@ async def generate_attendance_for_date(target_date: str = None, preplanned_only:
             "message": f"Error: {str(e)}"
         }
 
+
+async def generate_attendance_for_range(
+    start_date: str,
+    end_date: str,
+    preplanned_only: bool = False,
+    shift_type_filter: str = None,
+    concurrency: int = 1,
+) -> dict:
+    """
+    Backfill attendance records for every date from start_date to end_date (inclusive).
+    Roster, shifts, holidays, leaves and existing records are loaded once for the whole
+    range; missing records are computed in memory and written with chunked bulk upserts.
+
+    Args:
+        start_date: First date in YYYY-MM-DD format.
+        end_date: Last date in YYYY-MM-DD format. Future dates are clamped to today.
+        preplanned_only: If True, only generates Holiday and Leave records (skips Absent).
+        shift_type_filter: "Day" or "Night", same semantics as generate_attendance_for_date.
+        concurrency: Number of dates written in parallel.
+    """
+    try:
+        today_str = _ist_today()
+
+        try:
+            datetime.strptime(start_date, "%Y-%m-%d")
+            datetime.strptime(end_date, "%Y-%m-%d")
+        except (TypeError, ValueError):
+            return {"success": False, "message": "start_date and end_date must be in YYYY-MM-DD format"}
+
+        if start_date > end_date:
+            return {"success": False, "message": "start_date must be on or before end_date"}
+
+        if start_date > today_str:
+            return {"success": False, "message": "Cannot generate records for future dates"}
+
+        # Don't generate records for future dates
+        end_date = min(end_date, today_str)
+
+        dates = list(_daterange(start_date, end_date))
+        if len(dates) > MAX_BACKFILL_DAYS:
+            return {"success": False, "message": f"Date range cannot exceed {MAX_BACKFILL_DAYS} days"}
+
+        logger.info(f"Backfilling attendance from {start_date} to {end_date} (Preplanned: {preplanned_only}, Shift: {shift_type_filter}, Concurrency: {concurrency})")
+
+        ctx = await _load_generation_context(start_date, end_date)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def _process_date(day: str) -> dict:
+            async with semaphore:
+                records = _build_records_for_date(ctx, day, preplanned_only, shift_type_filter)
+                by_status = {}
+                for rec in records:
+                    by_status[rec["status"]] = by_status.get(rec["status"], 0) + 1
+                created = await _write_records(records) if records else 0
+                return {"date": day, "records_created": created, "by_status": by_status}
+
+        per_date = await asyncio.gather(*[_process_date(day) for day in dates])
+        records_created = sum(r["records_created"] for r in per_date)
+
+        logger.info(f"Backfill created {records_created} attendance records across {len(dates)} days")
+
+        return {
+            "success": True,
+            "start_date": start_date,
+            "end_date": end_date,
+            "days": len(dates),
+            "preplanned_only": preplanned_only,
+            "shift_type_filter": shift_type_filter,
+            "employees_scanned": len(ctx["employees"]),
+            "records_created": records_created,
+            "per_date": per_date,
+            "message": f"Generated {records_created} attendance records from {start_date} to {end_date}"
+        }
+
+    except Exception as e:
+        logger.error(f"Error backfilling attendance records: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Error: {str(e)}"
+        }
+
 async def generate_today_preplanned_records():
     """
     Morning job (12:05 AM IST) to generate Leave & Holiday records for the starting day.
@@ -221,8 +400,7 @@ async def generate_today_preplanned_records():
     """
     try:
         # Calculate current date in IST (UTC + 5:30)
-        ist_now = datetime.utcnow() + timedelta(hours=5, minutes=30)
-        today_str = ist_now.strftime("%Y-%m-%d")
+        today_str = _ist_today()
         
         logger.info(f"Starting morning pre-planned attendance generation for {today_str} (IST)")
         return await generate_attendance_for_date(today_str, preplanned_only=True)
@@ -230,33 +408,45 @@ async def generate_today_preplanned_records():
         logger.error(f"Morning pre-planned generation failed: {str(e)}")
         return {"success": False, "message": str(e)}
 
-async def generate_daily_attendance_records():
+def _minutes(hhmm: str, default: str) -> int:
+    try:
+        hours, minutes = map(int, (hhmm or default).split(":"))
+    except ValueError:
+        hours, minutes = map(int, default.split(":"))
+    return hours * 60 + minutes
+
+
+def get_shift_work_date(start_time: str, now_ist: datetime = None) -> str:
     """
-    Night job (11:57 PM IST) to generate Missing records for DAY SHIFT employees.
+    The date a shift that started at start_time (IST) belongs to, seen from now_ist.
+    Called after the shift has ended, so a night shift resolves to the day it started.
     """
-    try:
-        ist_now = datetime.utcnow() + timedelta(hours=5, minutes=30)
-        today_str = ist_now.strftime("%Y-%m-%d")
-        
-        logger.info(f"Starting Day Shift attendance generation for {today_str}")
-        return await generate_attendance_for_date(today_str, preplanned_only=False, shift_type_filter="Day")
-    except Exception as e:
-        logger.error(f"Daily Day Shift job failed: {str(e)}")
-        return {"success": False, "message": str(e)}
+    now_ist = now_ist or (datetime.utcnow() + IST_OFFSET)
+    now_minutes = now_ist.hour * 60 + now_ist.minute
+    elapsed = (now_minutes - _minutes(start_time, "09:00")) % (24 * 60)
+    return (now_ist - timedelta(minutes=elapsed)).strftime("%Y-%m-%d")
 
-async def generate_night_shift_attendance_records():
+
+async def generate_shift_attendance_records(shift_id: str):
     """
-    Morning job (08:00 AM IST) to generate Missing records for NIGHT SHIFT employees (for Previous Day).
+    Per-shift job, scheduled shortly after the shift's end_time. Generates missing
+    records (Absent/Leave/Holiday) only for employees resolved to this shift.
+    DEFAULT_SHIFT_KEY covers employees without a shift, using the work_start_time setting.
     """
     try:
-        ist_now = datetime.utcnow() + timedelta(hours=5, minutes=30)
-        # For Night Shift, "Absent" is determined the NEXT morning.
-        # So we are looking for records from YESTERDAY.
-        yesterday_dt = ist_now - timedelta(days=1)
-        yesterday_str = yesterday_dt.strftime("%Y-%m-%d")
-        
-        logger.info(f"Starting Night Shift attendance generation for {yesterday_str}")
-        return await generate_attendance_for_date(yesterday_str, preplanned_only=False, shift_type_filter="Night")
+        if shift_id == DEFAULT_SHIFT_KEY:
+            config = await repo.system_configurations.find_one({"key": "work_start_time"})
+            start_time = config.get("value", "09:00") if config else "09:00"
+        else:
+            shift = await repo.shifts.find_one({"_id": ObjectId(shift_id)})
+            if not shift:
+                return {"success": False, "shift_id": shift_id, "message": "Shift not found"}
+            start_time = shift.get("start_time", "09:00")
+
+        work_date = get_shift_work_date(start_time)
+
+        logger.info(f"Starting shift {shift_id} attendance generation for {work_date}")
+        return await generate_attendance_for_date(work_date, preplanned_only=False, shift_id=shift_id)
     except Exception as e:
-        logger.error(f"Daily Night Shift job failed: {str(e)}")
+        logger.error(f"Shift {shift_id} attendance job failed: {str(e)}")
         return {"success": False, "message": str(e)}
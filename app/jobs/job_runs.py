@@ -0,0 +1,74 @@
+from datetime import datetime
+from functools import wraps
+from app.crud.repository import repository as repo
+from app.jobs.leader import INSTANCE_ID
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def run_tracked(job_id: str, job_func, *args, trigger: str = "scheduled", **kwargs) -> dict:
+    """
+    Runs a job and records the run in the `job_runs` ledger.
+    The job's own result dict is returned unchanged (plus the ledger run id).
+    """
+    started_at = datetime.utcnow()
+    start = time.perf_counter()
+    result = None
+    errors = []
+
+    try:
+        result = await job_func(*args, **kwargs)
+    except Exception as e:
+        errors.append(str(e))
+        result = {"success": False, "message": str(e)}
+
+    duration_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    if not isinstance(result, dict):
+        result = {"success": bool(result)}
+    if not result.get("success") and not errors:
+        errors.append(result.get("message") or "Job reported failure")
+
+    run_data = {
+        "job_id": job_id,
+        "trigger": trigger,
+        "instance_id": INSTANCE_ID,
+        "target_date": result.get("date") or result.get("start_date"),
+        "end_date": result.get("end_date"),
+        "shift_filter": result.get("shift_type_filter") or result.get("shift_id"),
+        "preplanned_only": result.get("preplanned_only"),
+        "started_at": started_at,
+        "duration_ms": duration_ms,
+        "employees_scanned": result.get("employees_scanned", 0),
+        "records_created": result.get("records_created", 0),
+        "success": bool(result.get("success")),
+        "errors": errors,
+    }
+
+    try:
+        run = await repo.create_job_run(run_data)
+        result["run_id"] = run.get("id")
+    except Exception as e:
+        # The ledger must never break the job itself
+        logger.error(f"Failed to record job run for {job_id}: {str(e)}")
+
+    logger.info(
+        f"Job {job_id} finished in {duration_ms}ms "
+        f"(records created: {run_data['records_created']}, success: {run_data['success']})"
+    )
+    return result
+
+
+def tracked(job_id: str):
+    """Decorator form of run_tracked for scheduled jobs."""
+
+    def decorator(job_func):
+        @wraps(job_func)
+        async def wrapper(*args, **kwargs):
+            return await run_tracked(job_id, job_func, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+from functools import wraps
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.database import db
+from app.cookies.cookies import get_manager
+from app.core.config import SCHEDULER_LEASE_SECONDS
+import os
+import socket
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "scheduler_leader"
+
+# Unique per process: every uvicorn worker gets its own identity
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class LeaderElector:
+    """
+    Lease-based leader election so that only one worker fires scheduled jobs.
+
+    The lease lives in Redis (through CookiesManager) when Redis is configured,
+    otherwise in a Mongo lock document. The holder renews it on every heartbeat;
+    if the holder dies the lease expires and the next heartbeat of another
+    worker takes over.
+    """
+
+    def __init__(self, name: str = LEASE_NAME, lease_seconds: int = SCHEDULER_LEASE_SECONDS):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.instance_id = INSTANCE_ID
+        self.is_leader = False
+        self.locks = db["scheduler_locks"]
+
+    async def _acquire_redis(self, manager) -> bool:
+        return await manager.acquire_lock(
+            f"lock:{self.name}", self.instance_id, self.lease_seconds * 1000
+        )
+
+    async def _acquire_mongo(self) -> bool:
+        now = datetime.utcnow()
+        try:
+            await self.locks.find_one_and_update(
+                {
+                    "_id": self.name,
+                    "$or": [
+                        {"holder": self.instance_id},
+                        {"expires_at": {"$lt": now}},
+                    ],
+                },
+                {
+                    "$set": {
+                        "holder": self.instance_id,
+                        "expires_at": now + timedelta(seconds=self.lease_seconds),
+                        "renewed_at": now,
+                    }
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            return True
+        except DuplicateKeyError:
+            # Another live instance holds the lease
+            return False
+
+    async def heartbeat(self) -> bool:
+        """Acquires or renews the lease. Returns True if this instance is the leader."""
+        try:
+            manager = get_manager()
+            if manager.redis is not None:
+                leader = await self._acquire_redis(manager)
+            else:
+                leader = await self._acquire_mongo()
+        except Exception as e:
+            logger.error(f"Leader heartbeat failed: {str(e)}")
+            leader = False
+
+        if leader != self.is_leader:
+            logger.info(
+                f"Instance {self.instance_id} {'acquired' if leader else 'lost'} scheduler leadership"
+            )
+        self.is_leader = leader
+        return leader
+
+    async def release(self):
+        """Gives up the lease on shutdown so another worker can take over immediately."""
+        if not self.is_leader:
+            return
+        try:
+            manager = get_manager()
+            if manager.redis is not None:
+                await manager.release_lock(f"lock:{self.name}", self.instance_id)
+            else:
+                await self.locks.delete_one({"_id": self.name, "holder": self.instance_id})
+            logger.info(f"Instance {self.instance_id} released scheduler leadership")
+        except Exception as e:
+            logger.error(f"Failed to release scheduler leadership: {str(e)}")
+        finally:
+            self.is_leader = False
+
+
+elector = LeaderElector()
+
+
+def leader_only(job_func):
+    """
+    Wraps a scheduled job so it only runs on the current leader.
+    The lease is re-checked right before running and the result is tagged
+    with the executing instance.
+    """
+
+    @wraps(job_func)
+    async def wrapper(*args, **kwargs):
+        if not await elector.heartbeat():
+            logger.info(f"Skipping {job_func.__name__}: instance {INSTANCE_ID} is not the leader")
+            return {"success": False, "skipped": True, "instance_id": INSTANCE_ID}
+
+        logger.info(f"Running {job_func.__name__} on instance {INSTANCE_ID}")
+        result = await job_func(*args, **kwargs)
+        if isinstance(result, dict):
+            result["instance_id"] = INSTANCE_ID
+        return result
+
+    return wrapper
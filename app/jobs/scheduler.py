@@ -1,10 +1,16 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from app.jobs.attendance_jobs import (
-    generate_daily_attendance_records,
+    DEFAULT_SHIFT_KEY,
     generate_today_preplanned_records,
-    generate_night_shift_attendance_records,
+    generate_shift_attendance_records,
 )
+from app.jobs.leader import elector, leader_only
+from app.jobs.job_runs import tracked
+from app.crud.repository import repository as repo
+from app.core.config import ABSENCE_GRACE_MINUTES
+from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,6 +18,11 @@ logger = logging.getLogger(__name__)
 # Global scheduler instance
 scheduler = None
 
+SHIFT_JOB_PREFIX = "shift_absence_"
+
+# job_id -> "HH:MM" fire time (IST) of the per-shift absence jobs currently scheduled
+_shift_job_times = {}
+
 def init_scheduler():
     """
     Initialize and start the background job scheduler.
@@ -28,37 +39,41 @@ def init_scheduler():
     # Create AsyncIOScheduler for non-blocking execution
     scheduler = AsyncIOScheduler()
     
+    # Every worker runs a scheduler, but jobs only fire on the lease holder.
+    # The heartbeat keeps the lease renewed and lets another worker take over
+    # once the current leader stops renewing it.
+    scheduler.add_job(
+        elector.heartbeat,
+        trigger=IntervalTrigger(seconds=max(1, elector.lease_seconds // 3)),
+        id="scheduler_leader_heartbeat",
+        name="Scheduler Leader Election Heartbeat",
+        next_run_time=datetime.now(),
+        replace_existing=True
+    )
+    
     # 1. Morning Job: Generate Pre-planned Attendance (Leaves & Holidays)
     # Runs at 06:35 PM UTC (12:05 AM IST)
     scheduler.add_job(
-        generate_today_preplanned_records,
+        leader_only(tracked("daily_preplanned_attendance")(generate_today_preplanned_records)),
         trigger=CronTrigger(hour=18, minute=35),
         id="daily_preplanned_attendance",
         name="Generate Pre-planned Attendance (Leaves/Holidays)",
         replace_existing=True
     )
     
-    # 2. Night Job: Generate Full Attendance (Absences)
-    # Runs at 06:27 PM UTC (11:57 PM IST)
+    # 2. Per-shift Absence Jobs: one per shift, fired at the shift's end_time plus grace.
+    # Shifts are read from the database, so the jobs are (re)built by an async sync job
+    # that runs on every worker at startup and periodically to pick up shift changes.
     scheduler.add_job(
-        generate_daily_attendance_records,
-        trigger=CronTrigger(hour=18, minute=27),
-        id="daily_full_attendance",
-        name="Generate Daily Attendance Records (Absences)",
+        sync_shift_jobs,
+        trigger=IntervalTrigger(minutes=10),
+        id="shift_absence_schedule_sync",
+        name="Sync Per-shift Absence Jobs",
+        next_run_time=datetime.now(),
         replace_existing=True
     )
     
-    # 3. Night Shift Job: Generate Full Attendance for Night Shift (Mark Absent for Previous Night)
-    # Runs at 02:30 AM UTC (08:00 AM IST)
-    scheduler.add_job(
-        generate_night_shift_attendance_records,
-        trigger=CronTrigger(hour=2, minute=30),
-        id="night_shift_full_attendance",
-        name="Generate Night Shift Attendance (Absences)",
-        replace_existing=True
-    )
-    
-    logger.info("Scheduled jobs: Pre-planned at 12:05 AM IST, Day Full at 11:57 PM IST, Night Full at 08:00 AM IST")
+    logger.info(f"Scheduled jobs: Pre-planned at 12:05 AM IST, Absences per shift at end time + {ABSENCE_GRACE_MINUTES} min")
     
     # Start the scheduler
     scheduler.start()
@@ -67,6 +82,66 @@ def init_scheduler():
     return scheduler
 
 
+def _absence_fire_time(end_time: str) -> str:
+    """Shift end_time (HH:MM, IST) plus the absence grace period, wrapped past midnight."""
+    hours, minutes = map(int, end_time.split(":"))
+    total = (hours * 60 + minutes + ABSENCE_GRACE_MINUTES) % (24 * 60)
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+async def sync_shift_jobs():
+    """
+    Adds, reschedules or removes the per-shift absence jobs so they match the shifts
+    collection. Employees without any shift get a job based on the work_end_time setting.
+    """
+    if scheduler is None:
+        return
+
+    try:
+        shifts = await repo.shifts.find({}, {"name": 1, "end_time": 1}).to_list(length=None)
+        config = await repo.system_configurations.find_one({"key": "work_end_time"})
+
+        targets = {
+            DEFAULT_SHIFT_KEY: ("Default", config.get("value", "18:00") if config else "18:00")
+        }
+        for shift in shifts:
+            targets[str(shift["_id"])] = (shift.get("name"), shift.get("end_time"))
+
+        wanted = set()
+        for shift_id, (shift_name, end_time) in targets.items():
+            job_id = f"{SHIFT_JOB_PREFIX}{shift_id}"
+            try:
+                fire_time = _absence_fire_time(end_time)
+            except (AttributeError, ValueError):
+                logger.warning(f"Shift {shift_id} has an invalid end_time: {end_time}")
+                continue
+
+            wanted.add(job_id)
+            if _shift_job_times.get(job_id) == fire_time and scheduler.get_job(job_id):
+                continue
+
+            hour, minute = map(int, fire_time.split(":"))
+            scheduler.add_job(
+                leader_only(tracked(job_id)(generate_shift_attendance_records)),
+                trigger=CronTrigger(hour=hour, minute=minute, timezone="Asia/Kolkata"),
+                args=[shift_id],
+                id=job_id,
+                name=f"Generate Shift Attendance (Absences): {shift_name}",
+                replace_existing=True
+            )
+            _shift_job_times[job_id] = fire_time
+            logger.info(f"Scheduled absence job for shift {shift_name} at {fire_time} IST")
+
+        for job_id in list(_shift_job_times):
+            if job_id not in wanted:
+                if scheduler.get_job(job_id):
+                    scheduler.remove_job(job_id)
+                del _shift_job_times[job_id]
+                logger.info(f"Removed absence job {job_id}")
+    except Exception as e:
+        logger.error(f"Failed to sync per-shift absence jobs: {str(e)}")
+
+
 def shutdown_scheduler():
     """
     Gracefully shutdown the scheduler.
@@ -78,6 +153,7 @@ def shutdown_scheduler():
         logger.info("Shutting down background job scheduler")
         scheduler.shutdown(wait=True)
         scheduler = None
+        _shift_job_times.clear()
         logger.info("Scheduler shutdown complete")
     else:
         logger.warning("Scheduler not running, nothing to shutdown")
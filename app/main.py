@@ -35,11 +35,14 @@ from app.routes import (
     feedback,
     shifts,
     milestone_roadmap,
+    jobs,
 )
 
 from app.jobs.scheduler import init_scheduler, shutdown_scheduler
+from app.jobs.leader import elector
 import logging
 from app.cookies.cookies import get_manager
+from app.crud.repository import repository as repo
 
 logger = logging.getLogger(__name__)
 
@@ -65,16 +68,22 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Failed to initialize scheduler: {str(e)}")
 
+    try:
+        await repo.ensure_indexes()
+    except Exception as e:
+        logger.error(f"Failed to create database indexes: {str(e)}")
+
 
 # Application shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Gracefully shutdown background jobs"""
     try:
-        manager = get_manager()
-        await manager.close_redis()
         logger.info("Application shutting down...")
         shutdown_scheduler()
+        await elector.release()
+        manager = get_manager()
+        await manager.close_redis()
         logger.info("Background scheduler stopped successfully")
     except Exception as e:
         logger.error(f"Error during scheduler shutdown: {str(e)}")
@@ -128,6 +137,7 @@ api_router.include_router(payslip_component.router)
 api_router.include_router(feedback.router)
 api_router.include_router(shifts.router)
 api_router.include_router(milestone_roadmap.router)
+api_router.include_router(jobs.router)
 
 
 app.include_router(api_router)
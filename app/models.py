@@ -694,6 +694,12 @@ class LeaveRequestStatusUpdate(BaseModel):
     rejection_reason: Optional[str] = None
 
 
+class LeaveRequestBulkStatusUpdate(BaseModel):
+    leave_request_ids: List[str]
+    status: str  # "Approved" or "Rejected"
+    rejection_reason: Optional[str] = None
+
+
 class LeaveRequestResponse(LeaveRequestBase):
     id: str
     employee_details: Optional[dict] = None
@@ -724,6 +730,7 @@ class TaskBase(BaseModel):
     tags: List[str] = []
     status: str = "Todo"
     progress: float = 0.0
+    milestone_id: Optional[str] = None
     last_rollover_date: Optional[str] = None
     is_overdue_moved: bool = False
 
@@ -746,6 +753,7 @@ class TaskUpdate(BaseModel):
     tags: Optional[List[str]] = None
     status: Optional[str] = None
     progress: Optional[float] = None
+    milestone_id: Optional[str] = None
     is_overdue_moved: Optional[bool] = None
 
 
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from app.crud.repository import repository as repo
 from app.models import (
     AttendanceCreate,
@@ -9,6 +9,10 @@ from app.models import (
 )
 from typing import Optional
 from app.auth import verify_token, get_current_user
+from app.helper.dashboard_cache import invalidate_dashboard
+from app.helper.employee_summary import apply_attendance_records, sync_attendance_days
+from app.helper.live_events import attendance_event_stream
+from app.cookies.cookies import get_manager
 import pandas as pd
 import io
 from datetime import datetime
@@ -28,6 +32,8 @@ async def clock_in(
             employee_id = current_user.get("id")
 
         result = await repo.clock_in(attendance, employee_id)
+        await invalidate_dashboard("attendance")
+        await apply_attendance_records([result])
         metrics = await repo.get_dashboard_metrics(employee_id=result.get("employee_id"))
         return JSONResponse(
             status_code=201,
@@ -63,6 +69,8 @@ async def clock_out(
         clock_out_date = attendance.clock_out.split("T")[0]
 
         result = await repo.clock_out(attendance, employee_id, clock_out_date)
+        await invalidate_dashboard("attendance")
+        await apply_attendance_records([result])
         metrics = await repo.get_dashboard_metrics(employee_id=result.get("employee_id"))
         return JSONResponse(
             status_code=200,
@@ -136,6 +144,32 @@ async def get_all_attendance(
 
 
 
+@router.get("/stream", dependencies=[Depends(verify_token)])
+async def stream_attendance_events(
+    request: Request, current_user: dict = Depends(get_current_user)
+):
+    """
+    Admin-only: server-sent events with live attendance deltas (clock_in, clock_out,
+    leave_approved, leave_revoked) and the day's counters after each change.
+    """
+    if current_user.get("role") != "admin":
+        return JSONResponse(
+            status_code=403,
+            content={"message": "Only admins can stream attendance events", "success": False},
+        )
+    if get_manager().redis is None:
+        return JSONResponse(
+            status_code=503,
+            content={"message": "Live attendance events require Redis", "success": False},
+        )
+
+    return StreamingResponse(
+        attendance_event_stream(request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.put("/edit/{attendance_id}", dependencies=[Depends(verify_token)])
 async def edit_attendance(
     attendance_id: str,
@@ -151,6 +185,8 @@ async def edit_attendance(
             )
 
         result = await repo.edit_attendance_record(attendance_id, payload)
+        await invalidate_dashboard("attendance")
+        await apply_attendance_records([result])
         return JSONResponse(
             status_code=200,
             content={
@@ -170,7 +206,12 @@ async def edit_attendance(
 
 @router.post("/generate-records", dependencies=[Depends(verify_token)])
 async def generate_attendance_records(
-    date: Optional[str] = None, preplanned_only: bool = False
+    date: Optional[str] = None,
+    preplanned_only: bool = False,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    concurrency: int = 1,
+    shift_id: Optional[str] = None,
 ):
     """
     Manual trigger to generate attendance records for a specific date.
@@ -179,14 +220,42 @@ async def generate_attendance_records(
     Args:
         date: Date in YYYY-MM-DD format. Defaults to yesterday.
         preplanned_only: If true, only generates holiday/leave records (no absences).
+        start_date / end_date: Backfill every date in the range (inclusive) in one pass.
+            Takes precedence over `date`; the response includes per-date counts.
+        concurrency: Number of dates written in parallel in range mode.
+        shift_id: Only process employees resolved to this shift ("default" for employees
+            without one). Applies to single-date mode.
     """
     try:
-        from app.jobs.attendance_jobs import generate_attendance_for_date
-
-        result = await generate_attendance_for_date(
-            date, preplanned_only=preplanned_only
+        from app.jobs.attendance_jobs import (
+            generate_attendance_for_date,
+            generate_attendance_for_range,
         )
 
+        from app.jobs.job_runs import run_tracked
+
+        if start_date or end_date:
+            result = await run_tracked(
+                "manual_attendance_backfill",
+                generate_attendance_for_range,
+                start_date or end_date,
+                end_date or start_date,
+                preplanned_only=preplanned_only,
+                concurrency=concurrency,
+                trigger="manual",
+            )
+        else:
+            result = await run_tracked(
+                "manual_attendance_generation",
+                generate_attendance_for_date,
+                date,
+                preplanned_only=preplanned_only,
+                shift_id=shift_id,
+                trigger="manual",
+            )
+
+        await invalidate_dashboard("attendance")
+
         if result.get("success"):
             return JSONResponse(status_code=200, content=result)
         else:
@@ -215,6 +284,8 @@ async def sync_biometric_data(
             )
 
         result = await repo.bulk_sync_biometric_logs(payload.data)
+        await invalidate_dashboard("attendance")
+        await sync_attendance_days(result.pop("attendance_keys"))
 
         return JSONResponse(
             status_code=200,
@@ -258,15 +329,8 @@ async def import_attendance(file: UploadFile = File(...)):
         df = df.dropna(subset=["Employee ID"])
         df = df[df["Employee ID"].astype(str).str.lower() != "total"]
 
-        # Fetch valid employees for validation
-        all_employees = await repo.get_all_employees_summary()
-        # Create map of Biometric ID -> Employee No ID
-        # Only include employees with a biometric_id
-        valid_biometric_map = {
-            str(emp.get("biometric_id")).strip(): str(emp.get("id"))
-            for emp in all_employees
-            if emp.get("biometric_id")
-        }
+        # Valid employees are resolved by Biometric ID through the employee directory
+        await repo.directory.ensure_fresh()
 
         records = []
         skipped_count = 0
@@ -276,12 +340,13 @@ async def import_attendance(file: UploadFile = File(...)):
                 bio_id_input = str(row["Employee ID"]).split(".")[0].strip()
 
                 # VALIDATION: Check if biometric ID exists in our system
-                if bio_id_input not in valid_biometric_map:
+                employee = repo.directory.get_by_biometric_id(bio_id_input)
+                if not employee:
                     skipped_count += 1
                     continue
 
-                # Get the actual system Employee ID (EMPxxx) from the map
-                emp_no_id = valid_biometric_map[bio_id_input]
+                # Get the actual system Employee ID from the directory
+                emp_no_id = employee["id"]
 
                 # Parse Date
                 date_val = row["Date"]
@@ -373,6 +438,8 @@ async def import_attendance(file: UploadFile = File(...)):
             )
 
         result = await repo.bulk_import_attendance(records)
+        await invalidate_dashboard("attendance")
+        await sync_attendance_days({(r["employee_id"], r["date"]) for r in records})
         return JSONResponse(
             status_code=200,
             content={
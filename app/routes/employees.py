@@ -6,6 +6,9 @@ from app.helper.file_handler import file_handler
 from typing import Optional, List
 import json
 from app.auth import verify_token, require_permission
+from app.helper.dashboard_cache import invalidate_dashboard
+from app.helper.employee_summary import refresh_employee_summary, remove_employee_summary
+from app.helper.employee_overview import get_employee_overview, invalidate_employee_overview
 
 router = APIRouter(prefix="/employees", tags=["employees"], dependencies=[Depends(verify_token)])
 
@@ -124,6 +127,8 @@ async def create_employee(
         # But python allows kwargs or defaults. The old signature had default None. 
         # So invoking with 2 args works if I removed the 3rd or if 3rd has default.
         new_employee = await repo.create_employee(employee_data, profile_picture_path=profile_pic_path)
+        await invalidate_dashboard("employees")
+        await refresh_employee_summary(new_employee.get("id"), "profile")
         
         return success_response(
             message="Employee created successfully",
@@ -177,35 +182,11 @@ async def get_employees_summary():
 @router.get("/{employee_id}/summary", dependencies=[Depends(require_permission("employee:view"))])
 async def get_employee_summary_details(employee_id: str):
     try:
-        # 1. Fetch Basic Details
-        employee = await repo.get_employee(employee_id)
-        if not employee:
+        # Employee, leave balances, task metrics, attendance stats, projects and assets
+        summary_data = await get_employee_overview(employee_id)
+        if not summary_data:
              return error_response(message="Employee not found", status_code=404)
 
-        # 2. Fetch Leave Balances
-        leave_summary = await repo.get_employee_leave_balances(employee_id)
-
-        # 3. Fetch Task Metrics
-        task_metrics = await repo.get_employee_task_metrics(employee_id)
-
-        # 4. Fetch Attendance Stats
-        attendance_stats = await repo.get_employee_attendance_stats(employee_id)
-
-        # 5. Fetch Assigned Projects
-        assigned_projects = await repo.get_employee_assigned_projects(employee_id)
-
-        # 6. Fetch Assigned Assets
-        assigned_assets = await repo.get_assets_by_employee(employee_id)
-
-        summary_data = {
-            "employee": employee,
-            "leave_summary": leave_summary,
-            "task_metrics": task_metrics,
-            "attendance_stats": attendance_stats,
-            "assigned_projects": assigned_projects,
-            "assigned_assets": assigned_assets
-        }
-
         return success_response(
             message="Employee summary fetched successfully",
             data=summary_data
@@ -340,6 +321,9 @@ async def update_employee(
         )
         
         updated_employee = await repo.update_employee(employee_id, update_data, profile_pic_path)
+        await invalidate_dashboard("employees")
+        await refresh_employee_summary(employee_id, "profile")
+        await invalidate_employee_overview(employee_id)
         
         if not updated_employee:
             return error_response(message="Employee not found", status_code=404)
@@ -355,6 +339,9 @@ async def update_employee(
 async def delete_employee(employee_id: str):
     try:
         success = await repo.delete_employee(employee_id)
+        await invalidate_dashboard("employees")
+        await remove_employee_summary(employee_id)
+        await invalidate_employee_overview(employee_id)
         if not success:
             return error_response(message="Employee not found", status_code=404)
         return success_response(
@@ -5,6 +5,8 @@ from app.models import HolidayCreate, HolidayUpdate
 from typing import List
 
 from app.auth import verify_token
+from app.helper.calendar_helper import work_calendar
+from app.helper.dashboard_cache import invalidate_dashboard
 
 router = APIRouter(prefix="/holidays", tags=["holidays"], dependencies=[Depends(verify_token)])
 
@@ -12,6 +14,8 @@ router = APIRouter(prefix="/holidays", tags=["holidays"], dependencies=[Depends(
 async def create_holiday(holiday: HolidayCreate):
     try:
         new_holiday = await repo.create_holiday(holiday)
+        work_calendar.invalidate()
+        await invalidate_dashboard("holidays")
         return JSONResponse(
             status_code=201,
             content={"message": "Holiday created successfully", "success": True, "data": new_holiday}
@@ -59,6 +63,8 @@ async def get_holiday(holiday_id: str):
 async def update_holiday(holiday_id: str, holiday: HolidayUpdate):
     try:
         updated_holiday = await repo.update_holiday(holiday_id, holiday)
+        work_calendar.invalidate()
+        await invalidate_dashboard("holidays")
         if not updated_holiday:
             return JSONResponse(
                 status_code=404,
@@ -78,6 +84,8 @@ async def update_holiday(holiday_id: str, holiday: HolidayUpdate):
 async def delete_holiday(holiday_id: str):
     try:
         success = await repo.delete_holiday(holiday_id)
+        work_calendar.invalidate()
+        await invalidate_dashboard("holidays")
         if not success:
             return JSONResponse(
                 status_code=404,
@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from app.crud.repository import repository as repo
+from typing import Optional
+from app.auth import verify_token, get_current_user
+
+router = APIRouter(prefix="/jobs", tags=["jobs"], dependencies=[Depends(verify_token)])
+
+
+def _forbidden():
+    return JSONResponse(
+        status_code=403,
+        content={"message": "Only admins can view job runs", "success": False},
+    )
+
+
+@router.get("/runs")
+async def get_job_runs(
+    job_id: Optional[str] = None,
+    success: Optional[bool] = None,
+    page: int = 1,
+    limit: int = 20,
+    current_user: dict = Depends(get_current_user),
+):
+    try:
+        if current_user.get("role") != "admin":
+            return _forbidden()
+        if page < 1 or limit < 1:
+            return JSONResponse(
+                status_code=400,
+                content={"message": "page and limit must be at least 1", "success": False},
+            )
+
+        runs, total_items = await repo.get_job_runs(job_id, success, page, limit)
+        return JSONResponse(
+            status_code=200,
+            content={
+                "message": "Job runs fetched successfully",
+                "success": True,
+                "data": runs,
+                "meta": {
+                    "current_page": page,
+                    "total_pages": (total_items + limit - 1) // limit,
+                    "total_items": total_items,
+                    "limit": limit,
+                },
+            },
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"message": f"Server Error: {str(e)}", "success": False},
+        )
+
+
+@router.get("/runs/stats")
+async def get_job_run_stats(
+    window: int = 100,
+    current_user: dict = Depends(get_current_user),
+):
+    """p50/p95 durations and zero-record/failed run counts per job over the latest `window` runs."""
+    try:
+        if current_user.get("role") != "admin":
+            return _forbidden()
+        if window < 1:
+            return JSONResponse(
+                status_code=400,
+                content={"message": "window must be at least 1", "success": False},
+            )
+
+        stats = await repo.get_job_run_stats(window)
+        return JSONResponse(
+            status_code=200,
+            content={"message": "Job run stats fetched successfully", "success": True, "data": stats},
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"message": f"Server Error: {str(e)}", "success": False},
+        )
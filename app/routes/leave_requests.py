@@ -1,12 +1,15 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
 from fastapi.responses import JSONResponse
 from app.crud.repository import repository as repo
-from app.models import LeaveRequestCreate, LeaveRequestUpdate, LeaveRequestStatusUpdate
+from app.models import LeaveRequestCreate, LeaveRequestUpdate, LeaveRequestStatusUpdate, LeaveRequestBulkStatusUpdate
 from typing import List, Optional
 import os
+from bson import ObjectId
 from app.helper.file_handler import save_upload_file
 
 from app.auth import verify_token, get_current_user
+from app.helper.dashboard_cache import invalidate_dashboard
+from app.helper.employee_summary import apply_leave_requests
 
 router = APIRouter(prefix="/leave-requests", tags=["leave-requests"], dependencies=[Depends(verify_token)])
 
@@ -52,6 +55,8 @@ async def create_leave_request(
         )
         
         new_request = await repo.create_leave_request(leave_request, attachment_path)
+        await invalidate_dashboard("leaves", "attendance")
+        await apply_leave_requests([new_request])
         return JSONResponse(
             status_code=201,
             content={"message": "Leave request submitted successfully", "success": True, "data": new_request}
@@ -66,6 +71,12 @@ async def create_leave_request(
 async def get_leave_requests(
     id: Optional[str] = None, 
     status: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    leave_type_id: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    counts_only: bool = False,
     current_user: dict = Depends(get_current_user)
 ):
     try:
@@ -87,13 +98,26 @@ async def get_leave_requests(
                         content={"message": "Leave requests fetched successfully", "success": True, "data": []}
                     )
             
-        requests = await repo.get_leave_requests(id, status)
+        if counts_only:
+            counts = await repo.count_leave_requests(
+                employee_id=id, start_date=start_date, end_date=end_date, leave_type_id=leave_type_id
+            )
+            return JSONResponse(
+                status_code=200,
+                content={"message": "Leave request counts fetched successfully", "success": True, "data": counts}
+            )
+
+        requests, next_cursor = await repo.get_leave_requests(
+            id, status, start_date, end_date, leave_type_id, after, limit
+        )
 
         response_data = {
             "message": "Leave requests fetched successfully", 
             "success": True, 
             "data": requests
         }
+        if limit is not None:
+            response_data["meta"] = {"next_cursor": next_cursor, "limit": limit}
 
         if user_role == "employee" and id:
             balances = await repo.get_employee_leave_balances(id)
@@ -103,6 +127,11 @@ async def get_leave_requests(
             status_code=200,
             content=response_data
         )
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"message": str(e), "success": False}
+        )
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -171,7 +200,13 @@ async def update_leave_request(
             file_type=file_type
         )
         
+        previous_request = await repo.leave_requests.find_one(
+            {"_id": ObjectId(leave_request_id)}, {"employee_id": 1, "status": 1, "start_date": 1, "end_date": 1}
+        )
         updated_request = await repo.update_leave_request(leave_request_id, update_data, attachment_path)
+        await invalidate_dashboard("leaves", "attendance")
+        if updated_request:
+            await apply_leave_requests([updated_request], previous=[previous_request])
         if not updated_request:
             return JSONResponse(
                 status_code=404,
@@ -181,6 +216,11 @@ async def update_leave_request(
             status_code=200,
             content={"message": "Leave request updated successfully", "success": True, "data": updated_request}
         )
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"message": str(e), "success": False}
+        )
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -195,6 +235,9 @@ async def update_leave_status(leave_request_id: str, status_update: LeaveRequest
             rejection_reason=status_update.rejection_reason
         )
         updated_request = await repo.update_leave_request(leave_request_id, update_data)
+        await invalidate_dashboard("leaves", "attendance")
+        if updated_request:
+            await apply_leave_requests([updated_request])
         if not updated_request:
             return JSONResponse(
                 status_code=404,
@@ -204,16 +247,55 @@ async def update_leave_status(leave_request_id: str, status_update: LeaveRequest
             status_code=200,
             content={"message": f"Leave request {status_update.status} successfully", "success": True, "data": updated_request}
         )
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"message": str(e), "success": False}
+        )
     except Exception as e:
         return JSONResponse(
             status_code=500,
             content={"message": f"Failed to update leave status: {str(e)}", "success": False}
         )
 
+@router.patch("/status")
+async def update_leave_statuses(status_update: LeaveRequestBulkStatusUpdate):
+    try:
+        if status_update.status not in ("Approved", "Rejected"):
+            return JSONResponse(
+                status_code=400,
+                content={"message": "Status must be Approved or Rejected", "success": False}
+            )
+        updated_requests, errors = await repo.decide_leave_requests(
+            status_update.leave_request_ids, status_update.status, status_update.rejection_reason
+        )
+        await invalidate_dashboard("leaves", "attendance")
+        await apply_leave_requests(updated_requests)
+        return JSONResponse(
+            status_code=200,
+            content={
+                "message": f"{len(updated_requests)} leave requests {status_update.status}",
+                "success": not errors,
+                "data": updated_requests,
+                "errors": errors,
+            }
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"message": f"Failed to update leave statuses: {str(e)}", "success": False}
+        )
+
 @router.delete("/delete/{leave_request_id}")
 async def delete_leave_request(leave_request_id: str):
     try:
+        existing_request = await repo.leave_requests.find_one(
+            {"_id": ObjectId(leave_request_id)}, {"employee_id": 1, "status": 1, "start_date": 1, "end_date": 1}
+        )
         success = await repo.delete_leave_request(leave_request_id)
+        await invalidate_dashboard("leaves", "attendance")
+        if existing_request:
+            await apply_leave_requests([existing_request], removed=True)
         if not success:
             return JSONResponse(
                 status_code=404,
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import JSONResponse
 from app.crud.repository import repository as repo
 from app.models import LeaveTypeCreate, LeaveTypeUpdate
+from app.helper.employee_summary import mark_summaries_stale
 from typing import List
 
 from app.auth import verify_token
@@ -12,6 +13,7 @@ router = APIRouter(prefix="/leave-types", tags=["leave-types"], dependencies=[De
 async def create_leave_type(leave_type: LeaveTypeCreate):
     try:
         new_leave_type = await repo.create_leave_type(leave_type)
+        await mark_summaries_stale(None, "leaves")
         return JSONResponse(
             status_code=201,
             content={"message": "Leave type created successfully", "success": True, "data": new_leave_type}
@@ -59,6 +61,7 @@ async def get_leave_type(leave_type_id: str):
 async def update_leave_type(leave_type_id: str, leave_type: LeaveTypeUpdate):
     try:
         updated_leave_type = await repo.update_leave_type(leave_type_id, leave_type)
+        await mark_summaries_stale(None, "leaves")
         if not updated_leave_type:
             return JSONResponse(
                 status_code=404,
@@ -78,6 +81,7 @@ async def update_leave_type(leave_type_id: str, leave_type: LeaveTypeUpdate):
 async def delete_leave_type(leave_type_id: str):
     try:
         success = await repo.delete_leave_type(leave_type_id)
+        await mark_summaries_stale(None, "leaves")
         if not success:
             return JSONResponse(
                 status_code=404,
@@ -5,6 +5,7 @@ from app.models import MilestoneRoadmapCreate, MilestoneRoadmapUpdate, Milestone
 from typing import List, Optional
 from app.auth import verify_token
 from app.helper.file_handler import file_handler
+from app.helper.roadmap_rollup import get_roadmap_rollup, invalidate_roadmap_rollup
 
 router = APIRouter(prefix="/milestones-roadmaps", tags=["milestones-roadmaps"], dependencies=[Depends(verify_token)])
 
@@ -45,6 +46,7 @@ async def create_milestone_roadmap(
             attachments=item_attachments
         )
         new_item = await repo.create_milestone_roadmap(item)
+        await invalidate_roadmap_rollup(new_item.get("project_id"))
         return JSONResponse(
             status_code=201,
             content={"message": "Created successfully", "success": True, "data": new_item}
@@ -60,10 +62,11 @@ async def get_milestones_roadmaps(
     project_id: Optional[str] = None, 
     assigned_to: Optional[str] = None, 
     status: Optional[str] = None,
-    priority: Optional[str] = None
+    priority: Optional[str] = None,
+    search: Optional[str] = None
 ):
     try:
-        items = await repo.get_milestones_roadmaps(project_id, assigned_to, status, priority)
+        items = await repo.get_milestones_roadmaps(project_id, assigned_to, status, priority, search)
         return JSONResponse(
             status_code=200,
             content={"message": "Fetched successfully", "success": True, "data": items}
@@ -74,6 +77,20 @@ async def get_milestones_roadmaps(
             content={"message": f"Failed to fetch: {str(e)}", "success": False}
         )
 
+@router.get("/rollup")
+async def get_milestones_roadmaps_rollup(project_id: Optional[str] = None):
+    try:
+        rollups = await get_roadmap_rollup(project_id)
+        return JSONResponse(
+            status_code=200,
+            content={"message": "Fetched successfully", "success": True, "data": rollups}
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"message": f"Failed to fetch: {str(e)}", "success": False}
+        )
+
 @router.get("/{item_id}")
 async def get_milestone_roadmap(item_id: str):
     try:
@@ -138,7 +155,9 @@ async def update_milestone_roadmap(
             status=status,
             attachments=final_attachments if final_attachments else None
         )
+        previous_item = await repo.get_milestone_roadmap(item_id)
         updated_item = await repo.update_milestone_roadmap(item_id, item)
+        await invalidate_roadmap_rollup((previous_item or {}).get("project_id"), (updated_item or {}).get("project_id"))
         if not updated_item:
             return JSONResponse(
                 status_code=404,
@@ -157,7 +176,9 @@ async def update_milestone_roadmap(
 @router.delete("/{item_id}")
 async def delete_milestone_roadmap(item_id: str):
     try:
+        previous_item = await repo.get_milestone_roadmap(item_id)
         success = await repo.delete_milestone_roadmap(item_id)
+        await invalidate_roadmap_rollup((previous_item or {}).get("project_id"))
         if not success:
             return JSONResponse(
                 status_code=404,
@@ -3,6 +3,7 @@ from typing import Optional
 from app.auth import get_current_user
 from app.crud.repository import repository as repo
 from app.helper.response_helper import success_response, error_response
+from app.helper.employee_summary import refresh_employee_summary
 from app.models import EmployeeUpdate
 from app.helper.file_handler import file_handler
 from app.utils import normalize, verify_password, get_password_hash
@@ -108,6 +109,7 @@ async def update_profile(
         )
         
         updated_employee = await repo.update_employee(db_id, update_data, profile_pic_path)
+        await refresh_employee_summary(db_id, "profile")
         
         return success_response(message="Profile updated successfully", data=updated_employee)
     except Exception as e:
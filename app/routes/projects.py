@@ -7,6 +7,8 @@ from typing import List, Optional
 import json
 
 from app.auth import verify_token, require_permission
+from app.helper.dashboard_cache import invalidate_dashboard
+from app.helper.employee_summary import mark_summaries_stale
 
 router = APIRouter(prefix="/projects", tags=["projects"], dependencies=[Depends(verify_token)])
 
@@ -55,6 +57,8 @@ async def create_project(
         )
 
         new_project = await repo.create_project(project_data, logo_path)
+        await invalidate_dashboard("projects")
+        await mark_summaries_stale(None, "projects")
         return JSONResponse(
             status_code=201,
             content={"message": "Project created successfully", "success": True, "data": new_project}
@@ -81,12 +85,41 @@ async def get_projects_summary():
         )
 
 @router.get("/all", dependencies=[Depends(require_permission("project:view"))])
-async def get_projects():
+async def get_projects(
+    page: Optional[int] = None,
+    limit: int = 20,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    client_id: Optional[str] = None,
+    member_id: Optional[str] = None,
+    search: Optional[str] = None,
+    counts_only: bool = False,
+):
+    """All projects, or one page of them when `page` is given; `counts_only` returns status counts only."""
     try:
-        projects = await repo.get_projects()
+        if counts_only:
+            counts = await repo.count_projects(
+                status=status, priority=priority, client_id=client_id, member_id=member_id, search=search
+            )
+            return JSONResponse(
+                status_code=200,
+                content={"message": "Project counts fetched successfully", "success": True, "data": counts}
+            )
+
+        projects, total_items = await repo.get_projects(page, limit, status, priority, client_id, member_id, search)
+        content = {"message": "Projects fetched successfully", "success": True, "data": projects}
+        if page:
+            content["meta"] = {
+                "current_page": page,
+                "total_pages": (total_items + limit - 1) // limit if limit > 0 else 0,
+                "total_items": total_items,
+                "limit": limit,
+            }
+        return JSONResponse(status_code=200, content=content)
+    except ValueError as e:
         return JSONResponse(
-            status_code=200,
-            content={"message": "Projects fetched successfully", "success": True, "data": projects}
+            status_code=400,
+            content={"message": str(e), "success": False}
         )
     except Exception as e:
         return JSONResponse(
@@ -159,6 +192,8 @@ async def update_project(
         )
 
         updated_project = await repo.update_project(project_id, update_data, logo_path)
+        await invalidate_dashboard("projects")
+        await mark_summaries_stale(None, "projects")
         if not updated_project:
             return JSONResponse(
                 status_code=404,
@@ -178,6 +213,8 @@ async def update_project(
 async def delete_project(project_id: str):
     try:
         success = await repo.delete_project(project_id)
+        await invalidate_dashboard("projects")
+        await mark_summaries_stale(None, "projects")
         if not success:
             return JSONResponse(
                 status_code=404,
@@ -4,6 +4,7 @@ from app.crud.repository import repository as repo
 from app.models import ShiftCreate, ShiftUpdate
 from typing import List
 from app.auth import verify_token, get_current_user
+from app.jobs.scheduler import sync_shift_jobs
 
 router = APIRouter(prefix="/shifts", tags=["shifts"])
 
@@ -12,6 +13,7 @@ async def create_shift(shift: ShiftCreate, current_user: dict = Depends(get_curr
     try:
         # Permission check could go here
         result = await repo.create_shift(shift)
+        await sync_shift_jobs()
         return JSONResponse(status_code=201, content={"message": "Shift created successfully", "success": True, "data": result})
     except Exception as e:
         return JSONResponse(status_code=500, content={"message": f"Server Error: {str(e)}", "success": False})
@@ -40,6 +42,7 @@ async def update_shift(shift_id: str, shift: ShiftUpdate, current_user: dict = D
         result = await repo.update_shift(shift_id, shift)
         if not result:
             return JSONResponse(status_code=404, content={"message": "Shift not found", "success": False})
+        await sync_shift_jobs()
         return JSONResponse(status_code=200, content={"message": "Shift updated successfully", "success": True, "data": result})
     except Exception as e:
         return JSONResponse(status_code=500, content={"message": f"Server Error: {str(e)}", "success": False})
@@ -50,6 +53,7 @@ async def delete_shift(shift_id: str, current_user: dict = Depends(get_current_u
         result = await repo.delete_shift(shift_id)
         if not result:
             return JSONResponse(status_code=404, content={"message": "Shift not found", "success": False})
+        await sync_shift_jobs()
         return JSONResponse(status_code=200, content={"message": "Shift deleted successfully", "success": True})
     except Exception as e:
         return JSONResponse(status_code=500, content={"message": f"Server Error: {str(e)}", "success": False})
@@ -5,6 +5,9 @@ from app.crud.repository import repository as repo
 from app.models import TaskCreate, TaskUpdate, EODReportRequest, TaskResponse, TaskAttachment, EODReportItem
 from typing import List, Optional
 from app.auth import verify_token
+from app.helper.dashboard_cache import invalidate_dashboard
+from app.helper.employee_summary import apply_tasks, remove_tasks
+from app.helper.roadmap_rollup import invalidate_roadmap_rollup
 from app.helper.file_handler import file_handler
 
 router = APIRouter(prefix="/tasks", tags=["tasks"], dependencies=[Depends(verify_token)])
@@ -23,6 +26,7 @@ async def create_task(
     tags: List[str] = Form([], alias="tags[]"),
     status: str = Form("Todo"),
     progress: float = Form(0.0),
+    milestone_id: Optional[str] = Form(None),
     attachments: List[UploadFile] = File([])
 ):
     try:
@@ -49,13 +53,22 @@ async def create_task(
             tags=tags,
             status=status,
             progress=progress,
+            milestone_id=milestone_id,
             attachments=task_attachments
         )
         new_task = await repo.create_task(task)
+        await invalidate_dashboard("tasks")
+        await apply_tasks([new_task])
+        await invalidate_roadmap_rollup(new_task.get("project_id"))
         return JSONResponse(
             status_code=201,
             content={"message": "Task created successfully", "success": True, "data": new_task}
         )
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"message": str(e), "success": False}
+        )
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -69,10 +82,11 @@ async def get_tasks(
     start_date: Optional[str] = None,
     date: Optional[str] = None,
     status: Optional[str] = None,
-    priority: Optional[str] = None
+    priority: Optional[str] = None,
+    search: Optional[str] = None
 ):
     try:
-        tasks = await repo.get_tasks(project_id, assigned_to, start_date, date, status, priority)
+        tasks = await repo.get_tasks(project_id, assigned_to, start_date, date, status, priority, search)
         return JSONResponse(
             status_code=200,
             content={"message": "Tasks fetched successfully", "success": True, "data": tasks}
@@ -112,7 +126,15 @@ async def process_eod_report(
             new_attachments=new_attachments
         )
             
-        results = await repo.process_eod_report([report_item])
+        results, errors = await repo.process_eod_report([report_item])
+        if errors and not results:
+            return JSONResponse(
+                status_code=404,
+                content={"message": errors[0], "success": False}
+            )
+        await invalidate_dashboard("tasks")
+        await apply_tasks(results)
+        await invalidate_roadmap_rollup(*[t.get("project_id") for t in results])
         return JSONResponse(
             status_code=200,
             content={"message": "EOD report processed successfully", "success": True, "data": results}
@@ -125,6 +147,29 @@ async def process_eod_report(
             content={"message": f"Failed to process EOD report: {str(e)}", "success": False}
         )
 
+@router.post("/eod-report/bulk")
+async def process_eod_reports(request: EODReportRequest):
+    try:
+        results, errors = await repo.process_eod_report(request.reports)
+        if results:
+            await invalidate_dashboard("tasks")
+            await apply_tasks(results)
+            await invalidate_roadmap_rollup(*{t.get("project_id") for t in results})
+        return JSONResponse(
+            status_code=200,
+            content={
+                "message": f"Processed {len(results)} of {len(request.reports)} EOD reports",
+                "success": not errors,
+                "data": results,
+                "errors": errors,
+            }
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"message": f"Failed to process EOD reports: {str(e)}", "success": False}
+        )
+
 @router.get("/eod-reports")
 async def get_eod_reports(
     project_id: Optional[str] = None, 
@@ -132,19 +177,63 @@ async def get_eod_reports(
     date: Optional[str] = None,
     priority: Optional[str] = None,
     search: Optional[str] = None,
+    page: Optional[int] = None,
+    limit: int = 50,
 ):
     try:
-        reports = await repo.get_eod_reports(project_id, assigned_to, date, priority, search)
-        return JSONResponse(
-            status_code=200,
-            content={"message": "EOD reports fetched successfully", "success": True, "data": reports}
+        reports, total_items = await repo.get_eod_reports(
+            project_id, assigned_to, date, priority, search, page, limit
         )
+        content = {"message": "EOD reports fetched successfully", "success": True, "data": reports}
+        if page:
+            content["meta"] = {
+                "current_page": page,
+                "total_pages": (total_items + limit - 1) // limit if limit > 0 else 0,
+                "total_items": total_items,
+                "limit": limit,
+            }
+        return JSONResponse(status_code=200, content=content)
     except Exception as e:
         return JSONResponse(
             status_code=500,
             content={"message": f"Failed to fetch EOD reports: {str(e)}", "success": False}
         )
 
+@router.get("/calendar")
+async def get_task_calendar(
+    start_date: str,
+    end_date: str,
+    project_id: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    page: Optional[int] = None,
+    limit: int = 7,
+):
+    try:
+        days, total_days = await repo.get_task_calendar(
+            start_date, end_date, project_id, assigned_to, status, priority, page, limit
+        )
+        content = {"message": "Task calendar fetched successfully", "success": True, "data": days}
+        if page:
+            content["meta"] = {
+                "current_page": page,
+                "total_pages": (total_days + limit - 1) // limit if limit > 0 else 0,
+                "total_items": total_days,
+                "limit": limit,
+            }
+        return JSONResponse(status_code=200, content=content)
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"message": str(e), "success": False}
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"message": f"Failed to fetch task calendar: {str(e)}", "success": False}
+        )
+
 @router.get("/{task_id}")
 async def get_task(task_id: str):
     try:
@@ -167,6 +256,7 @@ async def get_task(task_id: str):
 @router.put("/{task_id}")
 async def update_task(
     task_id: str,
+    request: Request,
     project_id: Optional[str] = Form(None),
     task_name: Optional[str] = Form(None),
     description: Optional[str] = Form(None),
@@ -179,10 +269,16 @@ async def update_task(
     tags: Optional[List[str]] = Form(None, alias="tags[]"),
     status: Optional[str] = Form(None),
     progress: Optional[float] = Form(None),
+    milestone_id: Optional[str] = Form(None),
     is_overdue_moved: Optional[bool] = Form(None),
     attachments: List[UploadFile] = File(None)
 ):
     try:
+        # FastAPI turns an empty form field into None; a sent but empty
+        # milestone_id means "unlink the milestone"
+        if milestone_id is None and (await request.form()).get("milestone_id") == "":
+            milestone_id = ""
+
         task_attachments = []
         if attachments:
             for file in attachments:
@@ -215,10 +311,17 @@ async def update_task(
             tags=tags,
             status=status,
             progress=progress,
+            milestone_id=milestone_id,
             is_overdue_moved=is_overdue_moved,
             attachments=final_attachments if final_attachments else None
         )
+        previous_assignees = await repo.get_task_assignees([task_id])
+        previous_projects = await repo.get_task_project_ids([task_id])
         updated_task = await repo.update_task(task_id, task)
+        await invalidate_dashboard("tasks")
+        if updated_task:
+            await apply_tasks([updated_task], previous_assignees)
+        await invalidate_roadmap_rollup(*previous_projects, (updated_task or {}).get("project_id"))
         if not updated_task:
             return JSONResponse(
                 status_code=404,
@@ -228,6 +331,11 @@ async def update_task(
             status_code=200,
             content={"message": "Task updated successfully", "success": True, "data": updated_task}
         )
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"message": str(e), "success": False}
+        )
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -239,7 +347,12 @@ async def update_task(
 @router.delete("/{task_id}")
 async def delete_task(task_id: str):
     try:
+        previous_assignees = await repo.get_task_assignees([task_id])
+        previous_projects = await repo.get_task_project_ids([task_id])
         success = await repo.delete_task(task_id)
+        await invalidate_dashboard("tasks")
+        await remove_tasks([task_id], previous_assignees)
+        await invalidate_roadmap_rollup(*previous_projects)
         if not success:
             return JSONResponse(
                 status_code=404,
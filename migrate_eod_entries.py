@@ -0,0 +1,21 @@
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.crud.repository import repository
+
+
+async def migrate():
+    print("Moving embedded task EOD history into eod_entries...")
+
+    await repository.ensure_indexes()
+    total = await repository.migrate_eod_history()
+
+    print(f"Done. {total} EOD entries moved.")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -0,0 +1,21 @@
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.crud.repository import repository
+
+
+async def migrate():
+    print("Rebuilding the leave balance ledger from leave requests...")
+
+    await repository.ensure_indexes()
+    total = await repository.rebuild_leave_balances()
+
+    print(f"Done. {total} ledger updates applied.")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
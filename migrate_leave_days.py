@@ -0,0 +1,21 @@
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.crud.repository import repository
+
+
+async def migrate():
+    print("Rebuilding leave_days from approved leave requests...")
+
+    await repository.ensure_indexes()
+    total = await repository.rebuild_leave_days()
+
+    print(f"Done. {total} leave days written.")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -0,0 +1,21 @@
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.crud.repository import repository
+
+
+async def migrate():
+    print("Normalizing task start/end dates...")
+
+    await repository.ensure_indexes()
+    total = await repository.normalize_task_dates()
+
+    print(f"Done. {total} tasks updated.")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())